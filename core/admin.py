@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin
 from .models import (
     CustomUser, Proyecto, Usuario, ProyectoRoles, ProyectoAliados,
     ProyectoProductos, UsuarioHabilidades, UsuarioConocimiento,
-    UsuarioEstudios, UsuarioExperiencia
+    UsuarioEstudios, UsuarioExperiencia, Termino, PerfilImportado
 )
 
 class CustomUserAdmin(UserAdmin):
@@ -23,3 +23,5 @@ admin.site.register(UsuarioHabilidades)
 admin.site.register(UsuarioConocimiento)
 admin.site.register(UsuarioEstudios)
 admin.site.register(UsuarioExperiencia)
+admin.site.register(Termino)
+admin.site.register(PerfilImportado)
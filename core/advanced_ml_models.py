@@ -13,11 +13,11 @@ from sklearn.decomposition import PCA
 from sklearn.pipeline import Pipeline
 import logging
 import warnings
-from collections import Counter
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Conv1D, Dense, Flatten, Dropout, MaxPooling1D, BatchNormalization
-from tensorflow.keras.optimizers import Adam
+from .feature_store import load_user_features
+from .term_index import get_term_index
+from .text_matching import TermMatcher
+from .cnn_scorer import cnn_model_key, get_cnn_scorer, latest_cnn_scorer, training_set_key
+from .ranking import top_k
 
 # Suprimir advertencias
 warnings.filterwarnings('ignore', category=UserWarning, message='.*Precision is ill-defined.*')
@@ -26,6 +26,21 @@ warnings.filterwarnings('ignore', category=UserWarning, message='.*Recall is ill
 
 logger = logging.getLogger(__name__)
 
+# Características para escalado
+ADVANCED_FEATURES = ['num_habilidades', 'num_conocimientos', 'num_experiencias', 'num_estudios',
+                     'match_habilidades', 'match_conocimientos', 'promedio_nivel_conocimientos',
+                     'max_nivel_conocimientos', 'max_tiempo_experiencia', 'cumple_experiencia',
+                     'nivel_educativo', 'experiencia_relevante', 'diversidad_habilidades',
+                     'consistencia_experiencia', 'promedio_nivel_habilidades', 'max_nivel_habilidades',
+                     'coherencia_habilidades_conocimientos', 'progresion_experiencia', 'especializacion',
+                     'complejidad_perfil']
+
+# Características ya normalizadas
+NORMALIZED_FEATURES = ['match_habilidades', 'match_conocimientos', 'cumple_experiencia']
+
+# Orden de las columnas de X que devuelve prepare_advanced_data
+FEATURE_COLUMNS = [f for f in ADVANCED_FEATURES if f not in NORMALIZED_FEATURES] + NORMALIZED_FEATURES
+
 
 class AdvancedRecommendationSystem:
     """
@@ -74,133 +89,47 @@ class AdvancedRecommendationSystem:
             roles_habilidades = {h.strip() for h in roles_habilidades if h.strip()}
             roles_conocimientos = {c.strip() for c in roles_conocimientos if c.strip()}
             
-            for usuario in usuarios:
-                try:
-                    habilidades = list(usuario.habilidades.all()) if hasattr(usuario, 'habilidades') else []
-                    conocimientos = list(usuario.conocimientos.all()) if hasattr(usuario, 'conocimientos') else []
-                    experiencias = list(usuario.experiencias.all()) if hasattr(usuario, 'experiencias') else []
-                    estudios = list(usuario.estudios.all()) if hasattr(usuario, 'estudios') else []
-                except:
-                    habilidades = conocimientos = experiencias = estudios = []
-                
-                # Características básicas
-                habilidades_usuario = set()
-                if habilidades:
-                    for h in habilidades:
-                        if hasattr(h, 'habilidad'):
-                            habilidades_usuario.add(h.habilidad.lower())
-                
-                conocimientos_usuario = set()
-                if conocimientos:
-                    for c in conocimientos:
-                        if hasattr(c, 'conocimiento'):
-                            conocimientos_usuario.add(c.conocimiento.lower())
-                
-                # Características avanzadas
-                match_habilidades = len(habilidades_usuario.intersection(roles_habilidades)) / len(roles_habilidades) if roles_habilidades else 0
-                match_conocimientos = len(conocimientos_usuario.intersection(roles_conocimientos)) / len(roles_conocimientos) if roles_conocimientos else 0
-                
-                # Niveles de conocimientos relevantes
-                niveles_conocimientos = []
-                for c in conocimientos:
-                    if hasattr(c, 'conocimiento') and hasattr(c, 'nivel'):
-                        if c.conocimiento.lower() in roles_conocimientos:
-                            niveles_conocimientos.append(c.nivel)
-                
-                promedio_nivel_conocimientos = np.mean(niveles_conocimientos) if niveles_conocimientos else 0
-                max_nivel_conocimientos = max(niveles_conocimientos) if niveles_conocimientos else 0
-                
+            # Características del perfil precalculadas (independientes del proyecto)
+            perfiles = load_user_features(usuarios)
+
+            # Matches contra los términos de los roles (producto disperso sobre todos los usuarios)
+            matches = get_term_index().match(
+                [perfil.user_id_id for perfil in perfiles], roles_habilidades, roles_conocimientos
+            )
+
+            # Buscador de términos de los roles en las actividades de experiencia
+            matcher = TermMatcher(roles_habilidades | roles_conocimientos)
+
+            for i, perfil in enumerate(perfiles):
                 # Experiencia
-                max_tiempo_experiencia = 0
-                if experiencias:
-                    for e in experiencias:
-                        if hasattr(e, 'tiempo'):
-                            max_tiempo_experiencia = max(max_tiempo_experiencia, e.tiempo)
-                
-                cumple_experiencia = 1 if max_tiempo_experiencia >= roles_experiencia_min else 0
-                
-                # Educación
-                nivel_educativo = 0
-                if estudios:
-                    for e in estudios:
-                        if hasattr(e, 'nivel'):
-                            nivel_educativo = max(nivel_educativo, e.nivel)
+                cumple_experiencia = 1 if perfil.max_tiempo_experiencia >= roles_experiencia_min else 0
                 
                 # Experiencia relevante
-                experiencia_relevante = 0
-                for exp in experiencias:
-                    if hasattr(exp, 'actividades') and hasattr(exp, 'tiempo'):
-                        actividades_lower = exp.actividades.lower()
-                        if any(h in actividades_lower for h in roles_habilidades) or \
-                                any(c in actividades_lower for c in roles_conocimientos):
-                            experiencia_relevante += exp.tiempo
-                
-                # Características avanzadas
-                diversidad_habilidades = len(set(getattr(h, 'categoria', 'general') for h in habilidades)) if habilidades else 0
-                tiempos_experiencia = [e.tiempo for e in experiencias if hasattr(e, 'tiempo')]
-                consistencia_experiencia = np.std(tiempos_experiencia) if len(tiempos_experiencia) > 1 else 0
-                
-                niveles_habilidades = [getattr(h, 'nivel', 3) for h in habilidades if hasattr(h, 'nivel')]
-                promedio_nivel_habilidades = np.mean(niveles_habilidades) if niveles_habilidades else 0
-                max_nivel_habilidades = max(niveles_habilidades) if niveles_habilidades else 0
-                
-                # Nuevas características sofisticadas
-                # Coherencia entre habilidades y conocimientos
-                coherencia_habilidades_conocimientos = 0
-                if habilidades and conocimientos:
-                    habilidades_set = {h.habilidad.lower() for h in habilidades if hasattr(h, 'habilidad')}
-                    conocimientos_set = {c.conocimiento.lower() for c in conocimientos if hasattr(c, 'conocimiento')}
-                    if habilidades_set and conocimientos_set:
-                        coherencia_habilidades_conocimientos = len(habilidades_set.intersection(conocimientos_set)) / len(habilidades_set.union(conocimientos_set))
-                
-                # Progresión de experiencia
-                progresion_experiencia = 0
-                if len(experiencias) > 1:
-                    tiempos_ordenados = sorted([e.tiempo for e in experiencias if hasattr(e, 'tiempo')])
-                    if len(tiempos_ordenados) > 1:
-                        progresion_experiencia = np.corrcoef(range(len(tiempos_ordenados)), tiempos_ordenados)[0, 1]
-                        if np.isnan(progresion_experiencia):
-                            progresion_experiencia = 0
-                
-                # Especialización vs generalización
-                especializacion = 0
-                if habilidades:
-                    categorias = [getattr(h, 'categoria', 'general') for h in habilidades]
-                    if categorias:
-                        categoria_counts = Counter(categorias)
-                        especializacion = max(categoria_counts.values()) / len(categorias)
-                
-                # Complejidad de perfil
-                complejidad_perfil = (
-                    len(habilidades) * 0.3 +
-                    len(conocimientos) * 0.3 +
-                    len(experiencias) * 0.2 +
-                    len(estudios) * 0.2
-                ) / 20  # Normalizar
+                experiencia_relevante = matcher.experiencia_relevante(perfil)
                 
                 # Vector de características expandido
                 feature_vector = {
-                    'user_id': usuario.id,
-                    'num_habilidades': len(habilidades),
-                    'num_conocimientos': len(conocimientos),
-                    'num_experiencias': len(experiencias),
-                    'num_estudios': len(estudios),
-                    'match_habilidades': match_habilidades,
-                    'match_conocimientos': match_conocimientos,
-                    'promedio_nivel_conocimientos': promedio_nivel_conocimientos,
-                    'max_nivel_conocimientos': max_nivel_conocimientos,
-                    'max_tiempo_experiencia': max_tiempo_experiencia,
+                    'user_id': perfil.user_id_id,
+                    'num_habilidades': perfil.num_habilidades,
+                    'num_conocimientos': perfil.num_conocimientos,
+                    'num_experiencias': perfil.num_experiencias,
+                    'num_estudios': perfil.num_estudios,
+                    'match_habilidades': matches['match_habilidades'][i],
+                    'match_conocimientos': matches['match_conocimientos'][i],
+                    'promedio_nivel_conocimientos': matches['promedio_nivel_conocimientos'][i],
+                    'max_nivel_conocimientos': matches['max_nivel_conocimientos'][i],
+                    'max_tiempo_experiencia': perfil.max_tiempo_experiencia,
                     'cumple_experiencia': cumple_experiencia,
-                    'nivel_educativo': nivel_educativo,
+                    'nivel_educativo': perfil.nivel_educativo,
                     'experiencia_relevante': experiencia_relevante,
-                    'diversidad_habilidades': diversidad_habilidades,
-                    'consistencia_experiencia': consistencia_experiencia,
-                    'promedio_nivel_habilidades': promedio_nivel_habilidades,
-                    'max_nivel_habilidades': max_nivel_habilidades,
-                    'coherencia_habilidades_conocimientos': coherencia_habilidades_conocimientos,
-                    'progresion_experiencia': progresion_experiencia,
-                    'especializacion': especializacion,
-                    'complejidad_perfil': complejidad_perfil
+                    'diversidad_habilidades': perfil.diversidad_habilidades,
+                    'consistencia_experiencia': perfil.consistencia_experiencia,
+                    'promedio_nivel_habilidades': perfil.promedio_nivel_habilidades,
+                    'max_nivel_habilidades': perfil.max_nivel_habilidades,
+                    'coherencia_habilidades_conocimientos': perfil.coherencia_habilidades_conocimientos,
+                    'progresion_experiencia': perfil.progresion_experiencia,
+                    'especializacion': perfil.especializacion,
+                    'complejidad_perfil': perfil.complejidad_perfil
                 }
                 
                 usuarios_features.append(feature_vector)
@@ -208,22 +137,17 @@ class AdvancedRecommendationSystem:
             # Convertir a DataFrame
             df_usuarios = pd.DataFrame(usuarios_features)
             
-            # Características para escalado
-            features = ['num_habilidades', 'num_conocimientos', 'num_experiencias', 'num_estudios',
-                       'match_habilidades', 'match_conocimientos', 'promedio_nivel_conocimientos',
-                       'max_nivel_conocimientos', 'max_tiempo_experiencia', 'cumple_experiencia',
-                       'nivel_educativo', 'experiencia_relevante', 'diversidad_habilidades',
-                       'consistencia_experiencia', 'promedio_nivel_habilidades', 'max_nivel_habilidades',
-                       'coherencia_habilidades_conocimientos', 'progresion_experiencia', 'especializacion',
-                       'complejidad_perfil']
-            
-            # Características ya normalizadas
-            normalized_features = ['match_habilidades', 'match_conocimientos', 'cumple_experiencia']
+            features = ADVANCED_FEATURES
+            normalized_features = NORMALIZED_FEATURES
             scaling_features = [f for f in features if f not in normalized_features]
             
             # Escalar características
             if scaling_features and len(df_usuarios) > 0:
-                X_scaled = self.scaler.fit_transform(df_usuarios[scaling_features])
+                if hasattr(self.scaler, 'mean_'):
+                    # Escalador ya ajustado (restaurado del registro de modelos)
+                    X_scaled = self.scaler.transform(df_usuarios[scaling_features])
+                else:
+                    X_scaled = self.scaler.fit_transform(df_usuarios[scaling_features])
                 X_scaled = pd.DataFrame(X_scaled, columns=scaling_features, index=df_usuarios.index)
                 
                 # Combinar con características normalizadas
@@ -500,40 +424,37 @@ class AdvancedRecommendationSystem:
             
             # Si los modelos no están entrenados
             if not self.models_trained:
-                recommendations = []
-                for i, user_id in enumerate(user_ids):
-                    features = X[i]
-                    match_score = (features[5] + features[6]) / 2
-                    experiencia_score = features[9]
-                    educacion_score = np.clip(features[10] / 6, 0, 1)
-                    experiencia_relevante_score = np.clip(features[11] / 15, 0, 1)
-                    coherencia_score = features[16]
-                    progresion_score = np.clip(features[17], 0, 1)
-                    especializacion_score = features[18]
-                    complejidad_score = features[19]
-                    
-                    combined_score = (
-                        match_score * 0.20 +
-                        experiencia_score * 0.10 +
-                        educacion_score * 0.08 +
-                        experiencia_relevante_score * 0.15 +
-                        coherencia_score * 0.08 +
-                        progresion_score * 0.08 +
-                        especializacion_score * 0.08 +
-                        complejidad_score * 0.13
-                    )
-                    
-                    if combined_score > 0.3:
-                        recommendations.append({
-                            'user_id': user_id,
-                            'score': float(combined_score),
-                            'ensemble_score': float(combined_score),
-                            'confidence': 'Alta' if combined_score > 0.7 else 'Media' if combined_score > 0.5 else 'Baja',
-                            'model_type': 'Advanced Ensemble'
-                        })
+                match_score = (X[:, 5] + X[:, 6]) / 2
+                experiencia_score = X[:, 9]
+                educacion_score = np.clip(X[:, 10] / 6, 0, 1)
+                experiencia_relevante_score = np.clip(X[:, 11] / 15, 0, 1)
+                coherencia_score = X[:, 16]
+                progresion_score = np.clip(X[:, 17], 0, 1)
+                especializacion_score = X[:, 18]
+                complejidad_score = X[:, 19]
+                
+                combined_scores = (
+                    match_score * 0.20 +
+                    experiencia_score * 0.10 +
+                    educacion_score * 0.08 +
+                    experiencia_relevante_score * 0.15 +
+                    coherencia_score * 0.08 +
+                    progresion_score * 0.08 +
+                    especializacion_score * 0.08 +
+                    complejidad_score * 0.13
+                )
                 
-                recommendations.sort(key=lambda x: x['score'], reverse=True)
-                return recommendations[:top_n]
+                recommendations = []
+                for idx in top_k(combined_scores, top_n):
+                    combined_score = float(combined_scores[idx])
+                    recommendations.append({
+                        'user_id': user_ids[idx],
+                        'score': combined_score,
+                        'ensemble_score': combined_score,
+                        'confidence': 'Alta' if combined_score > 0.7 else 'Media' if combined_score > 0.5 else 'Baja',
+                        'model_type': 'Advanced Ensemble'
+                    })
+                return recommendations
             
             # Obtener predicciones del ensemble
             try:
@@ -555,20 +476,16 @@ class AdvancedRecommendationSystem:
                 normalized_scores = ensemble_scores
             
             # Obtener mejores candidatos
-            top_indices = np.argsort(normalized_scores)[-top_n:][::-1]
-            
             recommendations = []
-            for idx in top_indices:
+            for idx in top_k(normalized_scores, top_n):
                 combined_score = float(normalized_scores[idx])
-                
-                if combined_score > 0.3:
-                    recommendations.append({
-                        'user_id': user_ids[idx],
-                        'score': combined_score,
-                        'ensemble_score': float(ensemble_scores[idx]),
-                        'confidence': 'Alta' if combined_score > 0.7 else 'Media' if combined_score > 0.5 else 'Baja',
-                        'model_type': 'Advanced Ensemble (RF + GB + SVM + MLP)'
-                    })
+                recommendations.append({
+                    'user_id': user_ids[idx],
+                    'score': combined_score,
+                    'ensemble_score': float(ensemble_scores[idx]),
+                    'confidence': 'Alta' if combined_score > 0.7 else 'Media' if combined_score > 0.5 else 'Baja',
+                    'model_type': 'Advanced Ensemble (RF + GB + SVM + MLP)'
+                })
             
             return recommendations
             
@@ -576,6 +493,30 @@ class AdvancedRecommendationSystem:
             logger.error(f"Error obteniendo recomendaciones avanzadas: {str(e)}")
             raise
     
+    def export_state(self, metrics=None):
+        """
+        Devuelve el estado entrenado del ensemble para guardarlo en el registro de modelos
+        """
+        return {
+            'scaler': self.scaler,
+            'ensemble_model': self.ensemble_model,
+            'feature_selector': self.feature_selector,
+            'pca': self.pca,
+            'models_trained': self.models_trained,
+            'metrics': metrics
+        }
+    
+    def load_state(self, state):
+        """
+        Restaura un estado entrenado guardado con export_state
+        """
+        self.scaler = state['scaler']
+        self.ensemble_model = state['ensemble_model']
+        self.feature_selector = state['feature_selector']
+        self.pca = state['pca']
+        self.models_trained = state['models_trained']
+        return state.get('metrics')
+    
     def get_advanced_performance_summary(self):
         """
         Devuelve resumen del rendimiento de modelos avanzados
@@ -597,40 +538,24 @@ class AdvancedRecommendationSystem:
             }
         }
     
-    def get_cnn_recommendations(self, X, user_ids, top_n=10):
+    def get_cnn_recommendations(self, X, user_ids, top_n=10, model_key=None):
         """
         Obtiene recomendaciones usando una red neuronal convolucional (CNN)
+        
+        Args:
+            model_key: Clave de la red (cnn_key); por defecto se deriva del
+                conjunto de entrenamiento
         """
         try:
             if len(X) == 0:
                 return []
-            X_cnn = X
-            # Normalización
-            X_cnn = (X_cnn - X_cnn.mean(axis=0)) / (X_cnn.std(axis=0) + 1e-8)
-            # Redimensionar para CNN (samples, timesteps, features)
-            X_cnn = X_cnn.reshape((X_cnn.shape[0], X_cnn.shape[1], 1))
-            # Etiquetas sintéticas
-            labels, scores = self._create_advanced_labels(X.reshape((X.shape[0], X.shape[1])))
-            # Definir modelo CNN simple
-            model = Sequential([
-                Conv1D(32, 3, activation='relu', input_shape=(X_cnn.shape[1], 1)),
-                BatchNormalization(),
-                MaxPooling1D(2),
-                Dropout(0.2),
-                Conv1D(64, 3, activation='relu'),
-                BatchNormalization(),
-                MaxPooling1D(2),
-                Dropout(0.2),
-                Flatten(),
-                Dense(64, activation='relu'),
-                Dropout(0.2),
-                Dense(1, activation='sigmoid')
-            ])
-            model.compile(optimizer=Adam(learning_rate=0.001), loss='binary_crossentropy', metrics=['accuracy'])
-            # Entrenamiento
-            model.fit(X_cnn, labels, epochs=30, batch_size=8, verbose=0)
+            # Red entrenada una sola vez por esquema de características y datos
+            scorer = get_cnn_scorer(FEATURE_COLUMNS, model_key or training_set_key(FEATURE_COLUMNS, X))
+            if not scorer.load():
+                labels, _ = self._create_advanced_labels(X)
+                scorer.train(X, labels)
             # Predicciones
-            y_pred = model.predict(X_cnn).flatten()
+            y_pred = scorer.predict(X)
             # Normalizar
             if len(y_pred) > 1:
                 min_score = y_pred.min()
@@ -642,19 +567,36 @@ class AdvancedRecommendationSystem:
             else:
                 normalized_scores = y_pred
             # Seleccionar top_n
-            top_indices = normalized_scores.argsort()[-top_n:][::-1]
             recommendations = []
-            for idx in top_indices:
+            for idx in top_k(normalized_scores, top_n):
                 score = float(normalized_scores[idx])
-                if score > 0.3:
-                    recommendations.append({
-                        'user_id': user_ids[idx],
-                        'score': score,
-                        'cnn_score': float(y_pred[idx]),
-                        'confidence': 'Alta' if score > 0.7 else 'Media' if score > 0.5 else 'Baja',
-                        'model_type': 'CNN'
-                    })
+                recommendations.append({
+                    'user_id': user_ids[idx],
+                    'score': score,
+                    'cnn_score': float(y_pred[idx]),
+                    'confidence': 'Alta' if score > 0.7 else 'Media' if score > 0.5 else 'Baja',
+                    'model_type': 'CNN'
+                })
             return recommendations
         except Exception as e:
             logger.error(f"Error en recomendaciones CNN: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+
+def cnn_key(proyecto_id, roles_proyecto, usuarios):
+    """Clave de la CNN de un proyecto (ver cnn_scorer.cnn_model_key)."""
+    return cnn_model_key(FEATURE_COLUMNS, proyecto_id, roles_proyecto, usuarios)
+
+
+def warm_up_cnn():
+    """
+    Precalienta la CNN de recomendaciones del proceso actual con la red
+    guardada más reciente. Pensado para ejecutarse al iniciar los workers,
+    tras un despliegue.
+    """
+    try:
+        scorer = latest_cnn_scorer(FEATURE_COLUMNS)
+        return scorer.warm_up() if scorer else False
+    except Exception as e:
+        logger.warning(f"Error precalentando la CNN: {e}")
+        return False
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+from .data_services import fetch_user_profiles, new_summary, store_user_profiles
+from .models import PerfilImportado, Usuario
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: sin bloqueo entre procesos del checkpoint
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Contadores del resumen de cada usuario que se acumulan en el total
+CONTADORES = ('habilidades_added', 'conocimientos_added', 'estudios_added', 'experiencia_added')
+
+# Checkpoint compartido de las ingestas de todos los usuarios
+CHECKPOINT_TODOS = 'perfiles'
+
+
+class CheckpointEnUso(RuntimeError):
+    """Otra ingesta está usando el mismo checkpoint."""
+
+
+class HostLimiter:
+    """
+    Limita las descargas simultáneas contra un mismo host, para no saturar
+    CVLAC ni LinkedIn aunque haya muchos hilos de descarga.
+    """
+
+    def __init__(self, por_host):
+        self.por_host = por_host
+        self._semaforos = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def limitar(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            semaforo = self._semaforos.get(host)
+            if semaforo is None:
+                semaforo = self._semaforos[host] = threading.BoundedSemaphore(self.por_host)
+        with semaforo:
+            yield
+
+
+class Checkpoint:
+    """
+    Registro JSON Lines de los usuarios ya ingeridos. Se escribe una línea
+    por usuario justo después de guardar sus datos, así que una ingesta
+    interrumpida puede reanudarse sin repetir los usuarios terminados. Los
+    usuarios con errores no se registran y se reintentan al reanudar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def completados(self):
+        """IDs de los usuarios registrados en ejecuciones anteriores."""
+        ids = set()
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for linea in f:
+                    try:
+                        ids.add(json.loads(linea)['user_id'])
+                    except (ValueError, KeyError):
+                        # Última línea truncada si el proceso se interrumpió al escribirla
+                        continue
+        except FileNotFoundError:
+            pass
+        return ids
+
+    def registrar(self, user_id, summary):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'user_id': user_id, 'summary': summary}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    @contextmanager
+    def en_uso(self):
+        """
+        Bloqueo exclusivo del checkpoint mientras dura una ingesta, para que
+        dos ejecuciones no escriban ni eliminen el mismo archivo. El sistema
+        operativo lo libera si el proceso termina de forma inesperada.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f'{self.path}.lock', 'a') as bloqueo:
+            if fcntl:
+                try:
+                    fcntl.flock(bloqueo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise CheckpointEnUso(f"Ya hay una ingesta en curso con el checkpoint {self.path}")
+            yield
+
+    def eliminar(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def checkpoint_path(nombre=CHECKPOINT_TODOS):
+    """Ruta del checkpoint `nombre` en settings.INGEST_CHECKPOINT_DIR."""
+    return os.path.join(settings.INGEST_CHECKPOINT_DIR, f'{nombre}.jsonl')
+
+
+def checkpoint_name(user_ids=None):
+    """
+    Nombre del checkpoint de una ingesta. Solo las de todos los usuarios
+    comparten CHECKPOINT_TODOS; las de un subconjunto usan uno propio de ese
+    conjunto, para no omitir ni eliminar el progreso de otra ingesta.
+    """
+    if user_ids is None:
+        return CHECKPOINT_TODOS
+    huella = hashlib.sha1(','.join(str(user_id) for user_id in sorted(set(user_ids))).encode('utf-8')).hexdigest()
+    return f'{CHECKPOINT_TODOS}-{huella[:16]}'
+
+
+def _descargar(url_cvlac, url_linkedin, limites, ttl, paginas_importadas):
+    summary = new_summary()
+    perfiles = fetch_user_profiles(url_cvlac, url_linkedin, summary, limitar_host=limites.limitar, ttl=ttl,
+                                   paginas_importadas=paginas_importadas)
+    return perfiles, summary
+
+
+def _completado(summary):
+    """Si el usuario se guardó completo y se pudieron extraer todos sus perfiles."""
+    return not (summary.get('error') or summary.get('no_extraidos') or summary.get('parciales'))
+
+
+def _guardar(user_id, futuro):
+    """Guarda en la base de datos los perfiles descargados de un usuario."""
+    try:
+        perfiles, summary = futuro.result()
+        store_user_profiles(Usuario.objects.get(id=user_id), perfiles, summary)
+        return summary
+    except Usuario.DoesNotExist:
+        error_msg = f"Usuario con ID {user_id} no encontrado"
+    except Exception as e:
+        error_msg = f"Error al procesar datos del usuario: {str(e)}"
+    logger.error(error_msg)
+    return {'error': error_msg}
+
+
+def _ingestar(user_ids, workers, por_host, checkpoint, progreso, ttl):
+    """Ingesta de ingest_profiles, con el checkpoint ya bloqueado."""
+    workers = workers or settings.INGEST_WORKERS
+    limites = HostLimiter(por_host or settings.INGEST_PER_HOST_LIMIT)
+
+    # Se cargan por adelantado para no iterar un cursor mientras se escribe
+    consulta = Usuario.objects.order_by('id').values_list('id', 'url_cvlac', 'url_linkedin')
+    if user_ids is not None:
+        consulta = consulta.filter(id__in=user_ids)
+    usuarios = list(consulta)
+
+    # Páginas de la última importación completa, para que los hilos de
+    # descarga omitan las que no cambiaron sin consultar la base de datos
+    paginas = PerfilImportado.objects.exclude(huella_pagina='')
+    if user_ids is not None:
+        paginas = paginas.filter(user_id__in=user_ids)
+    importadas = {}
+    for user_id, fuente, huella_pagina in paginas.values_list('user_id', 'fuente', 'huella_pagina'):
+        importadas.setdefault(user_id, {})[fuente] = huella_pagina
+
+    completados = checkpoint.completados() if checkpoint else set()
+    pendientes = [usuario for usuario in usuarios if usuario[0] not in completados]
+    resumen = {contador: 0 for contador in CONTADORES}
+    resumen.update({
+        'usuarios': len(usuarios),
+        'omitidos': len(usuarios) - len(pendientes),
+        'procesados': 0,
+        'errores': 0,
+        'sin_cambios': 0,
+    })
+    logger.info(f"Ingesta de perfiles: {len(pendientes)} usuarios pendientes, "
+                f"{resumen['omitidos']} ya procesados, {workers} hilos")
+
+    siguientes = iter(pendientes)
+    en_curso = {}
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingesta')
+
+    def lanzar():
+        # Ventana acotada de descargas para no acumular perfiles en memoria
+        while len(en_curso) < workers * 2:
+            siguiente = next(siguientes, None)
+            if siguiente is None:
+                return
+            user_id, url_cvlac, url_linkedin = siguiente
+            en_curso[pool.submit(_descargar, url_cvlac, url_linkedin, limites, ttl, importadas.get(user_id))] = user_id
+
+    try:
+        lanzar()
+        while en_curso:
+            listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                user_id = en_curso.pop(futuro)
+                summary = _guardar(user_id, futuro)
+                if checkpoint and _completado(summary):
+                    checkpoint.registrar(user_id, summary)
+
+                resumen['procesados'] += 1
+                if summary.get('error'):
+                    resumen['errores'] += 1
+                resumen['sin_cambios'] += len(summary.get('sin_cambios', []))
+                for contador in CONTADORES:
+                    resumen[contador] += summary.get(contador, 0)
+                if progreso:
+                    progreso(user_id, summary, resumen['procesados'], len(pendientes))
+            lanzar()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if checkpoint:
+        checkpoint.eliminar()
+    logger.info(f"Ingesta de perfiles completada: {resumen}")
+    return resumen
+
+
+def ingest_profiles(user_ids=None, workers=None, por_host=None, checkpoint=None, progreso=None, ttl=None):
+    """
+    Extrae y guarda los perfiles de CVLAC y LinkedIn de varios usuarios.
+
+    Las descargas se hacen en un pool de hilos, con un máximo de `por_host`
+    simultáneas por host. Las escrituras las hace solo el hilo que llama,
+    una transacción por usuario, para no competir por la base de datos.
+
+    Args:
+        user_ids: IDs de los usuarios a procesar (por defecto, todos)
+        workers: Hilos de descarga (settings.INGEST_WORKERS)
+        por_host: Descargas simultáneas por host (settings.INGEST_PER_HOST_LIMIT)
+        checkpoint: Checkpoint opcional; se omiten los usuarios ya
+            registrados en él (solo los completados sin errores) y se
+            elimina al terminar
+        progreso: Función opcional llamada con (user_id, summary, hechos, total)
+            después de guardar cada usuario
+        ttl: Antigüedad máxima de las páginas tomadas de la caché HTTP
+            (settings.HTTP_CACHE_TTL); 0 para descargarlas de nuevo
+
+    Returns:
+        dict: Totales de la ingesta
+
+    Raises:
+        CheckpointEnUso: Si otra ingesta está usando el mismo checkpoint
+    """
+    with (checkpoint.en_uso() if checkpoint else nullcontext()):
+        return _ingestar(user_ids, workers, por_host, checkpoint, progreso, ttl)
@@ -0,0 +1,26 @@
+from django.db.models import QuerySet, prefetch_related_objects
+
+# Relaciones del perfil que usan los sistemas de recomendación
+CANDIDATE_RELATIONS = ('habilidades', 'conocimientos', 'experiencias', 'estudios')
+
+
+def load_candidates(usuarios):
+    """
+    Carga los usuarios candidatos con sus habilidades, conocimientos,
+    experiencias y estudios precargados en bloque.
+
+    Se ejecuta una consulta por tabla relacionada (más la de usuarios),
+    de modo que el número de consultas no crece con la cantidad de usuarios.
+
+    Args:
+        usuarios: QuerySet o iterable de instancias de Usuario
+
+    Returns:
+        list: Usuarios con sus relaciones en la caché de prefetch
+    """
+    if isinstance(usuarios, QuerySet):
+        return list(usuarios.prefetch_related(*CANDIDATE_RELATIONS))
+
+    usuarios = list(usuarios)
+    prefetch_related_objects(usuarios, *CANDIDATE_RELATIONS)
+    return usuarios
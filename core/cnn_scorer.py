@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .lazy_imports import lazy_import
+from .model_registry import latest_key, load_keras_model, model_key, save_keras_model
+
+keras = lazy_import('tensorflow.keras')
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar la arquitectura o el entrenamiento de la red
+CNN_VERSION = 1
+
+# Parámetros de entrenamiento (los mismos de la versión que entrenaba por petición)
+CNN_EPOCHS = 30
+CNN_TRAIN_BATCH_SIZE = 8
+
+# Tamaño de lote para las predicciones
+PREDICT_BATCH_SIZE = 4096
+
+# Redes entrenadas que se mantienen en memoria (las de uso más reciente)
+MAX_SCORERS_EN_MEMORIA = 8
+
+
+def feature_schema_hash(columnas):
+    """Identifica el esquema de características y la versión de la red."""
+    contenido = f"{CNN_VERSION}|" + '\x1f'.join(columnas)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()[:16]
+
+
+def _tipo(columnas):
+    return f"cnn-{feature_schema_hash(columnas)}"
+
+
+def cnn_model_key(columnas, proyecto_id, roles_proyecto, usuarios):
+    """
+    Clave de la red de un proyecto: el esquema de características más la
+    huella de los roles y de los perfiles (model_registry.model_key), así
+    que la red se vuelve a entrenar cuando cambia cualquiera de ellos.
+    """
+    return model_key(_tipo(columnas), proyecto_id, roles_proyecto, usuarios)
+
+
+def training_set_key(columnas, X):
+    """Clave de la red a partir del conjunto de entrenamiento, sin proyecto."""
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    huella = hashlib.sha1(X.tobytes() + str(X.shape).encode('utf-8')).hexdigest()[:16]
+    return f"{_tipo(columnas)}_datos_{huella}"
+
+
+class CNNScorer:
+    """
+    Red convolucional 1D que puntúa perfiles a partir del vector de
+    características avanzadas.
+
+    Se entrena una vez por clave (esquema de características y datos de
+    entrenamiento, ver cnn_model_key), se guarda en el registro de modelos y
+    se reutiliza (en memoria y en disco) mientras los datos no cambien. La
+    normalización de las entradas forma parte del modelo, de modo que el
+    archivo guardado es autosuficiente.
+    """
+
+    def __init__(self, columnas, key):
+        self.columnas = list(columnas)
+        self.key = key
+        self.model = None
+        self._lock = threading.Lock()
+
+    def _to_input(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        return X.reshape((X.shape[0], X.shape[1], 1))
+
+    def _build(self, X_cnn):
+        layers = keras.layers
+        normalizacion = layers.Normalization(axis=1)
+        normalizacion.adapt(X_cnn)
+        model = keras.models.Sequential([
+            keras.Input(shape=(len(self.columnas), 1)),
+            normalizacion,
+            layers.Conv1D(32, 3, activation='relu'),
+            layers.BatchNormalization(),
+            layers.MaxPooling1D(2),
+            layers.Dropout(0.2),
+            layers.Conv1D(64, 3, activation='relu'),
+            layers.BatchNormalization(),
+            layers.MaxPooling1D(2),
+            layers.Dropout(0.2),
+            layers.Flatten(),
+            layers.Dense(64, activation='relu'),
+            layers.Dropout(0.2),
+            layers.Dense(1, activation='sigmoid')
+        ])
+        model.compile(optimizer=keras.optimizers.Adam(learning_rate=0.001), loss='binary_crossentropy', metrics=['accuracy'])
+        return model
+
+    def load(self):
+        """
+        Carga el modelo desde el registro si aún no está en memoria.
+
+        Returns:
+            bool: True si el modelo está disponible
+        """
+        if self.model is None:
+            with self._lock:
+                if self.model is None:
+                    self.model = load_keras_model(self.key)
+        return self.model is not None
+
+    def train(self, X, labels):
+        """
+        Entrena la red y la guarda en el registro. Si otro hilo ya la
+        entrenó, se reutiliza esa.
+        """
+        with self._lock:
+            if self.model is not None:
+                return
+            X_cnn = self._to_input(X)
+            model = self._build(X_cnn)
+            model.fit(X_cnn, np.asarray(labels), epochs=CNN_EPOCHS, batch_size=CNN_TRAIN_BATCH_SIZE, verbose=0)
+            save_keras_model(self.key, model)
+            self.model = model
+            logger.info(f"CNN {self.key} entrenada con {len(X_cnn)} perfiles")
+
+    def predict(self, X):
+        """
+        Puntúa los perfiles en lotes grandes.
+
+        Returns:
+            np.ndarray: Probabilidad de buen candidato por perfil
+        """
+        if len(X) == 0:
+            return np.zeros(0)
+        return self.model.predict(self._to_input(X), batch_size=PREDICT_BATCH_SIZE, verbose=0).ravel()
+
+    def warm_up(self):
+        """
+        Carga el modelo guardado y ejecuta una predicción de prueba para que
+        la primera recomendación no pague la construcción del grafo.
+
+        Returns:
+            bool: True si había un modelo que precalentar
+        """
+        if not self.load():
+            return False
+        self.predict(np.zeros((1, len(self.columnas))))
+        logger.info(f"CNN {self.key} precalentada")
+        return True
+
+
+_scorers = OrderedDict()
+_scorers_lock = threading.Lock()
+
+
+def get_cnn_scorer(columnas, key):
+    """Devuelve el CNNScorer del proceso para una clave de cnn_model_key."""
+    with _scorers_lock:
+        if key in _scorers:
+            _scorers.move_to_end(key)
+        else:
+            _scorers[key] = CNNScorer(columnas, key)
+            while len(_scorers) > MAX_SCORERS_EN_MEMORIA:
+                _scorers.popitem(last=False)
+        return _scorers[key]
+
+
+def latest_cnn_scorer(columnas):
+    """
+    CNNScorer de la red guardada más recientemente para el esquema, o None
+    si no hay ninguna (para precalentar sin conocer el proyecto).
+    """
+    key = latest_key(_tipo(columnas), 'keras')
+    return get_cnn_scorer(columnas, key) if key else None
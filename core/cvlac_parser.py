@@ -0,0 +1,163 @@
+import re
+
+from bs4 import BeautifulSoup
+
+# Lista del resultado -> (título de la sección en CVLAC, campo de la fuente)
+SECCIONES_PRODUCCION = {
+    'articulos': ('Artículos', 'revista'),
+    'libros': ('Libros', 'editorial'),
+    'capitulos': ('Capítulos de libro', 'libro'),
+}
+
+# Campos sin los cuales la página no se considera un perfil completo
+CAMPOS_REQUERIDOS = ('nombre',)
+
+_COMILLAS = re.compile(r'"([^"]+)"')
+
+
+def _limpiar(texto):
+    """Colapsa espacios (incluidos los no separables) de un texto."""
+    return ' '.join(texto.split())
+
+
+def _seccion(soup, titulo):
+    """Tabla de la sección cuyo encabezado <h3> empieza por `titulo`."""
+    encabezado = soup.find('h3', string=lambda texto: texto and _limpiar(texto).startswith(titulo))
+    return encabezado.find_parent('table') if encabezado else None
+
+
+def _lineas(elemento):
+    return [linea for linea in (_limpiar(texto) for texto in elemento.stripped_strings) if linea]
+
+
+def _datos_generales(soup):
+    """Pares etiqueta → valor de la tabla de datos generales."""
+    ancla = soup.find('a', attrs={'name': 'datos_generales'})
+    tabla = ancla.find_next('table') if ancla else None
+    datos = {}
+    if tabla:
+        for fila in tabla.find_all('tr'):
+            celdas = fila.find_all('td')
+            if len(celdas) == 2:
+                datos[_limpiar(celdas[0].get_text())] = _limpiar(celdas[1].get_text())
+    return datos
+
+
+def _filas_con_vineta(tabla):
+    """Celdas de contenido de las filas con viñeta (<li>) de una sección."""
+    for fila in tabla.find_all('tr'):
+        celdas = fila.find_all('td', recursive=False)
+        if len(celdas) == 2 and celdas[0].find('li'):
+            yield celdas[1]
+
+
+def _texto_de(soup, selector):
+    """Texto del elemento que coincide con el selector; cadena vacía si no existe."""
+    elemento = soup.select_one(selector)
+    return _limpiar(elemento.get_text()) if elemento else ''
+
+
+def _estudios(soup):
+    tabla = _seccion(soup, 'Formación Académica')
+    if not tabla:
+        return []
+    estudios = []
+    for celda in _filas_con_vineta(tabla):
+        # Nivel en negrita, luego institución, programa y fechas separados por <br>
+        lineas = _lineas(celda)
+        if len(lineas) < 2:
+            continue
+        estudios.append({
+            'titulo': lineas[2] if len(lineas) > 3 else lineas[0],
+            'institucion': lineas[1],
+            'fecha': lineas[-1],
+        })
+    return estudios
+
+
+def _institucion(soup):
+    """Institución de la experiencia profesional más reciente."""
+    tabla = _seccion(soup, 'Experiencia profesional')
+    if not tabla:
+        return ''
+    for celda in _filas_con_vineta(tabla):
+        nombre = celda.find('b')
+        if nombre:
+            return _limpiar(nombre.get_text())
+    return ''
+
+
+def _proyectos(soup):
+    tabla = _seccion(soup, 'Proyectos')
+    if not tabla:
+        return []
+    proyectos = []
+    for bloque in tabla.find_all('blockquote'):
+        # Tipo de proyecto: <tipo> <br> <título> <br> Inicio: ...
+        lineas = _lineas(bloque)
+        if len(lineas) < 3:
+            continue
+        resumen = bloque.find('p')
+        proyectos.append({
+            'titulo': lineas[2],
+            'descripcion': _limpiar(resumen.get_text()) if resumen else '',
+        })
+    return proyectos
+
+
+def _produccion(soup, titulo, campo_fuente):
+    """
+    Productos bibliográficos de una sección: autores, título entre comillas
+    y el resto de la referencia (revista, editorial o libro) en `campo_fuente`.
+    """
+    tabla = _seccion(soup, titulo)
+    if not tabla:
+        return []
+    productos = []
+    for bloque in tabla.find_all('blockquote'):
+        texto = _limpiar(bloque.get_text(' '))
+        titulo_producto = _COMILLAS.search(texto)
+        if not titulo_producto:
+            continue
+        productos.append({
+            'titulo': titulo_producto.group(1).strip(),
+            'autores': texto[:titulo_producto.start()].strip(' ,'),
+            campo_fuente: texto[titulo_producto.end():].strip(' ,.'),
+        })
+    return productos
+
+
+def parse_cvlac_html(html):
+    """
+    Extrae los datos de un perfil CVLAC a partir del HTML de la página, sin
+    navegador.
+
+    Args:
+        html: Contenido de la página ya decodificado
+
+    Returns:
+        dict: Mismas claves que scraping_utils.extract_cvlac_data
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    generales = _datos_generales(soup)
+
+    data = {
+        'nombre': generales.get('Nombre', ''),
+        'institucion': _institucion(soup),
+        'grupo_investigacion': _texto_de(soup, '#grupo_investigacion'),
+        'categoria': generales.get('Categoría', ''),
+        'publicaciones': [],
+        'articulos': [],
+        'libros': [],
+        'capitulos': [],
+        'proyectos': _proyectos(soup),
+        'estudios': _estudios(soup),
+    }
+    for clave, (titulo, campo_fuente) in SECCIONES_PRODUCCION.items():
+        data[clave] = _produccion(soup, titulo, campo_fuente)
+    return data
+
+
+def is_complete(data):
+    """Indica si el resultado del parser tiene los campos requeridos."""
+    return bool(data) and all(data.get(campo) for campo in CAMPOS_REQUERIDOS)
@@ -1,12 +1,17 @@
+import hashlib
 import logging
 import os
 import json
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
+from functools import partial
+from .feature_store import schedule_feature_refresh
 from .models import (
-    Usuario, UsuarioHabilidades, UsuarioConocimiento, 
+    PerfilImportado, Termino, Usuario, UsuarioHabilidades, UsuarioConocimiento, 
     UsuarioEstudios, UsuarioExperiencia
 )
-from .scraping_utils import extract_cvlac_info, extract_linkedin_info
+from .platform_stats import schedule_stats_refresh
+from .lazy_imports import lazy_import
 from django.db import transaction
 from django.conf import settings
 
@@ -14,6 +19,90 @@ from django.conf import settings
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Selenium solo se carga al procesar los perfiles de un usuario
+scraping_utils = lazy_import('core.scraping_utils')
+
+# Mensajes cuando una fuente no devuelve datos
+ERRORES_EXTRACCION = {
+    'CVLAC': "No se pudo extraer información de CVLAC. Verifique que la URL sea correcta y que el perfil sea público.",
+    'LinkedIn': "No se pudo extraer información de LinkedIn. LinkedIn requiere inicio de sesión para ver perfiles completos.",
+}
+
+def new_summary():
+    """Contadores del procesamiento de un usuario"""
+    return {
+        'habilidades_added': 0,
+        'conocimientos_added': 0,
+        'estudios_added': 0,
+        'experiencia_added': 0,
+        'sin_cambios': [],
+        'no_extraidos': [],
+        'parciales': [],
+        'errors': []
+    }
+
+def fetch_user_profiles(url_cvlac, url_linkedin, summary, limitar_host=None, ttl=None, paginas_importadas=None):
+    """
+    Descarga y extrae los perfiles de CVLAC y LinkedIn de un usuario. Solo
+    accede a la red (no a la base de datos), así que puede ejecutarse en
+    paralelo para varios usuarios.
+    
+    Args:
+        url_cvlac: URL del perfil de CVLAC
+        url_linkedin: URL del perfil de LinkedIn
+        summary: Resumen donde se registran los errores (y en
+            summary['no_extraidos'] las fuentes que no se pudieron extraer)
+        limitar_host: Función opcional que recibe una URL y retorna un
+            context manager que limita las descargas simultáneas a su host
+        ttl: Antigüedad máxima de las páginas tomadas de la caché HTTP
+            (settings.HTTP_CACHE_TTL); 0 para descargarlas de nuevo
+        paginas_importadas: Huellas de las páginas de la última importación
+            completa por fuente (PerfilImportado.huella_pagina); las páginas
+            iguales no se interpretan y se registran en summary['sin_cambios']
+    
+    Returns:
+        list: Tuplas (fuente, datos extraídos) de las fuentes con datos
+    """
+    extractores = (
+        ('CVLAC', url_cvlac, partial(scraping_utils.extract_cvlac_info, ttl=ttl,
+                                     pagina_importada=(paginas_importadas or {}).get('CVLAC'))),
+        ('LinkedIn', url_linkedin, scraping_utils.extract_linkedin_info),
+    )
+    perfiles = []
+    for fuente, url, extraer in extractores:
+        if not (url and url.strip()):
+            logger.info(f"No se proporcionó URL de {fuente}")
+            continue
+        
+        logger.info(f"Procesando URL de {fuente}: {url}")
+        
+        # Verificar si la URL es válida
+        if not (url.startswith('http://') or url.startswith('https://')):
+            logger.warning(f"URL de {fuente} inválida: {url}")
+            summary['errors'].append(f"URL de {fuente} inválida: {url}")
+            continue
+        
+        with (limitar_host(url) if limitar_host else nullcontext()):
+            data = extraer(url)
+        if data and data.get('sin_cambios'):
+            summary['sin_cambios'].append(fuente)
+        elif data:
+            perfiles.append((fuente, data))
+        else:
+            logger.warning(ERRORES_EXTRACCION[fuente])
+            summary['no_extraidos'].append(fuente)
+            summary['errors'].append(ERRORES_EXTRACCION[fuente])
+    return perfiles
+
+def store_user_profiles(usuario, perfiles, summary, solo_cambios=True):
+    """
+    Guarda en la base de datos los perfiles extraídos por fetch_user_profiles.
+    Con solo_cambios se omiten los que no cambiaron desde la última importación
+    """
+    for fuente, data in perfiles:
+        logger.info(f"Datos de {fuente} extraídos correctamente. Guardando en la base de datos...")
+        save_user_data(usuario, data, fuente, summary, solo_cambios)
+
 def process_user_data(user_id):
     """
     Procesa los datos de un usuario, extrayendo información de CVLAC y LinkedIn
@@ -37,55 +126,13 @@ def process_user_data(user_id):
         logger.info(f"Procesando datos para el usuario: {usuario.nombres} {usuario.apellidos} (ID: {user_id})")
         
         # Inicializar contadores
-        summary = {
-            'habilidades_added': 0,
-            'conocimientos_added': 0,
-            'estudios_added': 0,
-            'experiencia_added': 0,
-            'errors': []
-        }
-        
-        # Extraer datos de CVLAC
-        if usuario.url_cvlac and usuario.url_cvlac.strip():
-            logger.info(f"Procesando URL de CVLAC: {usuario.url_cvlac}")
-            
-            # Verificar si la URL es válida
-            if not (usuario.url_cvlac.startswith('http://') or usuario.url_cvlac.startswith('https://')):
-                logger.warning(f"URL de CVLAC inválida: {usuario.url_cvlac}")
-                summary['errors'].append(f"URL de CVLAC inválida: {usuario.url_cvlac}")
-            else:
-                cvlac_data = extract_cvlac_info(usuario.url_cvlac)
-                if cvlac_data:
-                    # Guardar datos de CVLAC
-                    logger.info("Datos de CVLAC extraídos correctamente. Guardando en la base de datos...")
-                    save_user_data(usuario, cvlac_data, 'CVLAC', summary)
-                else:
-                    error_msg = "No se pudo extraer información de CVLAC. Verifique que la URL sea correcta y que el perfil sea público."
-                    logger.warning(error_msg)
-                    summary['errors'].append(error_msg)
-        else:
-            logger.info("No se proporcionó URL de CVLAC")
-        
-        # Extraer datos de LinkedIn
-        if usuario.url_linkedin and usuario.url_linkedin.strip():
-            logger.info(f"Procesando URL de LinkedIn: {usuario.url_linkedin}")
-            
-            # Verificar si la URL es válida
-            if not (usuario.url_linkedin.startswith('http://') or usuario.url_linkedin.startswith('https://')):
-                logger.warning(f"URL de LinkedIn inválida: {usuario.url_linkedin}")
-                summary['errors'].append(f"URL de LinkedIn inválida: {usuario.url_linkedin}")
-            else:
-                linkedin_data = extract_linkedin_info(usuario.url_linkedin)
-                if linkedin_data:
-                    # Guardar datos de LinkedIn
-                    logger.info("Datos de LinkedIn extraídos correctamente. Guardando en la base de datos...")
-                    save_user_data(usuario, linkedin_data, 'LinkedIn', summary)
-                else:
-                    error_msg = "No se pudo extraer información de LinkedIn. LinkedIn requiere inicio de sesión para ver perfiles completos."
-                    logger.warning(error_msg)
-                    summary['errors'].append(error_msg)
-        else:
-            logger.info("No se proporcionó URL de LinkedIn")
+        summary = new_summary()
+        
+        # Extraer y guardar datos de CVLAC y LinkedIn
+        # Al procesarlo a mano se descargan las páginas de nuevo (sin la copia
+        # en caché) y se guardan los datos aunque no hayan cambiado
+        perfiles = fetch_user_profiles(usuario.url_cvlac, usuario.url_linkedin, summary, ttl=0)
+        store_user_profiles(usuario, perfiles, summary, solo_cambios=False)
         
         # Guardar resumen para depuración
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -104,127 +151,225 @@ def process_user_data(user_id):
         logger.error(error_msg)
         return {'error': error_msg}
 
+# Secciones del perfil que se guardan en la base de datos y sus campos
+SECCIONES_GUARDADAS = {
+    'habilidades': ('habilidad', 'experiencia'),
+    'conocimientos': ('conocimiento', 'nivel'),
+    'estudios': ('estudio', 'nivel', 'year'),
+    'experiencia': ('rol', 'tiempo', 'actividades'),
+}
+
+def _normalizar_valor(valor):
+    return ' '.join(valor.split()) if isinstance(valor, str) else valor
+
+def profile_hash(data):
+    """
+    Huella (sha256) de las secciones de un perfil que se guardan en la base
+    de datos. No depende del orden de los elementos ni de los espacios, así
+    que dos extracciones del mismo perfil producen la misma huella.
+    """
+    normalizado = {
+        seccion: sorted(
+            json.dumps([_normalizar_valor(item.get(campo)) for campo in campos], ensure_ascii=False, default=str)
+            for item in data.get(seccion) or []
+        )
+        for seccion, campos in SECCIONES_GUARDADAS.items()
+    }
+    return hashlib.sha256(json.dumps(normalizado, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _validas(filas, tipo, campo, summary):
+    """
+    Filas que pasan la validación de sus campos; los errores se registran
+    en el resumen, como al guardarlas una a una.
+    """
+    validas = []
+    for fila in filas:
+        try:
+            fila.clean_fields(exclude=['user_id', 'termino'])
+            validas.append(fila)
+        except Exception as e:
+            error_msg = f"Error al guardar {tipo} {getattr(fila, campo) or 'desconocido'}: {str(e)}"
+            logger.error(error_msg)
+            summary['errors'].append(error_msg)
+    return validas
+
+@contextmanager
+def _seccion(nombre, source, summary):
+    """
+    Savepoint de una sección del perfil: si falla se deshacen solo sus filas
+    y el error se registra en el resumen, sin perder las demás secciones.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except Exception as e:
+        error_msg = f"Error al guardar {nombre} de {source}: {str(e)}"
+        logger.error(error_msg)
+        summary['errors'].append(error_msg)
+
+def _contenido_en(texto, existentes):
+    """Equivalente en memoria del filtro icontains usado para deduplicar."""
+    texto = texto.casefold()
+    return any(texto in existente.casefold() for existente in existentes)
+
 @transaction.atomic
-def save_user_data(usuario, data, source, summary):
+def save_user_data(usuario, data, source, summary, solo_cambios=False):
     """
     Guarda los datos extraídos en la base de datos
     
+    Los elementos que el usuario ya tiene se leen con una consulta por tabla
+    y solo se insertan los nuevos. Cada sección se guarda en su propio
+    savepoint, así que un error en una no deshace las demás. Con solo_cambios,
+    si el perfil tiene la misma huella que la última importación completa de
+    esa fuente no se consulta nada más.
+    
     Args:
         usuario: Instancia del modelo Usuario
         data: Diccionario con los datos extraídos
         source: Fuente de los datos (CVLAC o LinkedIn)
-        summary: Diccionario para actualizar con el resumen
+        summary: Diccionario para actualizar con el resumen; las fuentes con
+            elementos o secciones que no se guardaron se agregan a
+            summary['parciales']
+        solo_cambios: Omitir el perfil si no cambió desde la última importación
     """
     try:
-        # Guardar habilidades
+        huella = profile_hash(data)
+        huella_pagina = data.get('huella_pagina', '')
+        importado = PerfilImportado.objects.filter(user_id=usuario, fuente=source).first() if solo_cambios else None
+        if importado and importado.huella == huella:
+            logger.info(f"Perfil de {source} sin cambios desde la última importación")
+            # Otra página con los mismos datos: la próxima vez no se interpreta
+            if huella_pagina and importado.huella_pagina != huella_pagina:
+                PerfilImportado.objects.filter(id=importado.id).update(huella_pagina=huella_pagina)
+            summary.setdefault('sin_cambios', []).append(source)
+            return
+        
+        agregados = False
+        errores_previos = len(summary['errors'])
+        
+        # Guardar habilidades (mismo término del catálogo = ya existe)
         if 'habilidades' in data and data['habilidades']:
-            logger.info(f"Procesando {len(data['habilidades'])} habilidades de {source}")
-            for item in data['habilidades']:
-                try:
-                    # Verificar si ya existe una habilidad similar
-                    existing = UsuarioHabilidades.objects.filter(
+            with _seccion('habilidades', source, summary):
+                logger.info(f"Procesando {len(data['habilidades'])} habilidades de {source}")
+                filas = _validas([
+                    UsuarioHabilidades(
                         user_id=usuario,
-                        habilidad__icontains=item['habilidad']
-                    ).first()
-                    
-                    if not existing:
-                        UsuarioHabilidades.objects.create(
-                            user_id=usuario,
-                            habilidad=item['habilidad'],
-                            experiencia=f"{item['experiencia']} (Fuente: {source})"
-                        )
-                        summary['habilidades_added'] += 1
-                        logger.info(f"Habilidad agregada: {item['habilidad']}")
-                    else:
-                        logger.info(f"Habilidad ya existe: {item['habilidad']}")
-                except Exception as e:
-                    error_msg = f"Error al guardar habilidad {item.get('habilidad', 'desconocida')}: {str(e)}"
-                    logger.error(error_msg)
-                    summary['errors'].append(error_msg)
-        
-        # Guardar conocimientos
+                        habilidad=item.get('habilidad'),
+                        experiencia=f"{item.get('experiencia')} (Fuente: {source})"
+                    )
+                    for item in data['habilidades']
+                ], 'habilidad', 'habilidad', summary)
+                Termino.asignar(filas, 'habilidad')
+                existentes = set(UsuarioHabilidades.objects.filter(user_id=usuario).values_list('termino_id', flat=True))
+                nuevas = []
+                for fila in filas:
+                    if fila.termino_id in existentes:
+                        logger.info(f"Habilidad ya existe: {fila.habilidad}")
+                        continue
+                    existentes.add(fila.termino_id)
+                    nuevas.append(fila)
+                    logger.info(f"Habilidad agregada: {fila.habilidad}")
+                UsuarioHabilidades.objects.bulk_create(nuevas)
+                summary['habilidades_added'] += len(nuevas)
+                agregados = agregados or bool(nuevas)
+        
+        # Guardar conocimientos (mismo término del catálogo = ya existe)
         if 'conocimientos' in data and data['conocimientos']:
-            logger.info(f"Procesando {len(data['conocimientos'])} conocimientos de {source}")
-            for item in data['conocimientos']:
-                try:
-                    # Verificar si ya existe un conocimiento similar
-                    existing = UsuarioConocimiento.objects.filter(
+            with _seccion('conocimientos', source, summary):
+                logger.info(f"Procesando {len(data['conocimientos'])} conocimientos de {source}")
+                filas = _validas([
+                    UsuarioConocimiento(
                         user_id=usuario,
-                        conocimiento__icontains=item['conocimiento']
-                    ).first()
-                    
-                    if not existing:
-                        UsuarioConocimiento.objects.create(
-                            user_id=usuario,
-                            conocimiento=item['conocimiento'],
-                            nivel=item['nivel']
-                        )
-                        summary['conocimientos_added'] += 1
-                        logger.info(f"Conocimiento agregado: {item['conocimiento']}")
-                    else:
-                        logger.info(f"Conocimiento ya existe: {item['conocimiento']}")
-                except Exception as e:
-                    error_msg = f"Error al guardar conocimiento {item.get('conocimiento', 'desconocido')}: {str(e)}"
-                    logger.error(error_msg)
-                    summary['errors'].append(error_msg)
-        
-        # Guardar estudios
+                        conocimiento=item.get('conocimiento'),
+                        nivel=item.get('nivel')
+                    )
+                    for item in data['conocimientos']
+                ], 'conocimiento', 'conocimiento', summary)
+                Termino.asignar(filas, 'conocimiento')
+                existentes = set(UsuarioConocimiento.objects.filter(user_id=usuario).values_list('termino_id', flat=True))
+                nuevas = []
+                for fila in filas:
+                    if fila.termino_id in existentes:
+                        logger.info(f"Conocimiento ya existe: {fila.conocimiento}")
+                        continue
+                    existentes.add(fila.termino_id)
+                    nuevas.append(fila)
+                    logger.info(f"Conocimiento agregado: {fila.conocimiento}")
+                UsuarioConocimiento.objects.bulk_create(nuevas)
+                summary['conocimientos_added'] += len(nuevas)
+                agregados = agregados or bool(nuevas)
+        
+        # Guardar estudios (ya existe si hay uno del mismo nivel que contiene el nombre)
         if 'estudios' in data and data['estudios']:
-            logger.info(f"Procesando {len(data['estudios'])} estudios de {source}")
-            for item in data['estudios']:
-                try:
-                    # Verificar si ya existe un estudio similar
-                    existing = UsuarioEstudios.objects.filter(
+            with _seccion('estudios', source, summary):
+                logger.info(f"Procesando {len(data['estudios'])} estudios de {source}")
+                filas = _validas([
+                    UsuarioEstudios(
                         user_id=usuario,
-                        estudio__icontains=item['estudio'],
-                        nivel=item['nivel']
-                    ).first()
-                    
-                    if not existing:
-                        UsuarioEstudios.objects.create(
-                            user_id=usuario,
-                            estudio=item['estudio'],
-                            nivel=item['nivel'],
-                            year=item['year']
-                        )
-                        summary['estudios_added'] += 1
-                        logger.info(f"Estudio agregado: {item['estudio']}")
-                    else:
-                        logger.info(f"Estudio ya existe: {item['estudio']}")
-                except Exception as e:
-                    error_msg = f"Error al guardar estudio {item.get('estudio', 'desconocido')}: {str(e)}"
-                    logger.error(error_msg)
-                    summary['errors'].append(error_msg)
-        
-        # Guardar experiencia
+                        estudio=item.get('estudio'),
+                        nivel=item.get('nivel'),
+                        year=item.get('year')
+                    )
+                    for item in data['estudios']
+                ], 'estudio', 'estudio', summary)
+                existentes = {}
+                for estudio, nivel in UsuarioEstudios.objects.filter(user_id=usuario).values_list('estudio', 'nivel'):
+                    existentes.setdefault(nivel, []).append(estudio)
+                nuevas = []
+                for fila in filas:
+                    if _contenido_en(fila.estudio, existentes.get(fila.nivel, [])):
+                        logger.info(f"Estudio ya existe: {fila.estudio}")
+                        continue
+                    existentes.setdefault(fila.nivel, []).append(fila.estudio)
+                    nuevas.append(fila)
+                    logger.info(f"Estudio agregado: {fila.estudio}")
+                UsuarioEstudios.objects.bulk_create(nuevas)
+                summary['estudios_added'] += len(nuevas)
+                agregados = agregados or bool(nuevas)
+        
+        # Guardar experiencia (ya existe si hay una cuyo rol contiene el nombre)
         if 'experiencia' in data and data['experiencia']:
-            logger.info(f"Procesando {len(data['experiencia'])} experiencias de {source}")
-            for item in data['experiencia']:
-                try:
-                    # Verificar si ya existe una experiencia similar
-                    existing = UsuarioExperiencia.objects.filter(
+            with _seccion('experiencia', source, summary):
+                logger.info(f"Procesando {len(data['experiencia'])} experiencias de {source}")
+                filas = _validas([
+                    UsuarioExperiencia(
                         user_id=usuario,
-                        rol__icontains=item['rol']
-                    ).first()
-                    
-                    if not existing:
-                        UsuarioExperiencia.objects.create(
-                            user_id=usuario,
-                            rol=item['rol'],
-                            tiempo=item['tiempo'],
-                            actividades=f"{item['actividades']} (Fuente: {source})"
-                        )
-                        summary['experiencia_added'] += 1
-                        logger.info(f"Experiencia agregada: {item['rol']}")
-                    else:
-                        logger.info(f"Experiencia ya existe: {item['rol']}")
-                except Exception as e:
-                    error_msg = f"Error al guardar experiencia {item.get('rol', 'desconocida')}: {str(e)}"
-                    logger.error(error_msg)
-                    summary['errors'].append(error_msg)
+                        rol=item.get('rol'),
+                        tiempo=item.get('tiempo'),
+                        actividades=f"{item.get('actividades')} (Fuente: {source})"
+                    )
+                    for item in data['experiencia']
+                ], 'experiencia', 'rol', summary)
+                existentes = list(UsuarioExperiencia.objects.filter(user_id=usuario).values_list('rol', flat=True))
+                nuevas = []
+                for fila in filas:
+                    if _contenido_en(fila.rol, existentes):
+                        logger.info(f"Experiencia ya existe: {fila.rol}")
+                        continue
+                    existentes.append(fila.rol)
+                    nuevas.append(fila)
+                    logger.info(f"Experiencia agregada: {fila.rol}")
+                UsuarioExperiencia.objects.bulk_create(nuevas)
+                summary['experiencia_added'] += len(nuevas)
+                agregados = agregados or bool(nuevas)
+        
+        # bulk_create no envía post_save: programar lo que harían las señales
+        if agregados:
+            schedule_feature_refresh(usuario.id)
+            schedule_stats_refresh()
+        
+        # La huella solo se guarda si se importó todo; si no, la siguiente
+        # importación vuelve a procesar el perfil
+        if len(summary['errors']) == errores_previos:
+            PerfilImportado.objects.update_or_create(
+                user_id=usuario, fuente=source, defaults={'huella': huella, 'huella_pagina': huella_pagina}
+            )
+        else:
+            logger.warning(f"Perfil de {source} importado de forma parcial; se procesará de nuevo en la siguiente importación")
+            summary.setdefault('parciales', []).append(source)
     
     except Exception as e:
         error_msg = f"Error al guardar datos del usuario: {str(e)}"
         logger.error(error_msg)
         summary['errors'].append(f"Error al guardar datos de {source}: {str(e)}")
-        raise 
\ No newline at end of file
+        raise 
@@ -0,0 +1,129 @@
+import atexit
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Páginas que visita una sesión antes de reemplazarla (Chrome acumula memoria)
+MAX_USOS_POR_SESION = 100
+
+
+class DriverPool:
+    """
+    Conjunto acotado de sesiones de navegador reutilizables.
+
+    Las sesiones se crean bajo demanda hasta `size` y, al devolverse, se
+    limpian (cookies, almacenamiento y página en blanco) y quedan listas
+    para el siguiente perfil. Las que fallan se cierran y se reemplazan.
+    Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self, factory, size=2, max_usos=MAX_USOS_POR_SESION):
+        self.factory = factory
+        self.size = size
+        self.max_usos = max_usos
+        self._libres = queue.LifoQueue()
+        self._cupos = threading.BoundedSemaphore(size)
+        self._usos = {}
+        self._lock = threading.Lock()
+        self._cerrado = False
+
+    def acquire(self, timeout=None):
+        """
+        Obtiene una sesión, esperando si todas están en uso.
+
+        Raises:
+            TimeoutError: Si no se liberó ninguna en `timeout` segundos
+        """
+        if not self._cupos.acquire(timeout=timeout):
+            raise TimeoutError("No hay sesiones de navegador disponibles")
+        try:
+            # LIFO: se reutiliza la sesión usada más recientemente
+            driver = self._libres.get_nowait()
+        except queue.Empty:
+            try:
+                driver = self.factory()
+            except Exception:
+                self._cupos.release()
+                raise
+            logger.info("Sesión de navegador creada")
+        with self._lock:
+            self._usos[id(driver)] = self._usos.get(id(driver), 0) + 1
+        return driver
+
+    def release(self, driver):
+        """Devuelve una sesión al pool después de limpiarla."""
+        with self._lock:
+            agotada = self._cerrado or self._usos.get(id(driver), 0) >= self.max_usos
+        if agotada or not self._reset(driver):
+            self.discard(driver)
+            return
+        self._libres.put(driver)
+        self._cupos.release()
+
+    def discard(self, driver):
+        """Cierra una sesión (por ejemplo, tras un error) y libera su cupo."""
+        self._quit(driver)
+        self._cupos.release()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """Obtiene una sesión y la devuelve al salir, o la descarta si hubo un error."""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except BaseException:
+            # La sesión puede haber quedado en un estado inservible
+            self.discard(driver)
+            raise
+        self.release(driver)
+
+    def close(self):
+        """Cierra las sesiones libres; las que estén en uso se cierran al devolverse."""
+        with self._lock:
+            self._cerrado = True
+        while True:
+            try:
+                self._quit(self._libres.get_nowait())
+            except queue.Empty:
+                return
+
+    def _reset(self, driver):
+        try:
+            driver.delete_all_cookies()
+            driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+            driver.get('about:blank')
+            return True
+        except Exception as e:
+            logger.warning(f"Sesión de navegador descartada al limpiarla: {e}")
+            return False
+
+    def _quit(self, driver):
+        with self._lock:
+            self._usos.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error cerrando sesión de navegador: {e}")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """
+    Pool compartido del proceso, creado en el primer uso con
+    settings.SCRAPING_DRIVER_POOL_SIZE sesiones como máximo.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from .scraping_utils import setup_driver
+            _pool = DriverPool(setup_driver, size=settings.SCRAPING_DRIVER_POOL_SIZE)
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,221 @@
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Max, QuerySet
+
+from .candidate_loader import load_candidates
+from .lazy_imports import lazy_import
+from .models import SecuenciaCaracteristicas, Usuario, UsuarioCaracteristicas
+
+# numpy solo se carga al calcular características (no al arrancar Django)
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de lote para reconstruir características faltantes
+REBUILD_BATCH_SIZE = 500
+
+# Fila única de SecuenciaCaracteristicas
+SECUENCIA_ID = 1
+
+
+def _reservar_versiones(cantidad):
+    """
+    Reserva `cantidad` versiones consecutivas para escrituras de
+    UsuarioCaracteristicas. Debe llamarse dentro de la transacción de la
+    escritura: el UPDATE bloquea el contador hasta confirmarla.
+
+    Returns:
+        int: Primera versión reservada
+    """
+    SecuenciaCaracteristicas.objects.get_or_create(id=SECUENCIA_ID)
+    SecuenciaCaracteristicas.objects.filter(id=SECUENCIA_ID).update(valor=F('valor') + cantidad)
+    ultima = SecuenciaCaracteristicas.objects.values_list('valor', flat=True).get(id=SECUENCIA_ID)
+    return ultima - cantidad + 1
+
+
+def compute_user_features(usuario):
+    """
+    Calcula las características del perfil que no dependen del proyecto.
+
+    Args:
+        usuario: Instancia de Usuario, idealmente con relaciones precargadas
+
+    Returns:
+        dict: Valores para los campos de UsuarioCaracteristicas
+    """
+    habilidades = list(usuario.habilidades.all())
+    conocimientos = list(usuario.conocimientos.all())
+    experiencias = list(usuario.experiencias.all())
+    estudios = list(usuario.estudios.all())
+
+    habilidades_set = {h.habilidad.lower() for h in habilidades}
+    tiempos_experiencia = [e.tiempo for e in experiencias]
+
+    # Experiencia y educación
+    max_tiempo_experiencia = max(tiempos_experiencia + [0])
+    nivel_educativo = max([e.nivel for e in estudios] + [0])
+    consistencia_experiencia = float(np.std(tiempos_experiencia)) if len(tiempos_experiencia) > 1 else 0.0
+
+    # Habilidades
+    categorias = [getattr(h, 'categoria', 'general') for h in habilidades]
+    diversidad_habilidades = len(set(categorias)) if habilidades else 0
+    especializacion = max(Counter(categorias).values()) / len(categorias) if categorias else 0.0
+    niveles_habilidades = [getattr(h, 'nivel', 3) for h in habilidades if hasattr(h, 'nivel')]
+    promedio_nivel_habilidades = float(np.mean(niveles_habilidades)) if niveles_habilidades else 0.0
+    max_nivel_habilidades = max(niveles_habilidades) if niveles_habilidades else 0.0
+
+    # Coherencia entre habilidades y conocimientos, sobre los términos del catálogo
+    terminos_habilidades = {h.termino_id for h in habilidades if h.termino_id}
+    terminos_conocimientos = {c.termino_id for c in conocimientos if c.termino_id}
+    coherencia = 0.0
+    if terminos_habilidades and terminos_conocimientos:
+        coherencia = (len(terminos_habilidades & terminos_conocimientos) /
+                      len(terminos_habilidades | terminos_conocimientos))
+
+    # Progresión de experiencia
+    progresion_experiencia = 0.0
+    if len(tiempos_experiencia) > 1:
+        tiempos_ordenados = sorted(tiempos_experiencia)
+        progresion_experiencia = np.corrcoef(range(len(tiempos_ordenados)), tiempos_ordenados)[0, 1]
+        if np.isnan(progresion_experiencia):
+            progresion_experiencia = 0.0
+
+    complejidad_perfil = (
+        len(habilidades) * 0.3 +
+        len(conocimientos) * 0.3 +
+        len(experiencias) * 0.2 +
+        len(estudios) * 0.2
+    ) / 20
+
+    return {
+        'num_habilidades': len(habilidades),
+        'num_conocimientos': len(conocimientos),
+        'num_experiencias': len(experiencias),
+        'num_estudios': len(estudios),
+        'max_tiempo_experiencia': max_tiempo_experiencia,
+        'nivel_educativo': nivel_educativo,
+        'diversidad_habilidades': diversidad_habilidades,
+        'consistencia_experiencia': consistencia_experiencia,
+        'promedio_nivel_habilidades': promedio_nivel_habilidades,
+        'max_nivel_habilidades': max_nivel_habilidades,
+        'coherencia_habilidades_conocimientos': coherencia,
+        'progresion_experiencia': float(progresion_experiencia),
+        'especializacion': float(especializacion),
+        'complejidad_perfil': complejidad_perfil,
+        'habilidades': sorted(habilidades_set),
+        'conocimientos': [[c.conocimiento.lower(), c.nivel] for c in conocimientos],
+        'experiencias': [[e.id, e.tiempo, e.actividades.lower()] for e in experiencias],
+    }
+
+
+def refresh_user_features(user_id):
+    """
+    Recalcula y guarda las características de un usuario.
+
+    Returns:
+        UsuarioCaracteristicas o None si el usuario ya no existe
+    """
+    usuarios = load_candidates(Usuario.objects.filter(id=user_id))
+    if not usuarios:
+        return None
+
+    valores = compute_user_features(usuarios[0])
+    with transaction.atomic():
+        valores['version'] = _reservar_versiones(1)
+        caracteristicas, _ = UsuarioCaracteristicas.objects.update_or_create(
+            user_id=usuarios[0],
+            defaults=valores
+        )
+    return caracteristicas
+
+
+def schedule_feature_refresh(user_id):
+    """
+    Programa el recálculo de las características de un usuario al confirmar
+    la transacción actual. Varios cambios del mismo usuario dentro de una
+    transacción generan un único recálculo.
+    """
+    connection = transaction.get_connection()
+    for _, pendiente, *_ in connection.run_on_commit:
+        if getattr(pendiente, 'caracteristicas_user_id', None) == user_id:
+            return
+
+    def _refresh():
+        try:
+            refresh_user_features(user_id)
+        except Exception as e:
+            # Se reconstruirán en la siguiente ejecución de recomendaciones
+            logger.warning(f"Error actualizando características del usuario {user_id}: {e}")
+            UsuarioCaracteristicas.objects.filter(user_id=user_id).delete()
+
+    _refresh.caracteristicas_user_id = user_id
+    transaction.on_commit(_refresh)
+
+
+def _rebuild_missing(user_ids):
+    """
+    Construye en bloque las características de los usuarios que no las tienen.
+    """
+    creadas = {}
+    user_ids = list(user_ids)
+    for inicio in range(0, len(user_ids), REBUILD_BATCH_SIZE):
+        lote = load_candidates(Usuario.objects.filter(id__in=user_ids[inicio:inicio + REBUILD_BATCH_SIZE]))
+        nuevas = [
+            UsuarioCaracteristicas(user_id=usuario, **compute_user_features(usuario))
+            for usuario in lote
+        ]
+        with transaction.atomic():
+            primera = _reservar_versiones(len(nuevas)) if nuevas else 0
+            for i, caracteristicas in enumerate(nuevas):
+                caracteristicas.version = primera + i
+            UsuarioCaracteristicas.objects.bulk_create(nuevas, ignore_conflicts=True)
+        creadas.update({c.user_id_id: c for c in nuevas})
+    return creadas
+
+
+def load_user_features(usuarios):
+    """
+    Obtiene las características materializadas de los usuarios, en el mismo
+    orden recibido. Las que faltan (usuarios nuevos o invalidados) se
+    reconstruyen en bloque.
+
+    Args:
+        usuarios: QuerySet o iterable de instancias de Usuario
+
+    Returns:
+        list: Instancias de UsuarioCaracteristicas
+    """
+    if isinstance(usuarios, QuerySet):
+        user_ids = list(usuarios.values_list('id', flat=True))
+        existentes = UsuarioCaracteristicas.objects.filter(user_id__in=usuarios.values('id'))
+    else:
+        user_ids = [u.id for u in usuarios]
+        existentes = UsuarioCaracteristicas.objects.filter(user_id__in=user_ids)
+
+    caracteristicas = {c.user_id_id: c for c in existentes}
+    faltantes = [uid for uid in user_ids if uid not in caracteristicas]
+    if faltantes:
+        logger.info(f"Reconstruyendo características de {len(faltantes)} usuarios")
+        caracteristicas.update(_rebuild_missing(faltantes))
+
+    return [caracteristicas[uid] for uid in user_ids if uid in caracteristicas]
+
+
+def feature_snapshot_version(usuarios):
+    """
+    Identifica el estado de las características de un conjunto de usuarios.
+    Cambia cuando se agrega, elimina o actualiza alguno de sus perfiles.
+
+    Args:
+        usuarios: QuerySet de Usuario
+
+    Returns:
+        str: Versión del snapshot de características
+    """
+    resumen = UsuarioCaracteristicas.objects.filter(user_id__in=usuarios.values('id')).aggregate(
+        total=Count('id'),
+        ultima=Max('version')
+    )
+    return f"{usuarios.count()}:{resumen['total']}:{resumen['ultima'] or 0}"
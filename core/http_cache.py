@@ -0,0 +1,101 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _ruta(url):
+    clave = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return Path(settings.HTTP_CACHE_DIR) / f'{clave}.json'
+
+
+def _leer(url):
+    try:
+        with open(_ruta(url), encoding='utf-8') as f:
+            entrada = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # Colisión de la clave o formato anterior
+    return entrada if entrada.get('url') == url else None
+
+
+def _escribir(url, entrada):
+    ruta = _ruta(url)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=ruta.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+    finally:
+        Path(temporal).unlink(missing_ok=True)
+
+
+def body_hash(text):
+    """Huella (sha256) del contenido de una página, para reconocerla sin interpretarla."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def cached_get(session, url, timeout, ttl=None):
+    """
+    GET con caché en disco (settings.HTTP_CACHE_DIR), una entrada por URL
+    con el cuerpo, el ETag, Last-Modified y la fecha de descarga.
+
+    Dentro del TTL la página se toma de la caché sin hacer la petición.
+    Pasado el TTL se revalida con una petición condicional (If-None-Match /
+    If-Modified-Since) y, si el servidor responde 304, se reutiliza el
+    cuerpo guardado. Si el contenido cambió lo decide quien lo importa (ver
+    PerfilImportado), no la caché.
+
+    Args:
+        session: Sesión de requests con la que descargar
+        url: URL de la página
+        timeout: Tiempo máximo de la petición (segundos)
+        ttl: Segundos durante los que la entrada es válida sin revalidar
+            (settings.HTTP_CACHE_TTL); con 0 siempre se consulta al servidor
+
+    Returns:
+        str: Contenido de la página
+
+    Raises:
+        requests.RequestException: Si la petición falla
+    """
+    ttl = settings.HTTP_CACHE_TTL if ttl is None else ttl
+    entrada = _leer(url)
+    ahora = time.time()
+    if entrada and ahora - entrada['fecha'] < ttl:
+        return entrada['body']
+
+    headers = {}
+    if entrada and entrada.get('etag'):
+        headers['If-None-Match'] = entrada['etag']
+    if entrada and entrada.get('last_modified'):
+        headers['If-Modified-Since'] = entrada['last_modified']
+
+    response = session.get(url, timeout=timeout, headers=headers)
+    if response.status_code == 304 and entrada:
+        logger.info(f"Página sin cambios (304): {url}")
+        entrada['fecha'] = ahora
+        _escribir(url, entrada)
+        return entrada['body']
+    response.raise_for_status()
+
+    # Sin charset en la cabecera, requests asume ISO-8859-1
+    if 'charset' not in response.headers.get('Content-Type', '').lower():
+        response.encoding = response.apparent_encoding
+    text = response.text
+    _escribir(url, {
+        'url': url,
+        'body': text,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'fecha': ahora,
+    })
+    return text
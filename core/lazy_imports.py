@@ -0,0 +1,41 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Módulo que se importa en el primer acceso a uno de sus atributos.
+
+    Permite declarar a nivel de módulo dependencias pesadas (TensorFlow,
+    scikit-learn, ReportLab) sin pagar su importación al cargar las vistas,
+    los comandos de manage.py o las pruebas que no las usan.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        estado = 'cargado' if self._module is not None else 'sin cargar'
+        return f"<LazyModule {self._name} ({estado})>"
+
+
+def lazy_import(name):
+    """
+    Devuelve un proxy del módulo `name` que lo importa en el primer uso.
+
+    Args:
+        name: Nombre completo del módulo (p. ej. 'tensorflow.keras')
+    """
+    return LazyModule(name)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk_ingestion import Checkpoint, CheckpointEnUso, checkpoint_name, checkpoint_path, ingest_profiles
+
+
+class Command(BaseCommand):
+    help = (
+        "Extrae y guarda los perfiles de CVLAC y LinkedIn de todos los usuarios "
+        "(o de los indicados). Si se interrumpe, la siguiente ejecución con el "
+        "mismo checkpoint continúa donde quedó."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help="IDs de usuario (por defecto, todos)")
+        parser.add_argument('--workers', type=int, default=settings.INGEST_WORKERS,
+                            help="Hilos de descarga")
+        parser.add_argument('--per-host', type=int, default=settings.INGEST_PER_HOST_LIMIT,
+                            help="Descargas simultáneas por host")
+        parser.add_argument('--checkpoint',
+                            help="Nombre del checkpoint en INGEST_CHECKPOINT_DIR (por defecto, "
+                                 "el compartido para todos los usuarios o uno propio de los indicados)")
+        parser.add_argument('--restart', action='store_true',
+                            help="Descarta el checkpoint y procesa de nuevo todos los usuarios")
+        parser.add_argument('--refresh', action='store_true',
+                            help="Descarga de nuevo las páginas aunque estén en la caché HTTP")
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids'] or None
+        checkpoint = Checkpoint(checkpoint_path(options['checkpoint'] or checkpoint_name(user_ids)))
+        if options['restart']:
+            checkpoint.eliminar()
+
+        def progreso(user_id, summary, hechos, total):
+            estado = summary['error'] if summary.get('error') else 'ok'
+            self.stdout.write(f"[{hechos}/{total}] Usuario {user_id}: {estado}")
+
+        try:
+            resumen = ingest_profiles(
+                user_ids=user_ids,
+                workers=options['workers'],
+                por_host=options['per_host'],
+                checkpoint=checkpoint,
+                progreso=progreso,
+                ttl=0 if options['refresh'] else None,
+            )
+        except CheckpointEnUso as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Procesados {resumen['procesados']} usuarios ({resumen['omitidos']} ya estaban "
+            f"en el checkpoint, {resumen['errores']} con errores, {resumen['sin_cambios']} perfiles "
+            f"sin cambios). Agregados: "
+            f"{resumen['habilidades_added']} habilidades, {resumen['conocimientos_added']} conocimientos, "
+            f"{resumen['estudios_added']} estudios, {resumen['experiencia_added']} experiencias."
+        ))
@@ -0,0 +1,198 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from django.db.models import Count, Max, Sum
+
+from .models import (
+    Proyecto, ProyectoRoles, Usuario, UsuarioHabilidades, UsuarioConocimiento,
+    UsuarioEstudios, UsuarioExperiencia
+)
+
+# Filas principales (usuarios o proyectos) por bloque
+CHUNK_SIZE = 2000
+
+PROFESSIONAL_COLUMNS = [
+    'id', 'nombres', 'apellidos', 'email', 'puesto_actual', 'dependencia', 'fecha_ingreso',
+    'habilidades', 'experiencia_habilidades', 'conocimientos', 'estudios',
+    'experiencia_laboral', 'actividades'
+]
+
+# Características numéricas calculadas con agregados SQL
+PROFESSIONAL_FEATURES = ['años_experiencia', 'nivel_educacion', 'diversidad_habilidades']
+PROJECT_FEATURES = ['num_roles_requeridos']
+
+PROJECT_COLUMNS = [
+    'id', 'nombre', 'convocatoria', 'tipo_proyecto', 'tipo_convocatoria', 'alcance',
+    'objetivo', 'presupuesto', 'fecha', 'roles_requeridos', 'habilidades_requeridas',
+    'experiencia_requerida', 'conocimientos_requeridos'
+]
+
+
+def _texto(valor):
+    return str(valor)
+
+
+def _par(valor, nivel):
+    return f"{valor}:{nivel}"
+
+
+def _iter_keyset(queryset, campos, chunk_size):
+    """
+    Recorre un QuerySet por bloques ordenados por id (paginación por clave,
+    sin OFFSET), devolviendo listas de dicts.
+    """
+    ultimo = None
+    while True:
+        bloque = queryset.order_by('id')
+        if ultimo is not None:
+            bloque = bloque.filter(id__gt=ultimo)
+        filas = list(bloque.values(*campos)[:chunk_size])
+        if not filas:
+            return
+        yield filas
+        ultimo = filas[-1]['id']
+
+
+def _owner_range(owner_field, ids):
+    """
+    Filtro de las filas hijas de un bloque. Los bloques de _iter_keyset son
+    tramos ordenados de IDs sin huecos entre bloques, así que basta un rango
+    (que usa el índice de la FK) en lugar de un IN con miles de parámetros.
+    """
+    return {f'{owner_field}__gte': ids[0], f'{owner_field}__lte': ids[-1]}
+
+
+def _concat_distinct(queryset, owner_field, ids, formatos, using):
+    """
+    Equivalente portable de GROUP_CONCAT(DISTINCT ...) para varias columnas
+    de una tabla hija, limitado a los dueños del bloque.
+
+    Args:
+        queryset: QuerySet de la tabla hija
+        owner_field: Campo FK hacia el dueño (user_id, project_id)
+        ids: IDs ordenados de los dueños del bloque
+        formatos: dict columna_resultado -> (campos, función que arma el valor)
+
+    Returns:
+        dict: columna_resultado -> {owner_id: 'v1,v2,...'}
+    """
+    campos = sorted({campo for campos_columna, _ in formatos.values() for campo in campos_columna})
+    valores = {columna: defaultdict(dict) for columna in formatos}
+
+    filas = queryset.using(using).filter(**_owner_range(owner_field, ids)).order_by('id')
+    for fila in filas.values(owner_field, *campos).iterator():
+        for columna, (campos_columna, armar) in formatos.items():
+            partes = [fila[campo] for campo in campos_columna]
+            # GROUP_CONCAT ignora los valores nulos
+            if any(parte is None for parte in partes):
+                continue
+            valores[columna][fila[owner_field]][armar(*partes)] = None
+
+    return {
+        columna: {owner: ','.join(distintos) for owner, distintos in por_dueño.items()}
+        for columna, por_dueño in valores.items()
+    }
+
+
+def _aggregate(queryset, owner_field, ids, agregado, using):
+    """
+    Agrega una tabla hija por dueño en la base de datos.
+
+    Returns:
+        dict: {owner_id: valor} (los dueños sin filas no aparecen)
+    """
+    filas = (queryset.using(using).filter(**_owner_range(owner_field, ids))
+             .values(owner_field).annotate(valor=agregado).order_by())
+    return dict(filas.values_list(owner_field, 'valor'))
+
+
+def professional_features(ids, using='default'):
+    """
+    Características numéricas de un bloque de profesionales, calculadas con
+    agregados SQL en lugar de interpretar el texto concatenado: años de
+    experiencia (SUM de tiempo), nivel de educación (MAX de nivel, desde 0)
+    y diversidad de habilidades (COUNT DISTINCT de términos del catálogo).
+
+    Args:
+        ids: IDs ordenados de un bloque de _iter_keyset
+
+    Returns:
+        pd.DataFrame: Columnas PROFESSIONAL_FEATURES, indexado por id
+    """
+    agregados = {
+        'años_experiencia': _aggregate(UsuarioExperiencia.objects, 'user_id', ids, Sum('tiempo'), using),
+        'nivel_educacion': _aggregate(UsuarioEstudios.objects, 'user_id', ids, Max('nivel'), using),
+        'diversidad_habilidades': _aggregate(
+            UsuarioHabilidades.objects, 'user_id', ids, Count('termino', distinct=True), using
+        ),
+    }
+    features = pd.DataFrame(index=pd.Index(ids, name='id'))
+    for columna, por_usuario in agregados.items():
+        features[columna] = features.index.map(por_usuario).fillna(0).astype(np.int64)
+    features['nivel_educacion'] = features['nivel_educacion'].clip(lower=0)
+    return features
+
+
+def iter_professionals(chunk_size=CHUNK_SIZE, using='default'):
+    """
+    Recorre los profesionales por bloques con sus habilidades, conocimientos,
+    estudios y experiencia concatenados.
+
+    Yields:
+        pd.DataFrame: Un bloque con las columnas PROFESSIONAL_COLUMNS y
+            PROFESSIONAL_FEATURES
+    """
+    campos = ['id', 'nombres', 'apellidos', 'email', 'puesto_actual', 'dependencia', 'fecha_ingreso']
+    for usuarios in _iter_keyset(Usuario.objects.using(using), campos, chunk_size):
+        ids = [u['id'] for u in usuarios]
+        relacionados = {}
+        relacionados.update(_concat_distinct(UsuarioHabilidades.objects, 'user_id', ids, {
+            'habilidades': (['habilidad'], _texto),
+            'experiencia_habilidades': (['experiencia'], _texto),
+        }, using))
+        relacionados.update(_concat_distinct(UsuarioConocimiento.objects, 'user_id', ids, {
+            'conocimientos': (['conocimiento', 'nivel'], _par),
+        }, using))
+        relacionados.update(_concat_distinct(UsuarioEstudios.objects, 'user_id', ids, {
+            'estudios': (['estudio', 'nivel'], _par),
+        }, using))
+        relacionados.update(_concat_distinct(UsuarioExperiencia.objects, 'user_id', ids, {
+            'experiencia_laboral': (['rol', 'tiempo'], _par),
+            'actividades': (['actividades'], _texto),
+        }, using))
+
+        bloque = pd.DataFrame(usuarios)
+        for columna, por_usuario in relacionados.items():
+            bloque[columna] = bloque['id'].map(por_usuario)
+        bloque = bloque.reindex(columns=PROFESSIONAL_COLUMNS).fillna('')
+        yield bloque.join(professional_features(ids, using), on='id')
+
+
+def iter_projects(chunk_size=CHUNK_SIZE, using='default'):
+    """
+    Recorre los proyectos por bloques con los requisitos de sus roles
+    concatenados.
+
+    Yields:
+        pd.DataFrame: Un bloque con las columnas PROJECT_COLUMNS y
+            PROJECT_FEATURES
+    """
+    campos = ['id', 'nombre', 'convocatoria', 'tipo_proyecto', 'tipo_convocatoria', 'alcance',
+              'objetivo', 'presupuesto', 'fecha']
+    for proyectos in _iter_keyset(Proyecto.objects.using(using), campos, chunk_size):
+        ids = [p['id'] for p in proyectos]
+        relacionados = _concat_distinct(ProyectoRoles.objects, 'project_id', ids, {
+            'roles_requeridos': (['rol'], _texto),
+            'habilidades_requeridas': (['habilidades'], _texto),
+            'experiencia_requerida': (['experiencia'], _texto),
+            'conocimientos_requeridos': (['conocimientos'], _texto),
+        }, using)
+
+        bloque = pd.DataFrame(proyectos)
+        for columna, por_proyecto in relacionados.items():
+            bloque[columna] = bloque['id'].map(por_proyecto)
+        num_roles = _aggregate(ProyectoRoles.objects, 'project_id', ids, Count('rol', distinct=True), using)
+        bloque = bloque.reindex(columns=PROJECT_COLUMNS).fillna('')
+        bloque['num_roles_requeridos'] = bloque['id'].map(num_roles).fillna(0).astype(np.int64)
+        yield bloque
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recomendacionproyecto_nn_accuracy_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsuarioCaracteristicas',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('num_habilidades', models.IntegerField(default=0)),
+                ('num_conocimientos', models.IntegerField(default=0)),
+                ('num_experiencias', models.IntegerField(default=0)),
+                ('num_estudios', models.IntegerField(default=0)),
+                ('max_tiempo_experiencia', models.IntegerField(default=0)),
+                ('nivel_educativo', models.IntegerField(default=0)),
+                ('diversidad_habilidades', models.IntegerField(default=0)),
+                ('consistencia_experiencia', models.FloatField(default=0.0)),
+                ('promedio_nivel_habilidades', models.FloatField(default=0.0)),
+                ('max_nivel_habilidades', models.FloatField(default=0.0)),
+                ('coherencia_habilidades_conocimientos', models.FloatField(default=0.0)),
+                ('progresion_experiencia', models.FloatField(default=0.0)),
+                ('especializacion', models.FloatField(default=0.0)),
+                ('complejidad_perfil', models.FloatField(default=0.0)),
+                ('habilidades', models.JSONField(default=list)),
+                ('conocimientos', models.JSONField(default=list)),
+                ('experiencias', models.JSONField(default=list)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('user_id', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='caracteristicas', to='core.usuario')),
+            ],
+        ),
+    ]
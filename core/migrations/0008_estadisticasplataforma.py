@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_usuariocaracteristicas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticasPlataforma',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('total_proyectos', models.IntegerField(default=0)),
+                ('total_usuarios', models.IntegerField(default=0)),
+                ('total_recomendaciones', models.IntegerField(default=0)),
+                ('total_usuarios_recomendados', models.IntegerField(default=0)),
+                ('promedio_score', models.FloatField(default=0.0)),
+                ('proyectos_por_tipo', models.JSONField(default=list)),
+                ('proyectos_por_convocatoria', models.JSONField(default=list)),
+                ('usuarios_mas_habilidades', models.JSONField(default=list)),
+                ('usuarios_mas_conocimientos', models.JSONField(default=list)),
+                ('proyectos_mas_activos', models.JSONField(default=list)),
+                ('usuarios_mas_recomendados', models.JSONField(default=list)),
+                ('desactualizado', models.BooleanField(default=False)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_estadisticasplataforma'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recomendacionproyecto',
+            name='fecha_recomendacion',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:12
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recomendacionproyecto_fecha_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='proyectoaliados',
+            index=models.Index(models.F('project_id'), django.db.models.functions.text.Lower('entidad'), name='proyectoaliados_entidad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectoproductos',
+            index=models.Index(models.F('project_id'), django.db.models.functions.text.Lower('producto'), name='proyectoproductos_prod_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectoroles',
+            index=models.Index(models.F('project_id'), django.db.models.functions.text.Lower('rol'), name='proyectoroles_rol_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recomendacionusuario',
+            index=models.Index(fields=['recomendacion_id', '-score_combinado'], name='recusuario_rec_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recomendacionusuario',
+            index=models.Index(fields=['-score_combinado'], name='recusuario_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuarioconocimiento',
+            index=models.Index(models.F('user_id'), django.db.models.functions.text.Lower('conocimiento'), name='usuarioconoc_conoc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuarioestudios',
+            index=models.Index(models.F('user_id'), django.db.models.functions.text.Lower('estudio'), name='usuarioestudios_estudio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuarioexperiencia',
+            index=models.Index(models.F('user_id'), django.db.models.functions.text.Lower('rol'), name='usuarioexp_rol_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuariohabilidades',
+            index=models.Index(models.F('user_id'), django.db.models.functions.text.Lower('habilidad'), name='usuariohab_habilidad_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def normalizar(texto):
+    # Copia de Termino.normalizar al momento de esta migración
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.casefold().split())
+
+
+def poblar_catalogo(apps, schema_editor):
+    Termino = apps.get_model('core', 'Termino')
+    filas_por_modelo = [
+        (apps.get_model('core', 'UsuarioHabilidades'), 'habilidad'),
+        (apps.get_model('core', 'UsuarioConocimiento'), 'conocimiento'),
+    ]
+
+    nombres = {}
+    for modelo, campo in filas_por_modelo:
+        for nombre in modelo.objects.order_by('id').values_list(campo, flat=True):
+            nombres.setdefault(normalizar(nombre), nombre.strip())
+    Termino.objects.bulk_create([Termino(clave=clave, nombre=nombre) for clave, nombre in nombres.items()])
+    ids = dict(Termino.objects.values_list('clave', 'id'))
+
+    for modelo, campo in filas_por_modelo:
+        filas = list(modelo.objects.only('id', campo))
+        for fila in filas:
+            fila.termino_id = ids[normalizar(getattr(fila, campo))]
+        modelo.objects.bulk_update(filas, ['termino'], batch_size=500)
+
+    # La coherencia entre habilidades y conocimientos pasa a calcularse con
+    # los términos del catálogo: se reconstruye al volver a usarse
+    apps.get_model('core', 'UsuarioCaracteristicas').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_composite_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Termino',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=255)),
+                ('clave', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='usuarioconocimiento',
+            name='usuarioconoc_conoc_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='usuariohabilidades',
+            name='usuariohab_habilidad_idx',
+        ),
+        migrations.AddField(
+            model_name='usuarioconocimiento',
+            name='termino',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='conocimientos', to='core.termino'),
+        ),
+        migrations.AddField(
+            model_name='usuariohabilidades',
+            name='termino',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='habilidades', to='core.termino'),
+        ),
+        migrations.RunPython(poblar_catalogo, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='usuarioconocimiento',
+            index=models.Index(fields=['user_id', 'termino'], name='usuarioconoc_termino_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuariohabilidades',
+            index=models.Index(fields=['user_id', 'termino'], name='usuariohab_termino_idx'),
+        ),
+    ]
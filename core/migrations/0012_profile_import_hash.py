@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_termino_catalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerfilImportado',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('fuente', models.CharField(max_length=20)),
+                ('huella', models.CharField(max_length=64)),
+                ('fecha', models.DateTimeField(auto_now=True)),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='perfiles_importados', to='core.usuario')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user_id', 'fuente'), name='perfilimportado_fuente_uniq')],
+            },
+        ),
+    ]
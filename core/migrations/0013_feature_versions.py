@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+
+def crear_secuencia(apps, schema_editor):
+    # Las filas existentes quedan en la versión 0, que el índice lee completo al arrancar
+    apps.get_model('core', 'SecuenciaCaracteristicas').objects.get_or_create(id=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_profile_import_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaCaracteristicas',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('valor', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='usuariocaracteristicas',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0),
+        ),
+        migrations.RunPython(crear_secuencia, migrations.RunPython.noop),
+    ]
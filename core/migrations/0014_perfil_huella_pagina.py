@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_feature_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfilimportado',
+            name='huella_pagina',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
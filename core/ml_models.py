@@ -9,6 +9,10 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import logging
 import warnings
+from .feature_store import load_user_features
+from .term_index import get_term_index
+from .text_matching import TermMatcher
+from .ranking import top_k
 
 # Suprimir advertencias específicas de métricas
 warnings.filterwarnings('ignore', category=UserWarning, message='.*Precision is ill-defined.*')
@@ -91,94 +95,40 @@ class RecommendationSystem:
             roles_habilidades = {h.strip() for h in roles_habilidades if h.strip()}
             roles_conocimientos = {c.strip() for c in roles_conocimientos if c.strip()}
 
-            for usuario in usuarios:
-                # Obtener habilidades, conocimientos y experiencia con manejo de errores
-                try:
-                    habilidades = list(usuario.habilidades.all()) if hasattr(usuario, 'habilidades') else []
-                    conocimientos = list(usuario.conocimientos.all()) if hasattr(usuario, 'conocimientos') else []
-                    experiencias = list(usuario.experiencias.all()) if hasattr(usuario, 'experiencias') else []
-                    estudios = list(usuario.estudios.all()) if hasattr(usuario, 'estudios') else []
-                except:
-                    habilidades = conocimientos = experiencias = estudios = []
-
-                # Calcular match de habilidades con peso
-                habilidades_usuario = set()
-                if habilidades:
-                    for h in habilidades:
-                        if hasattr(h, 'habilidad'):
-                            habilidades_usuario.add(h.habilidad.lower())
-
-                match_habilidades = len(habilidades_usuario.intersection(roles_habilidades)) / len(roles_habilidades) if roles_habilidades else 0
-
-                # Calcular match de conocimientos con peso
-                conocimientos_usuario = set()
-                if conocimientos:
-                    for c in conocimientos:
-                        if hasattr(c, 'conocimiento'):
-                            conocimientos_usuario.add(c.conocimiento.lower())
-
-                match_conocimientos = len(conocimientos_usuario.intersection(roles_conocimientos)) / len(roles_conocimientos) if roles_conocimientos else 0
-
-                # Calcular nivel promedio de conocimientos relevantes
-                niveles_conocimientos = []
-                for c in conocimientos:
-                    if hasattr(c, 'conocimiento') and hasattr(c, 'nivel'):
-                        if c.conocimiento.lower() in roles_conocimientos:
-                            niveles_conocimientos.append(c.nivel)
-
-                promedio_nivel_conocimientos = np.mean(niveles_conocimientos) if niveles_conocimientos else 0
-
-                # Calcular años máximos de experiencia relevante
-                max_tiempo_experiencia = 0
-                if experiencias:
-                    for e in experiencias:
-                        if hasattr(e, 'tiempo'):
-                            max_tiempo_experiencia = max(max_tiempo_experiencia, e.tiempo)
-
-                cumple_experiencia = 1 if max_tiempo_experiencia >= roles_experiencia_min else 0
-
-                # Calcular nivel educativo máximo
-                nivel_educativo = 0
-                if estudios:
-                    for e in estudios:
-                        if hasattr(e, 'nivel'):
-                            nivel_educativo = max(nivel_educativo, e.nivel)
+            # Características del perfil precalculadas (independientes del proyecto)
+            perfiles = load_user_features(usuarios)
+
+            # Matches contra los términos de los roles (producto disperso sobre todos los usuarios)
+            matches = get_term_index().match(
+                [perfil.user_id_id for perfil in perfiles], roles_habilidades, roles_conocimientos
+            )
+
+            # Buscador de términos de los roles en las actividades de experiencia
+            matcher = TermMatcher(roles_habilidades | roles_conocimientos)
+
+            for i, perfil in enumerate(perfiles):
+                cumple_experiencia = 1 if perfil.max_tiempo_experiencia >= roles_experiencia_min else 0
 
                 # Calcular relevancia de experiencia
-                experiencia_relevante = 0
-                for exp in experiencias:
-                    if hasattr(exp, 'actividades') and hasattr(exp, 'tiempo'):
-                        actividades_lower = exp.actividades.lower()
-                        if any(h in actividades_lower for h in roles_habilidades) or \
-                                any(c in actividades_lower for c in roles_conocimientos):
-                            experiencia_relevante += exp.tiempo
-
-                # Nuevas características mejoradas
-                diversidad_habilidades = len(
-                    set(getattr(h, 'categoria', 'general') for h in habilidades)) if habilidades else 0
-                tiempos_experiencia = [e.tiempo for e in experiencias if hasattr(e, 'tiempo')]
-                consistencia_experiencia = np.std(tiempos_experiencia) if len(tiempos_experiencia) > 1 else 0
-
-                niveles_habilidades = [getattr(h, 'nivel', 3) for h in habilidades if hasattr(h, 'nivel')]
-                promedio_nivel_habilidades = np.mean(niveles_habilidades) if niveles_habilidades else 0
+                experiencia_relevante = matcher.experiencia_relevante(perfil)
 
                 # Crear vector de características expandido
                 feature_vector = {
-                    'user_id': usuario.id,
-                    'num_habilidades': len(habilidades),
-                    'num_conocimientos': len(conocimientos),
-                    'num_experiencias': len(experiencias),
-                    'num_estudios': len(estudios),
-                    'match_habilidades': match_habilidades,
-                    'match_conocimientos': match_conocimientos,
-                    'promedio_nivel_conocimientos': promedio_nivel_conocimientos,
-                    'max_tiempo_experiencia': max_tiempo_experiencia,
+                    'user_id': perfil.user_id_id,
+                    'num_habilidades': perfil.num_habilidades,
+                    'num_conocimientos': perfil.num_conocimientos,
+                    'num_experiencias': perfil.num_experiencias,
+                    'num_estudios': perfil.num_estudios,
+                    'match_habilidades': matches['match_habilidades'][i],
+                    'match_conocimientos': matches['match_conocimientos'][i],
+                    'promedio_nivel_conocimientos': matches['promedio_nivel_conocimientos'][i],
+                    'max_tiempo_experiencia': perfil.max_tiempo_experiencia,
                     'cumple_experiencia': cumple_experiencia,
-                    'nivel_educativo': nivel_educativo,
+                    'nivel_educativo': perfil.nivel_educativo,
                     'experiencia_relevante': experiencia_relevante,
-                    'diversidad_habilidades': diversidad_habilidades,
-                    'consistencia_experiencia': consistencia_experiencia,
-                    'promedio_nivel_habilidades': promedio_nivel_habilidades
+                    'diversidad_habilidades': perfil.diversidad_habilidades,
+                    'consistencia_experiencia': perfil.consistencia_experiencia,
+                    'promedio_nivel_habilidades': perfil.promedio_nivel_habilidades
                 }
 
                 usuarios_features.append(feature_vector)
@@ -199,7 +149,11 @@ class RecommendationSystem:
 
             # Normalizar solo las características que necesitan escalado
             if scaling_features and len(df_usuarios) > 0:
-                X_scaled = self.scaler.fit_transform(df_usuarios[scaling_features])
+                if hasattr(self.scaler, 'mean_'):
+                    # Escalador ya ajustado (restaurado del registro de modelos)
+                    X_scaled = self.scaler.transform(df_usuarios[scaling_features])
+                else:
+                    X_scaled = self.scaler.fit_transform(df_usuarios[scaling_features])
                 X_scaled = pd.DataFrame(X_scaled, columns=scaling_features, index=df_usuarios.index)
 
                 # Combinar con características normalizadas
@@ -459,39 +413,36 @@ class RecommendationSystem:
 
             # Si los modelos no están entrenados, usar scoring directo
             if not self.models_trained:
-                recommendations = []
-                for i, user_id in enumerate(user_ids):
-                    features = X[i]
-                    match_score = (features[5] + features[6]) / 2
-                    experiencia_score = features[8]
-                    educacion_score = np.clip(features[9] / 5, 0, 1)
-                    experiencia_relevante_score = np.clip(features[10] / 10, 0, 1)
-
-                    combined_score = (
-                            match_score * 0.4 +
-                            experiencia_score * 0.2 +
-                            educacion_score * 0.1 +
-                            experiencia_relevante_score * 0.3
-                    )
+                match_score = (X[:, 5] + X[:, 6]) / 2
+                experiencia_score = X[:, 8]
+                educacion_score = np.clip(X[:, 9] / 5, 0, 1)
+                experiencia_relevante_score = np.clip(X[:, 10] / 10, 0, 1)
+
+                combined_scores = (
+                        match_score * 0.4 +
+                        experiencia_score * 0.2 +
+                        educacion_score * 0.1 +
+                        experiencia_relevante_score * 0.3
+                )
 
-                    if combined_score > 0.3:  # Solo incluir candidatos con score mínimo
-                        recommendations.append({
-                            'user_id': user_id,
-                            'score': float(combined_score),
-                            'rf_score': float(combined_score),
-                            'knn_score': float(combined_score),
-                            'nn_score': float(combined_score),
-                            'confidence': 'Alta' if combined_score > 0.7 else 'Media' if combined_score > 0.5 else 'Baja',
-                            'model_weights': {
-                                'rf': 0.0,
-                                'knn': 0.0,
-                                'nn': 1.0
-                            }
-                        })
-
-                # Ordenar por score y tomar los mejores
-                recommendations.sort(key=lambda x: x['score'], reverse=True)
-                return recommendations[:top_n]
+                # Mejores candidatos con score mínimo
+                recommendations = []
+                for idx in top_k(combined_scores, top_n):
+                    combined_score = float(combined_scores[idx])
+                    recommendations.append({
+                        'user_id': user_ids[idx],
+                        'score': combined_score,
+                        'rf_score': combined_score,
+                        'knn_score': combined_score,
+                        'nn_score': combined_score,
+                        'confidence': 'Alta' if combined_score > 0.7 else 'Media' if combined_score > 0.5 else 'Baja',
+                        'model_weights': {
+                            'rf': 0.0,
+                            'knn': 0.0,
+                            'nn': 1.0
+                        }
+                    })
+                return recommendations
 
             # Obtener probabilidades de cada modelo (mantener cálculos para debugging)
             try:
@@ -526,29 +477,23 @@ class RecommendationSystem:
             else:
                 normalized_scores = combined_scores
 
-            # Obtener índices de los mejores candidatos
-            top_indices = np.argsort(normalized_scores)[-top_n:][::-1]
-            print(top_indices)
-            # Obtener IDs de usuarios y sus scores
+            # Obtener IDs de usuarios y sus scores (solo candidatos con score combinado superior a 0.3)
             recommendations = []
-            for idx in top_indices:
+            for idx in top_k(normalized_scores, top_n):
                 combined_score = float(normalized_scores[idx])
-
-                # Solo incluir recomendaciones con score combinado superior a 0.3
-                if combined_score > 0.3:
-                    recommendations.append({
-                        'user_id': user_ids[idx],
-                        'score': combined_score,
-                        'rf_score': float(rf_scores[idx]),
-                        'knn_score': float(knn_scores[idx]),
-                        'nn_score': float(nn_scores[idx]),
-                        'confidence': 'Alta' if combined_score > 0.7 else 'Media' if combined_score > 0.5 else 'Baja',
-                        'model_weights': {
-                            'rf': 0.0,
-                            'knn': 0.0,
-                            'nn': 1.0
-                        }
-                    })
+                recommendations.append({
+                    'user_id': user_ids[idx],
+                    'score': combined_score,
+                    'rf_score': float(rf_scores[idx]),
+                    'knn_score': float(knn_scores[idx]),
+                    'nn_score': float(nn_scores[idx]),
+                    'confidence': 'Alta' if combined_score > 0.7 else 'Media' if combined_score > 0.5 else 'Baja',
+                    'model_weights': {
+                        'rf': 0.0,
+                        'knn': 0.0,
+                        'nn': 1.0
+                    }
+                })
 
             return recommendations
 
@@ -556,6 +501,33 @@ class RecommendationSystem:
             logger.error(f"Error obteniendo recomendaciones: {str(e)}")
             raise
 
+    def export_state(self, metrics=None):
+        """
+        Devuelve el estado entrenado (modelos, escalador y pesos) para
+        guardarlo en el registro de modelos
+        """
+        return {
+            'rf_model': self.rf_model,
+            'knn_model': self.knn_model,
+            'nn_model': self.nn_model,
+            'scaler': self.scaler,
+            'weights': (self.rf_weight, self.knn_weight, self.nn_weight),
+            'models_trained': self.models_trained,
+            'metrics': metrics
+        }
+
+    def load_state(self, state):
+        """
+        Restaura un estado entrenado guardado con export_state
+        """
+        self.rf_model = state['rf_model']
+        self.knn_model = state['knn_model']
+        self.nn_model = state['nn_model']
+        self.scaler = state['scaler']
+        self.rf_weight, self.knn_weight, self.nn_weight = state['weights']
+        self.models_trained = state['models_trained']
+        return state.get('metrics')
+
     def get_model_performance_summary(self):
         """
         Devuelve un resumen del rendimiento y pesos de los modelos
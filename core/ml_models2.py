@@ -1,89 +1,78 @@
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.neural_network import MLPRegressor
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
-import sqlite3
+import os
+import sys
 import warnings
 
+from django.conf import settings
+
+from .ranking import top_k
+from .tfidf_index import load_or_build_index
+
 warnings.filterwarnings('ignore')
 
 
+def base_compatibility(numeric):
+    """Score de compatibilidad del Random Forest antes de ajustar por proyecto."""
+    return (
+            np.minimum(numeric[:, 0] / 10, 1) * 0.4 +  # experiencia
+            np.minimum(numeric[:, 1] / 5, 1) * 0.3 +  # educación
+            np.minimum(numeric[:, 2] / 10, 1) * 0.3  # habilidades
+    )
+
+
+def numeric_score(numeric):
+    """Parte numérica del target de la red neuronal."""
+    return (
+            np.minimum(numeric[:, 0] / 15, 1) * 0.4 +  # experiencia
+            np.minimum(numeric[:, 1] / 5, 1) * 0.3 +  # educación
+            np.minimum(numeric[:, 2] / 8, 1) * 0.3  # habilidades
+    )
+
+
 class ProfessionalProjectMatcher:
-    def __init__(self, db_path):
+    def __init__(self, index_dir=None, chunk_size=2000, using='default'):
         """
         Inicializa el sistema de matching profesional-proyecto
 
         Args:
-            db_path (str): Ruta a la base de datos SQLite
+            index_dir (str): Carpeta de los índices TF-IDF; por defecto
+                'tfidf' dentro de MODEL_REGISTRY_DIR
+            chunk_size (int): Filas por bloque al leer la base de datos
+            using (str): Alias de la base de datos de Django
         """
-        self.db_path = db_path
+        self.index_dir = index_dir or os.path.join(settings.MODEL_REGISTRY_DIR, 'tfidf')
+        self.chunk_size = chunk_size
+        self.using = using
         self.professionals_data = None
         self.projects_data = None
-        self.tfidf_vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
+        self.tfidf_index = None
+        self.tfidf_index_reducido = None
         self.scaler = StandardScaler()
         self.label_encoders = {}
 
     def load_data(self):
-        """Carga los datos de la base de datos"""
-        conn = sqlite3.connect(self.db_path)
-
-        # Cargar datos de profesionales con sus habilidades, conocimientos, estudios y experiencia
-        professionals_query = """
-        SELECT 
-            u.id,
-            u.nombres,
-            u.apellidos,
-            u.email,
-            u.puesto_actual,
-            u.dependencia,
-            u.fecha_ingreso,
-            GROUP_CONCAT(DISTINCT uh.habilidad) as habilidades,
-            GROUP_CONCAT(DISTINCT uh.experiencia) as experiencia_habilidades,
-            GROUP_CONCAT(DISTINCT uc.conocimiento || ':' || uc.nivel) as conocimientos,
-            GROUP_CONCAT(DISTINCT ue.estudio || ':' || ue.nivel) as estudios,
-            GROUP_CONCAT(DISTINCT uex.rol || ':' || uex.tiempo) as experiencia_laboral,
-            GROUP_CONCAT(DISTINCT uex.actividades) as actividades
-        FROM usuario u
-        LEFT JOIN usuario_habilidades uh ON u.id = uh.user_id
-        LEFT JOIN usuario_conocimiento uc ON u.id = uc.user_id
-        LEFT JOIN usuario_estudios ue ON u.id = ue.user_id
-        LEFT JOIN usuario_experiencia uex ON u.id = uex.user_id
-        GROUP BY u.id
         """
-
-        # Cargar datos de proyectos con roles requeridos
-        projects_query = """
-        SELECT 
-            p.id,
-            p.nombre,
-            p.convocatoria,
-            p.tipo_proyecto,
-            p.tipo_convocatoria,
-            p.alcance,
-            p.objetivo,
-            p.presupuesto,
-            p.fecha,
-            GROUP_CONCAT(DISTINCT pr.rol) as roles_requeridos,
-            GROUP_CONCAT(DISTINCT pr.habilidades) as habilidades_requeridas,
-            GROUP_CONCAT(DISTINCT pr.experiencia) as experiencia_requerida,
-            GROUP_CONCAT(DISTINCT pr.conocimientos) as conocimientos_requeridos
-        FROM proyecto p
-        LEFT JOIN proyecto_roles pr ON p.id = pr.project_id
-        GROUP BY p.id
+        Carga los datos a través del ORM de Django, por bloques de
+        `chunk_size` filas, y arma los DataFrames de forma incremental.
         """
+        # Importación diferida: el módulo puede cargarse antes de django.setup()
+        from .matcher_data import (
+            iter_professionals, iter_projects, PROFESSIONAL_COLUMNS, PROFESSIONAL_FEATURES,
+            PROJECT_COLUMNS, PROJECT_FEATURES
+        )
 
-        self.professionals_data = pd.read_sql_query(professionals_query, conn)
-        self.projects_data = pd.read_sql_query(projects_query, conn)
-
-        conn.close()
+        professionals = list(iter_professionals(self.chunk_size, self.using))
+        projects = list(iter_projects(self.chunk_size, self.using))
 
-        # Limpiar datos nulos
-        self.professionals_data = self.professionals_data.fillna('')
-        self.projects_data = self.projects_data.fillna('')
+        self.professionals_data = (pd.concat(professionals, ignore_index=True) if professionals
+                                   else pd.DataFrame(columns=PROFESSIONAL_COLUMNS + PROFESSIONAL_FEATURES))
+        self.projects_data = (pd.concat(projects, ignore_index=True) if projects
+                              else pd.DataFrame(columns=PROJECT_COLUMNS + PROJECT_FEATURES))
 
         print(f"Cargados {len(self.professionals_data)} profesionales y {len(self.projects_data)} proyectos")
 
@@ -110,81 +99,42 @@ class ProfessionalProjectMatcher:
                 self.projects_data['conocimientos_requeridos']
         )
 
-        # Crear características numéricas para profesionales
-        self.professionals_data['años_experiencia'] = self._extract_experience_years()
-        self.professionals_data['nivel_educacion'] = self._extract_education_level()
-        self.professionals_data['diversidad_habilidades'] = self.professionals_data['habilidades'].apply(
-            lambda x: len(x.split(',')) if x else 0
-        )
-
-        # Crear características numéricas para proyectos
+        # Las características numéricas de profesionales y el número de roles
+        # ya vienen de load_data (agregados SQL)
         self.projects_data['complejidad_proyecto'] = self._calculate_project_complexity()
-        self.projects_data['num_roles_requeridos'] = self.projects_data['roles_requeridos'].apply(
-            lambda x: len(x.split(',')) if x else 0
-        )
-
-    def _extract_experience_years(self):
-        """Extrae años de experiencia de los datos"""
-        experience_years = []
-        for exp in self.professionals_data['experiencia_laboral']:
-            if exp:
-                years = 0
-                for item in exp.split(','):
-                    if ':' in item:
-                        try:
-                            years += int(item.split(':')[1])
-                        except:
-                            pass
-                experience_years.append(years)
-            else:
-                experience_years.append(0)
-        return experience_years
-
-    def _extract_education_level(self):
-        """Extrae nivel de educación"""
-        education_levels = []
-        for edu in self.professionals_data['estudios']:
-            if edu:
-                max_level = 0
-                for item in edu.split(','):
-                    if ':' in item:
-                        try:
-                            level = int(item.split(':')[1])
-                            max_level = max(max_level, level)
-                        except:
-                            pass
-                education_levels.append(max_level)
-            else:
-                education_levels.append(0)
-        return education_levels
 
     def _calculate_project_complexity(self):
         """Calcula complejidad del proyecto basada en presupuesto y texto"""
-        complexity = []
-        for idx, row in self.projects_data.iterrows():
-            score = 0
-            if row['presupuesto']:
-                score += min(row['presupuesto'] / 1000000, 10)  # Normalizar presupuesto
-            score += len(row['texto_completo'].split()) / 100  # Complejidad textual
-            complexity.append(score)
-        return complexity
+        presupuesto = pd.to_numeric(self.projects_data['presupuesto'], errors='coerce').fillna(0)
+        palabras = self.projects_data['texto_completo'].map(lambda texto: len(texto.split()))
+        # Presupuesto normalizado + complejidad textual
+        return np.minimum(presupuesto / 1000000, 10) + palabras / 100
+
+    def build_tfidf_index(self):
+        """
+        Ajusta (o carga del disco) los índices TF-IDF sobre el corpus de
+        profesionales: el completo para el algoritmo 1 y el reducido para la
+        red neuronal. Se reconstruyen solo si cambian los profesionales.
+        """
+        ids = self.professionals_data['id'].values
+        textos = self.professionals_data['texto_completo'].values
+        self.tfidf_index = load_or_build_index(self.index_dir, ids, textos, max_features=1000)
+        self.tfidf_index_reducido = load_or_build_index(self.index_dir, ids, textos, max_features=50)
+
+    def _ensure_tfidf_index(self):
+        if self.tfidf_index is None:
+            self.build_tfidf_index()
 
     def algorithm_1_tfidf_cosine(self, project_id):
         """
         Algoritmo 1: TF-IDF + Similitud Coseno
         Calcula similitud textual entre profesionales y proyecto
         """
+        self._ensure_tfidf_index()
         project_text = self.projects_data[self.projects_data['id'] == project_id]['texto_completo'].iloc[0]
-        all_texts = list(self.professionals_data['texto_completo']) + [project_text]
-
-        # Vectorizar textos
-        tfidf_matrix = self.tfidf_vectorizer.fit_transform(all_texts)
 
-        # Calcular similitud coseno
-        project_vector = tfidf_matrix[-1]
-        professional_vectors = tfidf_matrix[:-1]
-
-        similarities = cosine_similarity(professional_vectors, project_vector).flatten()
+        # Similitud coseno: producto disperso contra el índice (sin reajustar el vocabulario)
+        similarities = self.tfidf_index.similarity([project_text]).ravel()
 
         results = pd.DataFrame({
             'professional_id': self.professionals_data['id'],
@@ -192,7 +142,7 @@ class ProfessionalProjectMatcher:
             'algorithm': 'TF-IDF Coseno'
         })
 
-        return results.sort_values('similarity_score', ascending=False)
+        return results
 
     def algorithm_2_random_forest(self, project_id):
         """
@@ -210,21 +160,10 @@ class ProfessionalProjectMatcher:
         num_roles = project_row['num_roles_requeridos']
 
         # Crear targets sintéticos basados en compatibilidad esperada
-        # (En un caso real, esto vendría de datos históricos de éxito)
-        synthetic_targets = []
-        for idx, prof in prof_features.iterrows():
-            score = 0
-            # Mayor experiencia = mejor match
-            score += min(prof['años_experiencia'] / 10, 1) * 0.4
-            # Educación apropiada
-            score += min(prof['nivel_educacion'] / 5, 1) * 0.3
-            # Diversidad de habilidades
-            score += min(prof['diversidad_habilidades'] / 10, 1) * 0.3
-            # Ajustar por complejidad del proyecto
-            score *= min(project_complexity / 5, 1)
-            synthetic_targets.append(score)
-
-        prof_features['target'] = synthetic_targets
+        # (En un caso real, esto vendría de datos históricos de éxito),
+        # ajustados por la complejidad del proyecto
+        numeric = prof_features.values.astype(float)
+        prof_features['target'] = base_compatibility(numeric) * min(project_complexity / 5, 1)
 
         # Entrenar Random Forest
         X = prof_features[['años_experiencia', 'nivel_educacion', 'diversidad_habilidades']]
@@ -242,23 +181,19 @@ class ProfessionalProjectMatcher:
             'algorithm': 'Random Forest'
         })
 
-        return results.sort_values('compatibility_score', ascending=False)
+        return results
 
     def algorithm_3_neural_network(self, project_id):
         """
         Algoritmo 3: Red Neuronal (MLP)
         Combina características textuales y numéricas
         """
-        # Preparar características textuales (reducidas)
+        # Preparar características textuales (índice TF-IDF reducido)
+        self._ensure_tfidf_index()
         project_text = self.projects_data[self.projects_data['id'] == project_id]['texto_completo'].iloc[0]
-        all_texts = list(self.professionals_data['texto_completo']) + [project_text]
-
-        # TF-IDF con menos características para la red neuronal
-        tfidf_vectorizer_small = TfidfVectorizer(max_features=50, stop_words='english')
-        tfidf_matrix = tfidf_vectorizer_small.fit_transform(all_texts)
 
         # Características textuales de profesionales
-        text_features = tfidf_matrix[:-1].toarray()
+        text_features = self.tfidf_index_reducido.matrix.toarray()
 
         # Características numéricas
         numeric_features = self.professionals_data[[
@@ -272,24 +207,8 @@ class ProfessionalProjectMatcher:
         combined_features_scaled = self.scaler.fit_transform(combined_features)
 
         # Crear targets sintéticos más sofisticados
-        project_vector = tfidf_matrix[-1].toarray().flatten()
-        synthetic_targets = []
-
-        for i, prof_vector in enumerate(text_features):
-            # Similitud textual
-            text_similarity = cosine_similarity([prof_vector], [project_vector])[0][0]
-
-            # Características numéricas normalizadas
-            prof_numeric = numeric_features[i]
-            numeric_score = (
-                    min(prof_numeric[0] / 15, 1) * 0.4 +  # experiencia
-                    min(prof_numeric[1] / 5, 1) * 0.3 +  # educación
-                    min(prof_numeric[2] / 8, 1) * 0.3  # habilidades
-            )
-
-            # Combinar puntuaciones
-            final_score = text_similarity * 0.6 + numeric_score * 0.4
-            synthetic_targets.append(final_score)
+        text_similarities = self.tfidf_index_reducido.similarity([project_text]).ravel()
+        synthetic_targets = text_similarities * 0.6 + numeric_score(numeric_features.astype(float)) * 0.4
 
         # Entrenar MLP
         mlp = MLPRegressor(hidden_layer_sizes=(100, 50), max_iter=500, random_state=42)
@@ -304,7 +223,7 @@ class ProfessionalProjectMatcher:
             'algorithm': 'Red Neuronal'
         })
 
-        return results.sort_values('neural_score', ascending=False)
+        return results
 
     def generate_recommendations(self, project_id, top_n=10):
         """
@@ -355,8 +274,8 @@ class ProfessionalProjectMatcher:
                 combined_results['neural_score_norm'] * 0.30
         )
 
-        # Ordenar por puntuación final
-        combined_results = combined_results.sort_values('final_score', ascending=False)
+        # Mejores puntuaciones finales (sin ordenar todos los profesionales)
+        combined_results = combined_results.iloc[top_k(combined_results['final_score'].values, top_n, min_score=None)]
 
         # Agregar información de profesionales
         detailed_results = pd.merge(
@@ -367,7 +286,86 @@ class ProfessionalProjectMatcher:
             right_on='id'
         )
 
-        return detailed_results.head(top_n)
+        return detailed_results
+
+    def generate_all_recommendations(self, top_n=10, project_batch_size=512):
+        """
+        Modo por lotes: puntúa todos los proyectos contra todos los
+        profesionales en una sola pasada.
+
+        - TF-IDF: un producto disperso profesionales × proyectos por lote.
+        - Random Forest: su target es el score base del profesional escalado
+          por la complejidad del proyecto, y el árbol es invariante a ese
+          escalado, así que se entrena una vez y se escala por proyecto.
+        - Red neuronal: un MLP multi-salida por lote de proyectos en lugar de
+          uno por proyecto.
+
+        Args:
+            top_n: Profesionales a conservar por proyecto
+            project_batch_size: Proyectos por lote (acota la memoria de las
+                matrices profesionales × proyectos)
+
+        Returns:
+            pd.DataFrame: Una fila por (proyecto, ranking) con los scores
+        """
+        self._ensure_tfidf_index()
+
+        professional_ids = self.professionals_data['id'].values
+        project_ids = self.projects_data['id'].values
+        project_texts = self.projects_data['texto_completo'].values
+        complexity_factor = np.minimum(self.projects_data['complejidad_proyecto'].values.astype(float) / 5, 1)
+
+        prof_features = self.professionals_data[['años_experiencia', 'nivel_educacion', 'diversidad_habilidades']]
+        numeric = prof_features.values.astype(float)
+
+        # Random Forest sobre el score base (independiente del proyecto)
+        base_targets = base_compatibility(numeric)
+        rf = RandomForestRegressor(n_estimators=100, random_state=42)
+        rf.fit(prof_features, base_targets)
+        rf_base = rf.predict(prof_features)
+
+        # Entradas de la red neuronal (comunes a todos los proyectos)
+        text_features = self.tfidf_index_reducido.matrix.toarray()
+        combined_features_scaled = StandardScaler().fit_transform(np.hstack([text_features, numeric]))
+        numeric_part = numeric_score(numeric)
+
+        filas = []
+        for inicio in range(0, len(project_ids), project_batch_size):
+            textos = project_texts[inicio:inicio + project_batch_size]
+
+            similarity = self.tfidf_index.similarity(textos)
+            compatibility = rf_base[:, None] * complexity_factor[None, inicio:inicio + len(textos)]
+
+            targets = self.tfidf_index_reducido.similarity(textos) * 0.6 + numeric_part[:, None] * 0.4
+            mlp = MLPRegressor(hidden_layer_sizes=(100, 50), max_iter=500, random_state=42)
+            mlp.fit(combined_features_scaled, targets)
+            neural = mlp.predict(combined_features_scaled).reshape(len(professional_ids), len(textos))
+
+            # Misma normalización por proyecto que generate_recommendations
+            with np.errstate(divide='ignore', invalid='ignore'):
+                final = (
+                        similarity / similarity.max(axis=0) * 0.35 +
+                        compatibility / compatibility.max(axis=0) * 0.35 +
+                        neural / neural.max(axis=0) * 0.30
+                )
+
+            for j in range(len(textos)):
+                for ranking, idx in enumerate(top_k(final[:, j], top_n, min_score=None), 1):
+                    filas.append((
+                        project_ids[inicio + j], ranking, professional_ids[idx],
+                        similarity[idx, j], compatibility[idx, j], neural[idx, j], final[idx, j]
+                    ))
+            print(f"Proyectos puntuados: {min(inicio + project_batch_size, len(project_ids))}/{len(project_ids)}")
+
+        return pd.DataFrame(filas, columns=[
+            'project_id', 'ranking', 'professional_id',
+            'similarity_score', 'compatibility_score', 'neural_score', 'final_score'
+        ])
+
+    def save_all_recommendations(self, results, output_path):
+        """Escribe en bloque los resultados del modo por lotes en un CSV."""
+        results.to_csv(output_path, index=False)
+        print(f"Guardadas {len(results)} recomendaciones de {results['project_id'].nunique()} proyectos en {output_path}")
 
     def print_detailed_report(self, recommendations, project_id):
         """Imprime un reporte detallado de las recomendaciones"""
@@ -420,12 +418,14 @@ class ProfessionalProjectMatcher:
 # Función principal de demostración
 def main():
     """Función principal para demostrar el sistema"""
-    # Nota: Ajusta la ruta de tu base de datos
-    DB_PATH = "redudes.db"  # Cambia esto por la ruta real de tu base de datos
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'redudes.settings')
+    django.setup()
 
     try:
         # Inicializar el sistema
-        matcher = ProfessionalProjectMatcher(DB_PATH)
+        matcher = ProfessionalProjectMatcher()
 
         # Cargar y preprocesar datos
         print("Cargando datos de la base de datos...")
@@ -439,6 +439,12 @@ def main():
         for idx, row in matcher.projects_data.iterrows():
             print(f"ID: {row['id']} - {row['nombre']}")
 
+        # Modo por lotes: todos los proyectos contra todos los profesionales
+        if '--todos' in sys.argv:
+            results = matcher.generate_all_recommendations(top_n=10)
+            matcher.save_all_recommendations(results, 'recomendaciones_todos.csv')
+            return
+
         # Ejemplo: generar recomendaciones para el primer proyecto
         if len(matcher.projects_data) > 0:
             project_id = matcher.projects_data.iloc[0]['id']
@@ -450,10 +456,10 @@ def main():
     except Exception as e:
         print(f"Error: {str(e)}")
         print("Asegúrate de que:")
-        print("1. La base de datos existe en la ruta especificada")
+        print("1. La base de datos configurada en redudes.settings es accesible")
         print("2. Las tablas tienen datos")
         print("3. Tienes instaladas las librerías necesarias:")
-        print("   pip install pandas scikit-learn numpy sqlite3")
+        print("   pip install pandas scikit-learn numpy")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import joblib
+from django.conf import settings
+
+from .feature_store import feature_snapshot_version
+from .lazy_imports import lazy_import
+
+# TensorFlow solo se carga al leer un modelo de Keras
+keras = lazy_import('tensorflow.keras')
+
+logger = logging.getLogger(__name__)
+
+
+def _registry_dir():
+    directorio = Path(getattr(settings, 'MODEL_REGISTRY_DIR', Path(settings.BASE_DIR) / 'model_registry'))
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def roles_fingerprint(roles_proyecto):
+    """
+    Huella de los requisitos de los roles de un proyecto.
+    """
+    roles = sorted(
+        (rol.rol or '', rol.habilidades or '', rol.experiencia or '', rol.conocimientos or '')
+        for rol in roles_proyecto
+    )
+    contenido = '\x1e'.join('\x1f'.join(campos) for campos in roles)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+
+def model_key(tipo, proyecto_id, roles_proyecto, usuarios):
+    """
+    Clave del modelo entrenado para un proyecto.
+
+    Combina el proyecto, la huella de los roles y la versión del snapshot de
+    características de los usuarios, de modo que cualquier cambio en los
+    requisitos o en los perfiles invalida el modelo guardado.
+
+    Args:
+        tipo: Tipo de sistema ('basico', 'avanzado', ...)
+        proyecto_id: ID del proyecto
+        roles_proyecto: Roles del proyecto
+        usuarios: QuerySet de usuarios candidatos
+
+    Returns:
+        str: Clave del modelo
+    """
+    huella = hashlib.sha1(
+        f"{roles_fingerprint(roles_proyecto)}|{feature_snapshot_version(usuarios)}".encode('utf-8')
+    ).hexdigest()[:16]
+    return f"{tipo}_{proyecto_id}_{huella}"
+
+
+def load_model(key):
+    """
+    Carga el estado de un modelo entrenado.
+
+    Returns:
+        dict o None si no existe o no se puede leer
+    """
+    ruta = _registry_dir() / f"{key}.joblib"
+    if not ruta.exists():
+        return None
+    try:
+        estado = joblib.load(ruta)
+        logger.info(f"Modelo reutilizado desde el registro: {key}")
+        return estado
+    except Exception as e:
+        logger.warning(f"Error cargando modelo {key}: {e}")
+        return None
+
+
+def _guardar(key, extension, escribir):
+    """
+    Escribe un archivo del registro de forma atómica y elimina las versiones
+    anteriores con el mismo prefijo (tipo y proyecto o esquema).
+    """
+    directorio = _registry_dir()
+    prefijo = key.rsplit('_', 1)[0]
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix=f'.tmp.{extension}')
+    os.close(fd)
+    try:
+        escribir(temporal)
+        os.replace(temporal, directorio / f"{key}.{extension}")
+    except Exception as e:
+        logger.warning(f"Error guardando modelo {key}: {e}")
+        Path(temporal).unlink(missing_ok=True)
+        return
+
+    for anterior in directorio.glob(f"{prefijo}_*.{extension}"):
+        if anterior.stem != key:
+            anterior.unlink(missing_ok=True)
+    logger.info(f"Modelo guardado en el registro: {key}")
+
+
+def save_model(key, estado):
+    """
+    Guarda el estado de un modelo entrenado y elimina las versiones
+    anteriores del mismo tipo y proyecto.
+    """
+    _guardar(key, 'joblib', lambda ruta: joblib.dump(estado, ruta))
+
+
+def latest_key(tipo, extension='joblib'):
+    """
+    Clave del archivo más reciente de un tipo de modelo, o None si no hay.
+    """
+    archivos = list(_registry_dir().glob(f"{tipo}_*.{extension}"))
+    if not archivos:
+        return None
+    return max(archivos, key=lambda ruta: ruta.stat().st_mtime).stem
+
+
+def load_keras_model(key):
+    """
+    Carga un modelo de Keras del registro.
+
+    Returns:
+        keras.Model o None si no existe o no se puede leer
+    """
+    ruta = _registry_dir() / f"{key}.keras"
+    if not ruta.exists():
+        return None
+    try:
+        modelo = keras.models.load_model(ruta)
+        logger.info(f"Modelo reutilizado desde el registro: {key}")
+        return modelo
+    except Exception as e:
+        logger.warning(f"Error cargando modelo {key}: {e}")
+        return None
+
+
+def save_keras_model(key, modelo):
+    """
+    Guarda un modelo de Keras y elimina las versiones anteriores.
+    """
+    _guardar(key, 'keras', modelo.save)
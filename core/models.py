@@ -1,8 +1,22 @@
+import unicodedata
+
 from django.db import models
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 from django.contrib.auth.models import AbstractUser
 
 # Create your models here.
 
+def lower_exact(campo, valor):
+    """
+    Condición de igualdad sin distinguir mayúsculas que puede usar los
+    índices sobre Lower(campo): __iexact se traduce a LIKE en SQLite y a
+    UPPER() en PostgreSQL, y ninguno de los dos usa esos índices.
+    """
+    return Exact(Lower(campo), Lower(Value(valor)))
+
+
 class Proyecto(models.Model):
     id = models.BigAutoField(primary_key=True)
     nombre = models.CharField(max_length=255)
@@ -40,6 +54,11 @@ class ProyectoRoles(models.Model):
     experiencia = models.CharField(max_length=255)
     conocimientos = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            models.Index(F('project_id'), Lower('rol'), name='proyectoroles_rol_idx'),
+        ]
+
 class ProyectoAliados(models.Model):
     id = models.BigAutoField(primary_key=True)
     project_id = models.ForeignKey(Proyecto, on_delete=models.CASCADE)
@@ -47,6 +66,11 @@ class ProyectoAliados(models.Model):
     tipo_aliado = models.CharField(max_length=255)
     responsabilidades = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(F('project_id'), Lower('entidad'), name='proyectoaliados_entidad_idx'),
+        ]
+
 class ProyectoProductos(models.Model):
     id = models.BigAutoField(primary_key=True)
     project_id = models.ForeignKey(Proyecto, on_delete=models.CASCADE)
@@ -54,18 +78,95 @@ class ProyectoProductos(models.Model):
     tipo = models.CharField(max_length=255)
     cantidad = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(F('project_id'), Lower('producto'), name='proyectoproductos_prod_idx'),
+        ]
+
+class Termino(models.Model):
+    """
+    Catálogo de habilidades y conocimientos. La clave es el nombre sin
+    tildes, sin distinguir mayúsculas y con los espacios normalizados, así
+    que 'Diseño Web' y ' diseno  web' son el mismo término. Habilidades y
+    conocimientos comparten el catálogo.
+    """
+    id = models.BigAutoField(primary_key=True)
+    nombre = models.CharField(max_length=255)  # Primera forma registrada
+    clave = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.nombre
+
+    @staticmethod
+    def normalizar(texto):
+        descompuesto = unicodedata.normalize('NFKD', texto)
+        sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+        return ' '.join(sin_tildes.casefold().split())
+
+    @classmethod
+    def obtener(cls, nombre):
+        """Término del catálogo para un nombre, creándolo si no existe."""
+        termino, _ = cls.objects.get_or_create(
+            clave=cls.normalizar(nombre),
+            defaults={'nombre': nombre.strip()}
+        )
+        return termino
+
+    @classmethod
+    def asignar(cls, filas, campo):
+        """
+        Asigna el término a varias filas a la vez con dos consultas (para
+        bulk_create, que no llama a save()).
+
+        Args:
+            filas: Instancias de UsuarioHabilidades o UsuarioConocimiento
+            campo: Campo con el nombre del término ('habilidad', 'conocimiento')
+        """
+        nombres = {}
+        for fila in filas:
+            nombres.setdefault(cls.normalizar(getattr(fila, campo)), getattr(fila, campo).strip())
+        cls.objects.bulk_create(
+            [cls(clave=clave, nombre=nombre) for clave, nombre in nombres.items()],
+            ignore_conflicts=True
+        )
+        ids = dict(cls.objects.filter(clave__in=list(nombres)).values_list('clave', 'id'))
+        for fila in filas:
+            fila.termino_id = ids[cls.normalizar(getattr(fila, campo))]
+
 class UsuarioHabilidades(models.Model):
     id = models.BigAutoField(primary_key=True)
     user_id = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='habilidades')
     habilidad = models.CharField(max_length=255)
+    termino = models.ForeignKey(Termino, on_delete=models.PROTECT, null=True, blank=True, related_name='habilidades')
     experiencia = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'termino'], name='usuariohab_termino_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.termino_id is None or self.termino.clave != Termino.normalizar(self.habilidad):
+            self.termino = Termino.obtener(self.habilidad)
+        super().save(*args, **kwargs)
+
 class UsuarioConocimiento(models.Model):
     id = models.BigAutoField(primary_key=True)
     user_id = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='conocimientos')
     conocimiento = models.CharField(max_length=255)
+    termino = models.ForeignKey(Termino, on_delete=models.PROTECT, null=True, blank=True, related_name='conocimientos')
     nivel = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'termino'], name='usuarioconoc_termino_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.termino_id is None or self.termino.clave != Termino.normalizar(self.conocimiento):
+            self.termino = Termino.obtener(self.conocimiento)
+        super().save(*args, **kwargs)
+
 class UsuarioEstudios(models.Model):
     id = models.BigAutoField(primary_key=True)
     user_id = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='estudios')
@@ -73,6 +174,11 @@ class UsuarioEstudios(models.Model):
     nivel = models.IntegerField()
     year = models.BigIntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(F('user_id'), Lower('estudio'), name='usuarioestudios_estudio_idx'),
+        ]
+
 class UsuarioExperiencia(models.Model):
     id = models.BigAutoField(primary_key=True)
     user_id = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='experiencias')
@@ -80,6 +186,29 @@ class UsuarioExperiencia(models.Model):
     tiempo = models.IntegerField()
     actividades = models.TextField()
 
+    class Meta:
+        indexes = [
+            models.Index(F('user_id'), Lower('rol'), name='usuarioexp_rol_idx'),
+        ]
+
+class PerfilImportado(models.Model):
+    """
+    Huella del último perfil importado de cada fuente (CVLAC o LinkedIn)
+    de un usuario, para no volver a guardar un perfil que no cambió, y de
+    la página de la que se extrajo, para no volver a interpretarla.
+    """
+    id = models.BigAutoField(primary_key=True)
+    user_id = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='perfiles_importados')
+    fuente = models.CharField(max_length=20)
+    huella = models.CharField(max_length=64)  # sha256 del perfil normalizado
+    huella_pagina = models.CharField(max_length=64, blank=True, default='')  # sha256 de la página (vía HTTP)
+    fecha = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'fuente'], name='perfilimportado_fuente_uniq'),
+        ]
+
 class CustomUser(AbstractUser):
     is_admin = models.BooleanField(default=False)
     is_evaluator = models.BooleanField(default=False)
@@ -88,7 +217,7 @@ class CustomUser(AbstractUser):
 class RecomendacionProyecto(models.Model):
     id = models.BigAutoField(primary_key=True)
     project_id = models.ForeignKey(Proyecto, on_delete=models.CASCADE)
-    fecha_recomendacion = models.DateTimeField(auto_now_add=True)
+    fecha_recomendacion = models.DateTimeField(auto_now_add=True, db_index=True)
     rf_accuracy = models.FloatField()
     rf_precision = models.FloatField()
     rf_recall = models.FloatField()
@@ -122,17 +251,107 @@ class RecomendacionUsuario(models.Model):
 
     class Meta:
         ordering = ['-score_combinado']
+        indexes = [
+            # Ranking de una recomendación, en el orden por defecto
+            models.Index(fields=['recomendacion_id', '-score_combinado'], name='recusuario_rec_score_idx'),
+            # Top global por score y rangos de score en los informes
+            models.Index(fields=['-score_combinado'], name='recusuario_score_idx'),
+        ]
 
     def __str__(self):
         return f"Recomendación: {self.user_id.nombres} {self.user_id.apellidos} - Score: {self.score_combinado}"
 
+    # Umbrales de score_combinado para cada nivel de confianza
+    UMBRAL_CONFIANZA_ALTA = 0.7
+    UMBRAL_CONFIANZA_MEDIA = 0.5
+
     def get_nivel_confianza(self):
-        if self.score_combinado > 0.7:
+        if self.score_combinado > self.UMBRAL_CONFIANZA_ALTA:
             return 'Alta'
-        elif self.score_combinado > 0.5:
+        elif self.score_combinado > self.UMBRAL_CONFIANZA_MEDIA:
             return 'Media'
         return 'Baja'
 
+    @classmethod
+    def nivel_confianza_sql(cls, campo='score_combinado'):
+        """
+        Nivel de confianza calculado en la base de datos, con los mismos
+        umbrales que get_nivel_confianza (para bulk_create, que no llama a
+        save()).
+        """
+        return Case(
+            When(**{f'{campo}__gt': cls.UMBRAL_CONFIANZA_ALTA}, then=Value('Alta')),
+            When(**{f'{campo}__gt': cls.UMBRAL_CONFIANZA_MEDIA}, then=Value('Media')),
+            default=Value('Baja'),
+        )
+
     def save(self, *args, **kwargs):
         self.nivel_confianza = self.get_nivel_confianza()
         super().save(*args, **kwargs)
+
+class UsuarioCaracteristicas(models.Model):
+    """
+    Características del perfil que no dependen del proyecto, materializadas
+    por usuario. Se invalidan mediante señales cuando cambian sus datos.
+    """
+    id = models.BigAutoField(primary_key=True)
+    user_id = models.OneToOneField(Usuario, on_delete=models.CASCADE, related_name='caracteristicas')
+    num_habilidades = models.IntegerField(default=0)
+    num_conocimientos = models.IntegerField(default=0)
+    num_experiencias = models.IntegerField(default=0)
+    num_estudios = models.IntegerField(default=0)
+    max_tiempo_experiencia = models.IntegerField(default=0)
+    nivel_educativo = models.IntegerField(default=0)
+    diversidad_habilidades = models.IntegerField(default=0)
+    consistencia_experiencia = models.FloatField(default=0.0)
+    promedio_nivel_habilidades = models.FloatField(default=0.0)
+    max_nivel_habilidades = models.FloatField(default=0.0)
+    coherencia_habilidades_conocimientos = models.FloatField(default=0.0)
+    progresion_experiencia = models.FloatField(default=0.0)
+    especializacion = models.FloatField(default=0.0)
+    complejidad_perfil = models.FloatField(default=0.0)
+    # Términos normalizados para calcular los matches contra los roles
+    habilidades = models.JSONField(default=list)  # [habilidad]
+    conocimientos = models.JSONField(default=list)  # [[conocimiento, nivel]]
+    experiencias = models.JSONField(default=list)  # [[id, tiempo, actividades]]
+    actualizado = models.DateTimeField(auto_now=True)
+    # Número de SecuenciaCaracteristicas asignado en cada escritura (ver feature_store)
+    version = models.BigIntegerField(default=0, db_index=True)
+
+    def __str__(self):
+        return f"Características de {self.user_id_id}"
+
+class SecuenciaCaracteristicas(models.Model):
+    """
+    Contador (una sola fila) de las escrituras de UsuarioCaracteristicas.
+    Cada escritura lo incrementa en su misma transacción, lo que bloquea la
+    fila hasta confirmarla: las versiones se confirman en orden y basta con
+    pedir las mayores que la última vista para no perder ningún cambio.
+    """
+    id = models.BigAutoField(primary_key=True)
+    valor = models.BigIntegerField(default=0)
+
+class EstadisticasPlataforma(models.Model):
+    """
+    Resumen precalculado del informe de uso de la plataforma (una sola
+    fila). Se recalcula en segundo plano cuando cambian proyectos, usuarios
+    o recomendaciones, y periódicamente; el informe solo lo lee.
+    """
+    id = models.BigAutoField(primary_key=True)
+    total_proyectos = models.IntegerField(default=0)
+    total_usuarios = models.IntegerField(default=0)
+    total_recomendaciones = models.IntegerField(default=0)
+    total_usuarios_recomendados = models.IntegerField(default=0)
+    promedio_score = models.FloatField(default=0.0)
+    proyectos_por_tipo = models.JSONField(default=list)  # [{tipo_proyecto, cantidad}]
+    proyectos_por_convocatoria = models.JSONField(default=list)  # [{convocatoria, cantidad}]
+    usuarios_mas_habilidades = models.JSONField(default=list)  # [{id, nombres, apellidos, num_habilidades}]
+    usuarios_mas_conocimientos = models.JSONField(default=list)  # [{id, nombres, apellidos, num_conocimientos}]
+    proyectos_mas_activos = models.JSONField(default=list)  # [{id, nombre, num_roles}]
+    usuarios_mas_recomendados = models.JSONField(default=list)  # [{id, nombres, apellidos, veces_recomendado}]
+    # Hay cambios posteriores al último cálculo y su recálculo ya está programado
+    desactualizado = models.BooleanField(default=False)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Estadísticas de la plataforma ({self.actualizado})"
@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import quote_etag
+
+from .models import RecomendacionProyecto, RecomendacionUsuario
+from .platform_stats import get_platform_stats, recommendations_by_month
+
+logger = logging.getLogger(__name__)
+
+# Cambiar al modificar el diseño de los PDF para invalidar los ya generados
+PDF_CACHE_VERSION = 1
+
+PREFIJO_RECOMENDACION = 'recomendacion'
+PREFIJO_PLATAFORMA = 'plataforma'
+
+
+def _cache_dir():
+    return Path(settings.PDF_CACHE_DIR)
+
+
+def _huella(valores):
+    """Resumen corto del contenido que se dibuja en un PDF."""
+    contenido = '\x1e'.join('\x1f'.join(str(valor) for valor in fila) for fila in valores)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()[:16]
+
+
+def recommendation_pdf_key(recomendacion_id):
+    """
+    Clave (y ETag) del PDF de una recomendación. Los scores no cambian una
+    vez creada, pero el documento también muestra el proyecto y el nombre y
+    correo de los usuarios, así que la clave incluye una huella de esos datos.
+
+    Returns:
+        str o None si la recomendación no existe
+    """
+    recomendacion = RecomendacionProyecto.objects.filter(id=recomendacion_id).values_list(
+        'fecha_recomendacion', 'project_id__nombre', 'project_id__convocatoria', 'project_id__tipo_proyecto'
+    ).first()
+    if recomendacion is None:
+        return None
+    usuarios = RecomendacionUsuario.objects.filter(recomendacion_id=recomendacion_id).order_by('ranking').values_list(
+        'user_id__nombres', 'user_id__apellidos', 'user_id__email'
+    )
+    fecha = recomendacion[0]
+    huella = _huella([recomendacion[1:], *usuarios])
+    return f"{PREFIJO_RECOMENDACION}-{recomendacion_id}-{fecha:%Y%m%d%H%M%S%f}-{huella}-v{PDF_CACHE_VERSION}"
+
+
+def platform_report_pdf_key():
+    """
+    Clave (y ETag) del informe de plataforma: cambia con cada recálculo de
+    las estadísticas y con la serie mensual, que se consulta en vivo (nuevas
+    recomendaciones, borradas o que salen de la ventana).
+    """
+    estadisticas = get_platform_stats()
+    serie = recommendations_by_month().values_list('mes', 'cantidad')
+    return (f"{PREFIJO_PLATAFORMA}-{estadisticas.actualizado:%Y%m%d%H%M%S%f}-"
+            f"{_huella(serie)}-v{PDF_CACHE_VERSION}")
+
+
+def request_pdf_key(request, calcular, *args):
+    """
+    Clave de un PDF calculada una sola vez por petición: la usan el ETag del
+    decorador condition y la vista que sirve el archivo.
+    """
+    if not hasattr(request, 'clave_pdf'):
+        request.clave_pdf = calcular(*args)
+    return request.clave_pdf
+
+
+def _prefijo(clave):
+    """Parte de la clave que identifica el documento, sin su versión."""
+    if clave.startswith(PREFIJO_RECOMENDACION):
+        return f"{PREFIJO_RECOMENDACION}-{clave.split('-')[1]}-"
+    return f"{PREFIJO_PLATAFORMA}-"
+
+
+def _render_to_cache(ruta, render):
+    """
+    Genera el PDF directamente en un archivo temporal y lo publica de forma
+    atómica. Retorna el archivo ya abierto, que sigue siendo legible aunque
+    otra petición lo elimine después.
+    """
+    fd, temporal = tempfile.mkstemp(dir=ruta.parent, suffix='.tmp.pdf')
+    os.close(fd)
+    try:
+        render(temporal)
+        archivo = open(temporal, 'rb')
+        try:
+            os.replace(temporal, ruta)
+        except OSError:
+            archivo.close()
+            raise
+        return archivo
+    finally:
+        Path(temporal).unlink(missing_ok=True)
+
+
+def _descartar_anteriores(ruta, archivo):
+    """
+    Elimina las versiones del mismo documento generadas antes que `archivo`.
+    Las más recientes (de otra petición con datos más nuevos) se conservan.
+    """
+    generado = os.fstat(archivo.fileno()).st_mtime_ns
+    for anterior in ruta.parent.glob(f"{_prefijo(ruta.stem)}*.pdf"):
+        if anterior == ruta:
+            continue
+        try:
+            if anterior.stat().st_mtime_ns < generado:
+                anterior.unlink()
+        except OSError:
+            # Ya eliminado por otra petición
+            continue
+
+
+def cached_pdf_response(clave, filename, render):
+    """
+    Sirve un PDF desde la caché en disco, generándolo solo si no existe.
+
+    El archivo se envía en bloques (FileResponse) con la clave como ETag, de
+    modo que las descargas repetidas se resuelven con 304 (ver el decorador
+    condition de las vistas) y las demás no vuelven a generar el documento.
+
+    Args:
+        clave: Clave del contenido (recommendation_pdf_key, ...)
+        filename: Nombre del archivo descargado
+        render: Función que escribe el PDF en la ruta recibida
+
+    Returns:
+        FileResponse
+    """
+    directorio = _cache_dir()
+    directorio.mkdir(parents=True, exist_ok=True)
+    ruta = directorio / f"{clave}.pdf"
+
+    # Se abre antes de podar: otra petición puede eliminar esta versión en
+    # cualquier momento, pero el archivo abierto sigue siendo legible
+    try:
+        archivo = open(ruta, 'rb')
+    except FileNotFoundError:
+        archivo = _render_to_cache(ruta, render)
+        logger.info(f"PDF {clave} generado")
+        _descartar_anteriores(ruta, archivo)
+
+    response = FileResponse(archivo, as_attachment=True, filename=filename, content_type='application/pdf')
+    response['ETag'] = quote_etag(clave)
+    # El navegador puede guardarlo, pero debe revalidarlo con el ETag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def discard_recommendation_pdf(recomendacion_id):
+    """Elimina de la caché los PDF de una recomendación borrada."""
+    for ruta in _cache_dir().glob(f"{PREFIJO_RECOMENDACION}-{recomendacion_id}-*.pdf"):
+        ruta.unlink(missing_ok=True)
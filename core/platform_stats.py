@@ -0,0 +1,155 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import EstadisticasPlataforma, Proyecto, RecomendacionProyecto, RecomendacionUsuario, Usuario
+
+logger = logging.getLogger(__name__)
+
+# Fila única del resumen
+ESTADISTICAS_ID = 1
+
+# Elementos de cada ranking del informe
+TOP_N = 10
+
+# Ventana de la serie mensual de recomendaciones (últimos 6 meses)
+DIAS_SERIE_MENSUAL = 180
+
+
+def _top_usuarios(anotacion, campo, filtro_minimo=False):
+    usuarios = Usuario.objects.annotate(**{campo: anotacion})
+    if filtro_minimo:
+        usuarios = usuarios.filter(**{f'{campo}__gt': 0})
+    return list(usuarios.order_by(f'-{campo}', 'id').values('id', 'nombres', 'apellidos', campo)[:TOP_N])
+
+
+def compute_platform_stats():
+    """
+    Ejecuta las consultas agregadas del informe de plataforma.
+
+    Returns:
+        dict: Valores para los campos de EstadisticasPlataforma
+    """
+    resumen_usuarios_recomendados = RecomendacionUsuario.objects.aggregate(
+        total=Count('id'),
+        promedio=Avg('score_combinado')
+    )
+
+    return {
+        'total_proyectos': Proyecto.objects.count(),
+        'total_usuarios': Usuario.objects.count(),
+        'total_recomendaciones': RecomendacionProyecto.objects.count(),
+        'total_usuarios_recomendados': resumen_usuarios_recomendados['total'],
+        'promedio_score': resumen_usuarios_recomendados['promedio'] or 0.0,
+        'proyectos_por_tipo': list(
+            Proyecto.objects.values('tipo_proyecto').annotate(cantidad=Count('id')).order_by('-cantidad', 'tipo_proyecto')
+        ),
+        'proyectos_por_convocatoria': list(
+            Proyecto.objects.values('convocatoria').annotate(cantidad=Count('id')).order_by('-cantidad', 'convocatoria')[:TOP_N]
+        ),
+        'usuarios_mas_habilidades': _top_usuarios(Count('habilidades'), 'num_habilidades'),
+        'usuarios_mas_conocimientos': _top_usuarios(Count('conocimientos'), 'num_conocimientos'),
+        'proyectos_mas_activos': list(
+            Proyecto.objects.annotate(num_roles=Count('proyectoroles'))
+            .order_by('-num_roles', 'id').values('id', 'nombre', 'num_roles')[:TOP_N]
+        ),
+        'usuarios_mas_recomendados': _top_usuarios(
+            Count('recomendacionusuario'), 'veces_recomendado', filtro_minimo=True
+        ),
+    }
+
+
+def recommendations_by_month(dias=DIAS_SERIE_MENSUAL):
+    """
+    Recomendaciones generadas por mes en los últimos `dias` días.
+
+    El filtro es un rango sobre fecha_recomendacion (indexada), así que solo
+    se leen las filas de la ventana; TruncMonth agrupa por mes en cualquier
+    backend, en la zona horaria actual.
+
+    Returns:
+        QuerySet: Dicts {mes, cantidad} ordenados por mes
+    """
+    desde = timezone.now() - timedelta(days=dias)
+    return (
+        RecomendacionProyecto.objects.filter(fecha_recomendacion__gte=desde)
+        .annotate(mes=TruncMonth('fecha_recomendacion'))
+        .values('mes')
+        .annotate(cantidad=Count('id'))
+        .order_by('mes')
+    )
+
+
+def refresh_platform_stats():
+    """
+    Recalcula y guarda el resumen del informe de plataforma.
+
+    Returns:
+        EstadisticasPlataforma
+    """
+    # Se limpia la marca antes de calcular: un cambio durante el cálculo
+    # vuelve a marcarla y programa otro recálculo
+    EstadisticasPlataforma.objects.filter(id=ESTADISTICAS_ID).update(desactualizado=False)
+    estadisticas, _ = EstadisticasPlataforma.objects.update_or_create(
+        id=ESTADISTICAS_ID,
+        defaults=compute_platform_stats()
+    )
+    return estadisticas
+
+
+def get_platform_stats():
+    """
+    Obtiene el resumen del informe de plataforma. Solo se calcula en la
+    petición si todavía no existe o, sin broker de Celery, si hay cambios
+    pendientes (ver schedule_stats_refresh).
+
+    Returns:
+        EstadisticasPlataforma
+    """
+    estadisticas = EstadisticasPlataforma.objects.filter(id=ESTADISTICAS_ID).first()
+    if estadisticas is None or (estadisticas.desactualizado and _sin_broker()):
+        estadisticas = refresh_platform_stats()
+    return estadisticas
+
+
+def _sin_broker():
+    """Las tareas se ejecutan en el mismo proceso (CELERY_TASK_ALWAYS_EAGER)."""
+    return getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False)
+
+
+def schedule_stats_refresh():
+    """
+    Programa el recálculo del resumen al confirmar la transacción actual.
+    Los cambios de una misma transacción, y los que llegan mientras ya hay
+    un recálculo pendiente, generan una sola tarea.
+
+    Sin broker la tarea se ejecutaría dentro de la petición que guardó el
+    cambio, así que solo se marca el resumen y se recalcula al leerlo.
+    """
+    connection = transaction.get_connection()
+    for _, pendiente, *_ in connection.run_on_commit:
+        if getattr(pendiente, 'estadisticas_plataforma', False):
+            return
+
+    def _refresh():
+        marcadas = EstadisticasPlataforma.objects.filter(
+            id=ESTADISTICAS_ID, desactualizado=False
+        ).update(desactualizado=True)
+        if not marcadas or _sin_broker():
+            # Sin resumen todavía, con un recálculo ya programado o sin broker
+            return
+        try:
+            from .tasks import refrescar_estadisticas_task
+            refrescar_estadisticas_task.delay()
+        except Exception as e:
+            # Sin la marca, el siguiente cambio vuelve a intentar programarlo
+            logger.warning(f"Error programando el recálculo de estadísticas: {e}")
+            EstadisticasPlataforma.objects.filter(id=ESTADISTICAS_ID).update(desactualizado=False)
+
+    _refresh.estadisticas_plataforma = True
+    transaction.on_commit(_refresh)
@@ -0,0 +1,41 @@
+import numpy as np
+
+# Score mínimo (normalizado) para incluir un candidato en las recomendaciones
+MIN_SCORE = 0.3
+
+
+def top_k(scores, k, min_score=MIN_SCORE):
+    """
+    Índices de los k mejores scores, de mayor a menor, sin ordenar el vector
+    completo.
+
+    Primero se descartan los scores que no superan `min_score` (y los NaN);
+    luego se seleccionan los k mejores con np.argpartition (O(n)) y solo esos
+    se ordenan. Los empates se resuelven de forma estable: a igual score va
+    primero el índice menor.
+
+    Args:
+        scores: Vector de scores
+        k: Número máximo de índices a devolver
+        min_score: Umbral estricto; None para no filtrar
+
+    Returns:
+        np.ndarray: Índices seleccionados
+    """
+    scores = np.asarray(scores, dtype=float).ravel()
+    if min_score is None:
+        candidatos = np.flatnonzero(~np.isnan(scores))
+    else:
+        candidatos = np.flatnonzero(scores > min_score)
+    if k <= 0 or len(candidatos) == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    valores = scores[candidatos]
+    if k < len(candidatos):
+        # Valor del k-ésimo mejor; se conservan todos sus empates para desempatar por índice
+        corte = valores[np.argpartition(-valores, k - 1)[:k]].min()
+        seleccion = valores >= corte
+        candidatos, valores = candidatos[seleccion], valores[seleccion]
+
+    orden = np.lexsort((candidatos, -valores))[:k]
+    return candidatos[orden]
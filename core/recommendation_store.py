@@ -0,0 +1,107 @@
+import logging
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import RecomendacionProyecto, RecomendacionUsuario
+
+logger = logging.getLogger(__name__)
+
+# Filas de RecomendacionUsuario por sentencia INSERT
+BULK_BATCH_SIZE = 500
+
+# Métricas por defecto para los sistemas que no reportan algún modelo
+METRICAS_VACIAS = {
+    f'{modelo}_{metrica}': 0
+    for modelo in ('rf', 'knn', 'nn')
+    for metrica in ('accuracy', 'precision', 'recall', 'f1')
+}
+
+# Cortes del histograma de scores: [0, 0.1), [0.1, 0.2), ..., [0.9, 1]
+LIMITES_RANGOS_SCORE = [i / 10 for i in range(11)]
+
+
+def score_histogram(queryset, campo='score_combinado', umbrales_inclusivos=False):
+    """
+    Cuenta los usuarios recomendados de cada nivel de confianza y de cada
+    rango de score en una sola consulta (agregación condicional), sin
+    recorrer las filas en Python.
+
+    Args:
+        queryset: QuerySet de RecomendacionUsuario
+        campo: Score a clasificar
+        umbrales_inclusivos: Si un score igual al umbral pertenece al nivel
+            superior (>= 0.7 es alta). Por defecto se usan los cortes de
+            get_nivel_confianza (> 0.7 es alta)
+
+    Returns:
+        dict: alta_confianza, media_confianza, baja_confianza y rangos
+            (lista de {desde, hasta, cantidad}); los scores nulos no cuentan
+    """
+    mayor, menor = ('gte', 'lt') if umbrales_inclusivos else ('gt', 'lte')
+    alta = RecomendacionUsuario.UMBRAL_CONFIANZA_ALTA
+    media = RecomendacionUsuario.UMBRAL_CONFIANZA_MEDIA
+
+    agregados = {
+        'alta_confianza': Count('id', filter=Q(**{f'{campo}__{mayor}': alta})),
+        'media_confianza': Count('id', filter=Q(**{f'{campo}__{mayor}': media, f'{campo}__{menor}': alta})),
+        'baja_confianza': Count('id', filter=Q(**{f'{campo}__{menor}': media})),
+    }
+    tramos = list(zip(LIMITES_RANGOS_SCORE, LIMITES_RANGOS_SCORE[1:]))
+    for i, (desde, hasta) in enumerate(tramos):
+        # El primer y el último tramo quedan abiertos hacia afuera
+        condicion = Q(**{f'{campo}__isnull': False})
+        if i > 0:
+            condicion &= Q(**{f'{campo}__gte': desde})
+        if i < len(tramos) - 1:
+            condicion &= Q(**{f'{campo}__lt': hasta})
+        agregados[f'rango_{i}'] = Count('id', filter=condicion)
+
+    conteos = queryset.order_by().aggregate(**agregados)
+    histograma = {nivel: conteos[nivel] for nivel in ('alta_confianza', 'media_confianza', 'baja_confianza')}
+    histograma['rangos'] = [
+        {'desde': desde, 'hasta': hasta, 'cantidad': conteos[f'rango_{i}']}
+        for i, (desde, hasta) in enumerate(tramos)
+    ]
+    return histograma
+
+
+def save_recommendations(proyecto, metricas, filas):
+    """
+    Guarda una recomendación y todos sus usuarios recomendados en una sola
+    transacción, con bulk_create y sin consultar los usuarios.
+
+    Args:
+        proyecto: Instancia de Proyecto
+        metricas: Campos de métricas de RecomendacionProyecto (rf_accuracy, ...);
+            los que falten se guardan en 0
+        filas: Lista de dicts ordenada por ranking, con user_id,
+            score_combinado, score_rf, score_knn y score_nn
+
+    Returns:
+        RecomendacionProyecto: La recomendación creada
+    """
+    with transaction.atomic():
+        recomendacion = RecomendacionProyecto.objects.create(
+            project_id=proyecto,
+            **{**METRICAS_VACIAS, **metricas}
+        )
+        RecomendacionUsuario.objects.bulk_create([
+            RecomendacionUsuario(
+                recomendacion_id=recomendacion,
+                user_id_id=fila['user_id'],
+                score_combinado=fila['score_combinado'],
+                score_rf=fila['score_rf'],
+                score_knn=fila['score_knn'],
+                score_nn=fila['score_nn'],
+                ranking=ranking
+            )
+            for ranking, fila in enumerate(filas, 1)
+        ], batch_size=BULK_BATCH_SIZE)
+        # Niveles de confianza de todas las filas en una sola sentencia
+        RecomendacionUsuario.objects.filter(recomendacion_id=recomendacion).update(
+            nivel_confianza=RecomendacionUsuario.nivel_confianza_sql()
+        )
+
+    logger.info(f"Recomendación {recomendacion.id} guardada con {len(filas)} usuarios")
+    return recomendacion
@@ -10,15 +10,42 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
 import os
 import json
+import threading
+from functools import lru_cache
 from typing import Dict, Optional, List
+from .cvlac_parser import is_complete, parse_cvlac_html
+from .driver_pool import get_driver_pool
+from .http_cache import body_hash, cached_get
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Tiempo máximo para que una página termine de cargar (segundos)
+PAGE_READY_TIMEOUT = 30
+
+# Tiempo máximo para que los scripts de CVLAC muestren el nombre (segundos)
+CVLAC_CONTENT_TIMEOUT = 10
+
+# Descarga directa (sin navegador) de las páginas
+HTTP_TIMEOUT = 15
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept-Language': 'es-CO,es;q=0.9',
+}
+
+# Una sesión HTTP por hilo para reutilizar las conexiones
+_http = threading.local()
+
+@lru_cache(maxsize=None)
+def _chromedriver_path() -> str:
+    """
+    Ruta del chromedriver, resuelta una sola vez por proceso
+    """
+    return ChromeDriverManager().install()
+
 def setup_driver() -> webdriver.Chrome:
     """
     Configura y retorna una instancia del driver de Chrome con opciones optimizadas
@@ -32,7 +59,7 @@ def setup_driver() -> webdriver.Chrome:
     chrome_options.add_argument('--disable-notifications')
     chrome_options.add_argument('--disable-popup-blocking')
     
-    service = Service(ChromeDriverManager().install())
+    service = Service(_chromedriver_path())
     
     try:
         driver = webdriver.Chrome(service=service, options=chrome_options)
@@ -58,22 +85,104 @@ def wait_for_element(driver: webdriver.Chrome, by: By, value: str, timeout: int
         logger.error(f"Error esperando elemento {value}: {str(e)}")
         return None
 
-def extract_cvlac_data(url: str) -> Optional[Dict]:
+def wait_for_page_ready(driver: webdriver.Chrome, timeout: int = PAGE_READY_TIMEOUT) -> bool:
+    """
+    Espera a que el documento termine de cargar (document.readyState)
+    """
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script('return document.readyState') == 'complete'
+        )
+        return True
+    except TimeoutException:
+        logger.warning(f"Timeout esperando la carga de {driver.current_url}")
+        return False
+
+def find_text(driver: webdriver.Chrome, selector: str) -> str:
+    """
+    Texto del primer elemento que coincide con el selector, sin esperar
+    (la página ya terminó de cargar); cadena vacía si no existe
+    """
+    elementos = driver.find_elements(By.CSS_SELECTOR, selector)
+    return elementos[0].text.strip() if elementos else ''
+
+def _http_session() -> requests.Session:
+    if not hasattr(_http, 'session'):
+        _http.session = requests.Session()
+        _http.session.headers.update(HTTP_HEADERS)
+    return _http.session
+
+def fetch_page(url: str, ttl: Optional[int] = None) -> Optional[str]:
+    """
+    Descarga una página con una petición HTTP simple, a través de la caché
+    en disco (ver core/http_cache.py); con ttl=0 se revalida siempre con el
+    servidor. Retorna None si la petición falla
+    """
+    try:
+        return cached_get(_http_session(), url, HTTP_TIMEOUT, ttl=ttl)
+    except requests.RequestException as e:
+        logger.warning(f"Error descargando {url}: {str(e)}")
+        return None
+
+# Resultado de la extracción cuando la página es la de la última importación
+SIN_CAMBIOS = {'sin_cambios': True}
+
+def extract_cvlac_data(url: str, ttl: Optional[int] = None, pagina_importada: Optional[str] = None) -> Optional[Dict]:
+    """
+    Extrae datos del perfil CVLAC. Las páginas de CVLAC se generan en el
+    servidor, así que primero se descargan con una petición HTTP y se
+    interpretan con BeautifulSoup; el navegador solo se usa si la página no
+    trae los datos requeridos.
+    El ttl se pasa a fetch_page (ttl=0 para no usar la copia en caché).
+    Los datos obtenidos por HTTP llevan la huella de la página en
+    'huella_pagina'; si coincide con pagina_importada (la de la última
+    importación completa) se retorna SIN_CAMBIOS sin interpretarla
+    """
+    if not url:
+        logger.warning("URL de CVLAC no proporcionada")
+        return None
+    
+    html = fetch_page(url, ttl)
+    if html:
+        huella_pagina = body_hash(html)
+        if huella_pagina == pagina_importada:
+            logger.info(f"CVLAC sin cambios desde la última importación: {url}")
+            return dict(SIN_CAMBIOS)
+        data = parse_cvlac_html(html)
+        if is_complete(data):
+            logger.info(f"CVLAC extraído sin navegador: {url}")
+            data['huella_pagina'] = huella_pagina
+            return data
+    
+    logger.info(f"Página de CVLAC incompleta, usando el navegador: {url}")
+    return extract_cvlac_data_browser(url)
+
+def extract_cvlac_data_browser(url: str) -> Optional[Dict]:
     """
-    Extrae datos del perfil CVLAC usando los selectores correctos
+    Extrae datos del perfil CVLAC con el navegador (páginas que requieren
+    JavaScript)
     """
     if not url:
         logger.warning("URL de CVLAC no proporcionada")
         return None
         
+    pool = get_driver_pool()
     driver = None
     try:
-        driver = setup_driver()
+        # Sesión del pool, ya iniciada y limpia
+        driver = pool.acquire()
         logger.info(f"Accediendo a CVLAC: {url}")
         driver.get(url)
         
-        # Esperar a que la página cargue
-        time.sleep(5)
+        # Esperar a que la página cargue y a que sus scripts muestren el campo
+        # requerido (readyState puede completarse antes)
+        wait_for_page_ready(driver)
+        wait_for_element(driver, By.CSS_SELECTOR, '#nombre_completo', timeout=CVLAC_CONTENT_TIMEOUT)
+        
+        # El HTML ya renderizado se interpreta con el mismo parser de la vía HTTP
+        data = parse_cvlac_html(driver.page_source)
+        if is_complete(data):
+            return data
         
         # Extraer información básica
         data = {
@@ -89,25 +198,11 @@ def extract_cvlac_data(url: str) -> Optional[Dict]:
             'estudios': []
         }
         
-        # Nombre
-        nombre_elem = wait_for_element(driver, By.CSS_SELECTOR, '#nombre_completo')
-        if nombre_elem:
-            data['nombre'] = nombre_elem.text.strip()
-            
-        # Institución
-        inst_elem = wait_for_element(driver, By.CSS_SELECTOR, '#institucion')
-        if inst_elem:
-            data['institucion'] = inst_elem.text.strip()
-            
-        # Grupo de investigación
-        grupo_elem = wait_for_element(driver, By.CSS_SELECTOR, '#grupo_investigacion')
-        if grupo_elem:
-            data['grupo_investigacion'] = grupo_elem.text.strip()
-            
-        # Categoría
-        cat_elem = wait_for_element(driver, By.CSS_SELECTOR, '#categoria')
-        if cat_elem:
-            data['categoria'] = cat_elem.text.strip()
+        # Información básica (ya se esperó al nombre: no se espera por cada campo)
+        data['nombre'] = find_text(driver, '#nombre_completo')
+        data['institucion'] = find_text(driver, '#institucion')
+        data['grupo_investigacion'] = find_text(driver, '#grupo_investigacion')
+        data['categoria'] = find_text(driver, '#categoria')
             
         # Publicaciones
         try:
@@ -225,21 +320,27 @@ def extract_cvlac_data(url: str) -> Optional[Dict]:
         
     except Exception as e:
         logger.error(f"Error extrayendo datos de CVLAC: {str(e)}")
+        # La sesión puede haber quedado inservible: se cierra en lugar de reutilizarla
+        if driver:
+            pool.discard(driver)
+            driver = None
         return None
         
     finally:
         if driver:
-            driver.quit()
+            pool.release(driver)
 
 # Función de compatibilidad para mantener la interfaz anterior
-def extract_cvlac_info(url):
+def extract_cvlac_info(url, ttl=None, pagina_importada=None):
     """
     Función de compatibilidad que utiliza extract_cvlac_data internamente
     """
     try:
-        data = extract_cvlac_data(url)
+        data = extract_cvlac_data(url, ttl, pagina_importada)
         if not data:
             return None
+        if data.get('sin_cambios'):
+            return data
             
         # Convertir al formato esperado por el código existente
         info = {
@@ -253,6 +354,8 @@ def extract_cvlac_info(url):
             'estudios': [],
             'experiencia': []
         }
+        if data.get('huella_pagina'):
+            info['huella_pagina'] = data['huella_pagina']
         
         # Procesar publicaciones
         for pub in data.get('publicaciones', []):
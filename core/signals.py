@@ -0,0 +1,53 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .feature_store import schedule_feature_refresh
+from .models import (
+    Proyecto, ProyectoRoles, RecomendacionProyecto, Usuario,
+    UsuarioHabilidades, UsuarioConocimiento, UsuarioEstudios, UsuarioExperiencia
+)
+from .pdf_cache import discard_recommendation_pdf
+from .platform_stats import schedule_stats_refresh
+
+
+@receiver(post_save, sender=UsuarioHabilidades)
+@receiver(post_save, sender=UsuarioConocimiento)
+@receiver(post_save, sender=UsuarioEstudios)
+@receiver(post_save, sender=UsuarioExperiencia)
+@receiver(post_delete, sender=UsuarioHabilidades)
+@receiver(post_delete, sender=UsuarioConocimiento)
+@receiver(post_delete, sender=UsuarioEstudios)
+@receiver(post_delete, sender=UsuarioExperiencia)
+def actualizar_caracteristicas_usuario(sender, instance, **kwargs):
+    """
+    Recalcula las características materializadas del usuario cuando
+    cambian sus habilidades, conocimientos, estudios o experiencia.
+    """
+    schedule_feature_refresh(instance.user_id_id)
+
+
+@receiver(post_save, sender=Proyecto)
+@receiver(post_save, sender=ProyectoRoles)
+@receiver(post_save, sender=Usuario)
+@receiver(post_save, sender=UsuarioHabilidades)
+@receiver(post_save, sender=UsuarioConocimiento)
+@receiver(post_save, sender=RecomendacionProyecto)
+@receiver(post_delete, sender=Proyecto)
+@receiver(post_delete, sender=ProyectoRoles)
+@receiver(post_delete, sender=Usuario)
+@receiver(post_delete, sender=UsuarioHabilidades)
+@receiver(post_delete, sender=UsuarioConocimiento)
+@receiver(post_delete, sender=RecomendacionProyecto)
+def actualizar_estadisticas_plataforma(sender, **kwargs):
+    """
+    Programa el recálculo del resumen del informe de plataforma. Los
+    usuarios recomendados se guardan junto con su RecomendacionProyecto
+    (y se borran en cascada con ella), así que basta observar esta.
+    """
+    schedule_stats_refresh()
+
+
+@receiver(post_delete, sender=RecomendacionProyecto)
+def descartar_pdf_recomendacion(sender, instance, **kwargs):
+    """Elimina de la caché los PDF exportados de la recomendación borrada."""
+    discard_recommendation_pdf(instance.id)
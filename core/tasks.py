@@ -0,0 +1,220 @@
+import logging
+
+from celery import shared_task
+from celery.signals import worker_process_init
+from django.conf import settings
+from django.urls import reverse
+
+from .bulk_ingestion import Checkpoint, checkpoint_name, checkpoint_path, ingest_profiles
+from .lazy_imports import lazy_import
+from .models import Proyecto, ProyectoRoles, Usuario
+from .platform_stats import refresh_platform_stats
+from .recommendation_store import save_recommendations
+
+# Los sistemas de recomendación (scikit-learn, TensorFlow) y el registro de
+# modelos se cargan al ejecutar la primera tarea, no al importar las vistas
+ml_models = lazy_import('core.ml_models')
+advanced_ml_models = lazy_import('core.advanced_ml_models')
+model_registry = lazy_import('core.model_registry')
+
+logger = logging.getLogger(__name__)
+
+# Vista de detalle de cada tipo de recomendación
+VISTAS_RECOMENDACION = {
+    'basico': 'ver_recomendaciones',
+    'avanzado': 'ver_recomendaciones_avanzadas',
+    'cnn': 'ver_recomendaciones_cnn',
+}
+
+
+def _reportar_progreso(task, etapa):
+    """Publica la etapa actual de la tarea para que la consulte el cliente."""
+    logger.info(f"Tarea {task.request.id}: {etapa}")
+    task.update_state(state='PROGRESS', meta={'etapa': etapa})
+
+
+def _generar_basico(task, proyecto, usuarios, roles_proyecto):
+    recommender = ml_models.RecommendationSystem()
+
+    # Reutilizar el modelo entrenado si el proyecto y los perfiles no cambiaron.
+    # Se restaura antes de preparar los datos para escalarlos con su escalador
+    model_key_basico = model_registry.model_key('basico', proyecto.id, roles_proyecto, usuarios)
+    estado = model_registry.load_model(model_key_basico)
+    metricas = recommender.load_state(estado) if estado else None
+    if not metricas:
+        # Un estado sin métricas se vuelve a entrenar, sin su escalador
+        recommender = ml_models.RecommendationSystem()
+
+    _reportar_progreso(task, 'Preparando datos')
+    X, user_ids = recommender.prepare_data(usuarios, roles_proyecto)
+
+    if metricas:
+        rf_scores, knn_scores, nn_scores = metricas
+    else:
+        _reportar_progreso(task, 'Entrenando modelos')
+        rf_scores, knn_scores, nn_scores = recommender.train_models(X, user_ids)
+        # prepare_data construye las características que faltaban (usuarios
+        # nuevos), lo que cambia la versión del snapshot y con ella la clave
+        model_key_basico = model_registry.model_key('basico', proyecto.id, roles_proyecto, usuarios)
+        model_registry.save_model(model_key_basico, recommender.export_state((rf_scores, knn_scores, nn_scores)))
+
+    _reportar_progreso(task, 'Calculando recomendaciones')
+    recommendations = recommender.get_recommendations(X, user_ids, top_n=10)
+
+    _reportar_progreso(task, 'Guardando resultados')
+    campos_metricas = {
+        f'{modelo}_{metrica}': scores[metrica]
+        for modelo, scores in (('rf', rf_scores), ('knn', knn_scores), ('nn', nn_scores))
+        for metrica in ('accuracy', 'precision', 'recall', 'f1')
+    }
+    return save_recommendations(proyecto, campos_metricas, [
+        {
+            'user_id': rec['user_id'],
+            'score_combinado': rec['score'],
+            'score_rf': rec['rf_score'],
+            'score_knn': rec['knn_score'],
+            'score_nn': rec['nn_score'],
+        }
+        for rec in recommendations
+    ])
+
+
+def _generar_avanzado(task, proyecto, usuarios, roles_proyecto):
+    recommender = advanced_ml_models.AdvancedRecommendationSystem()
+
+    # Restaurar el modelo guardado antes de preparar los datos, para escalarlos
+    # con el mismo escalador con el que se entrenó
+    model_key_avanzado = model_registry.model_key('avanzado', proyecto.id, roles_proyecto, usuarios)
+    estado = model_registry.load_model(model_key_avanzado)
+    if estado:
+        recommender.load_state(estado)
+
+    _reportar_progreso(task, 'Preparando datos')
+    X, user_ids = recommender.prepare_advanced_data(usuarios, roles_proyecto)
+
+    if not estado:
+        _reportar_progreso(task, 'Entrenando modelos')
+        recommender.train_advanced_models(X, user_ids)
+        # Clave con las características construidas al preparar los datos
+        model_key_avanzado = model_registry.model_key('avanzado', proyecto.id, roles_proyecto, usuarios)
+        model_registry.save_model(model_key_avanzado, recommender.export_state())
+
+    _reportar_progreso(task, 'Calculando recomendaciones')
+    adv_scores = recommender.get_advanced_performance_summary()
+    recommendations = recommender.get_advanced_recommendations(X, user_ids, top_n=10)
+
+    _reportar_progreso(task, 'Guardando resultados')
+    metricas = {f'nn_{metrica}': adv_scores.get(metrica, 0) for metrica in ('accuracy', 'precision', 'recall', 'f1')}
+    return save_recommendations(proyecto, metricas, [
+        {
+            'user_id': rec['user_id'],
+            'score_combinado': rec['score'],
+            'score_rf': 0,
+            'score_knn': 0,
+            'score_nn': rec['score'],
+        }
+        for rec in recommendations
+    ])
+
+
+def _generar_cnn(task, proyecto, usuarios, roles_proyecto):
+    recommender = advanced_ml_models.AdvancedRecommendationSystem()
+
+    _reportar_progreso(task, 'Preparando datos')
+    X, user_ids = recommender.prepare_advanced_data(usuarios, roles_proyecto)
+
+    _reportar_progreso(task, 'Entrenando red convolucional')
+    # La red se reentrena cuando cambian los roles o los perfiles
+    clave_cnn = advanced_ml_models.cnn_key(proyecto.id, roles_proyecto, usuarios)
+    recommendations = recommender.get_cnn_recommendations(X, user_ids, top_n=10, model_key=clave_cnn)
+
+    _reportar_progreso(task, 'Guardando resultados')
+    return save_recommendations(proyecto, {}, [
+        {
+            'user_id': rec['user_id'],
+            'score_combinado': rec['score'],
+            'score_rf': 0,
+            'score_knn': 0,
+            'score_nn': rec['cnn_score'],
+        }
+        for rec in recommendations
+    ])
+
+
+GENERADORES = {
+    'basico': _generar_basico,
+    'avanzado': _generar_avanzado,
+    'cnn': _generar_cnn,
+}
+
+
+@shared_task(bind=True)
+def generar_recomendaciones_task(self, proyecto_id, tipo='basico'):
+    """
+    Genera y guarda las recomendaciones de un proyecto en segundo plano.
+
+    Args:
+        proyecto_id: ID del proyecto
+        tipo: 'basico', 'avanzado' o 'cnn'
+
+    Returns:
+        dict: ID de la recomendación creada y URL de su página de detalle
+    """
+    if tipo not in GENERADORES:
+        raise ValueError(f"Tipo de recomendación desconocido: {tipo}")
+
+    proyecto = Proyecto.objects.get(id=proyecto_id)
+    usuarios = Usuario.objects.all()
+    roles_proyecto = ProyectoRoles.objects.filter(project_id=proyecto)
+
+    recomendacion = GENERADORES[tipo](self, proyecto, usuarios, roles_proyecto)
+    logger.info(f"Recomendación {tipo} {recomendacion.id} generada para el proyecto {proyecto_id}")
+
+    return {
+        'recomendacion_id': recomendacion.id,
+        'proyecto_id': proyecto_id,
+        'tipo': tipo,
+        'url': reverse(VISTAS_RECOMENDACION[tipo], kwargs={'recomendacion_id': recomendacion.id}),
+    }
+
+
+@shared_task
+def refrescar_estadisticas_task():
+    """
+    Recalcula el resumen del informe de plataforma. Se programa al cambiar
+    los datos y periódicamente (CELERY_BEAT_SCHEDULE).
+
+    Returns:
+        str: Fecha del cálculo
+    """
+    estadisticas = refresh_platform_stats()
+    logger.info(f"Estadísticas de la plataforma actualizadas ({estadisticas.actualizado})")
+    return estadisticas.actualizado.isoformat()
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def ingestar_perfiles_task(self, user_ids=None):
+    """
+    Ingesta masiva de perfiles de CVLAC y LinkedIn. El mensaje se confirma
+    al terminar, así que si el worker se pierde la tarea se entrega de nuevo
+    y, con el checkpoint de esos mismos usuarios, omite los ya guardados.
+
+    Returns:
+        dict: Totales de la ingesta
+    """
+    def progreso(user_id, summary, hechos, total):
+        self.update_state(state='PROGRESS', meta={'etapa': f'Usuarios procesados: {hechos} de {total}'})
+
+    checkpoint = Checkpoint(checkpoint_path(checkpoint_name(user_ids)))
+    return ingest_profiles(user_ids=user_ids, checkpoint=checkpoint, progreso=progreso)
+
+
+@worker_process_init.connect
+def precalentar_modelos(**kwargs):
+    """
+    Precalienta la CNN al iniciar cada proceso del worker, para que la
+    primera recomendación tras un despliegue no pague la carga de
+    TensorFlow ni la construcción del grafo.
+    """
+    if getattr(settings, 'CNN_WARMUP_ON_WORKER_START', True):
+        advanced_ml_models.warm_up_cnn()
@@ -10,24 +10,6 @@ def multiply(value, arg):
     except (ValueError, TypeError):
         return ''
 
-@register.filter
-def count_by_score(usuarios, max_score):
-    """Cuenta usuarios con score de red neuronal menor o igual al valor dado"""
-    try:
-        max_score = float(max_score)
-        return len([u for u in usuarios if getattr(u, 'score_nn', 0) <= max_score])
-    except (ValueError, TypeError):
-        return 0
-
-@register.filter
-def count_by_min_score(usuarios, min_score):
-    """Cuenta usuarios con score de red neuronal mayor o igual al valor dado"""
-    try:
-        min_score = float(min_score)
-        return len([u for u in usuarios if getattr(u, 'score_nn', 0) >= min_score])
-    except (ValueError, TypeError):
-        return 0
-
 @register.filter
 def subtract(value, arg):
     """Resta dos números"""
@@ -51,54 +33,6 @@ def filter_by_score_range(queryset, range_str):
     except:
         return queryset
 
-@register.filter
-def count_alta_confianza(usuarios):
-    """Cuenta usuarios con alta confianza (score_nn >= 0.7)"""
-    try:
-        return len([u for u in usuarios if getattr(u, 'score_nn', 0) >= 0.7])
-    except:
-        return 0
-
-@register.filter
-def count_media_confianza(usuarios):
-    """Cuenta usuarios con media confianza (0.5 <= score_nn < 0.7)"""
-    try:
-        return len([u for u in usuarios if 0.5 <= getattr(u, 'score_nn', 0) < 0.7])
-    except:
-        return 0
-
-@register.filter
-def count_baja_confianza(usuarios):
-    """Cuenta usuarios con baja confianza (score_nn < 0.5)"""
-    try:
-        return len([u for u in usuarios if getattr(u, 'score_nn', 0) < 0.5])
-    except:
-        return 0
-
-@register.filter
-def count_alta_confianza_avanzado(usuarios):
-    """Cuenta usuarios con alta confianza (score_avanzado >= 0.7)"""
-    try:
-        return len([u for u in usuarios if getattr(u, 'score_avanzado', 0) >= 0.7])
-    except:
-        return 0
-
-@register.filter
-def count_media_confianza_avanzado(usuarios):
-    """Cuenta usuarios con media confianza (0.5 <= score_avanzado < 0.7)"""
-    try:
-        return len([u for u in usuarios if 0.5 <= getattr(u, 'score_avanzado', 0) < 0.7])
-    except:
-        return 0
-
-@register.filter
-def count_baja_confianza_avanzado(usuarios):
-    """Cuenta usuarios con baja confianza (score_avanzado < 0.5)"""
-    try:
-        return len([u for u in usuarios if getattr(u, 'score_avanzado', 0) < 0.5])
-    except:
-        return 0
-
 @register.filter
 def divide(value, arg):
     """Divide dos números"""
@@ -0,0 +1,187 @@
+import logging
+import threading
+
+import numpy as np
+import scipy.sparse as sp
+
+from .models import Termino, UsuarioCaracteristicas
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_term(term):
+    """
+    Normaliza un término de habilidad o conocimiento para el vocabulario,
+    igual que las claves del catálogo (Termino.normalizar).
+    """
+    return Termino.normalizar(term)
+
+
+class TermIndex:
+    """
+    Índice disperso usuarios × términos construido sobre UsuarioCaracteristicas.
+
+    Mantiene matrices CSR para habilidades (binaria) y conocimientos
+    (presencia, conteo, suma y máximo de `nivel`), de modo que los matches de
+    un proyecto se calculan con un producto matriz-vector sobre todos los
+    usuarios. Se sincroniza de forma incremental con las filas de
+    características con una versión mayor que la última incorporada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.vocab_habilidades = {}
+        self.vocab_conocimientos = {}
+        self.filas = {}  # user_id -> fila
+        self.habilidades = sp.csr_matrix((0, 0))
+        self.conocimientos = sp.csr_matrix((0, 0))
+        self.conocimientos_conteo = sp.csr_matrix((0, 0))
+        self.conocimientos_suma = sp.csr_matrix((0, 0))
+        self.conocimientos_max = sp.csr_matrix((0, 0))
+        self.version = None
+
+    def _columna(self, vocab, term):
+        if term not in vocab:
+            vocab[term] = len(vocab)
+        return vocab[term]
+
+    def _aplicar(self, cambios):
+        """
+        Reemplaza las filas de los usuarios modificados.
+
+        Args:
+            cambios: Lista de tuplas (user_id, habilidades, conocimientos)
+        """
+        for user_id, _, _ in cambios:
+            if user_id not in self.filas:
+                self.filas[user_id] = len(self.filas)
+
+        filas_h, cols_h = [], []
+        filas_c, cols_c, niveles_c = [], [], []
+        for user_id, habilidades, conocimientos in cambios:
+            fila = self.filas[user_id]
+            for term in habilidades:
+                filas_h.append(fila)
+                cols_h.append(self._columna(self.vocab_habilidades, normalize_term(term)))
+            for term, nivel in conocimientos:
+                filas_c.append(fila)
+                cols_c.append(self._columna(self.vocab_conocimientos, normalize_term(term)))
+                niveles_c.append(float(nivel))
+
+        n_filas = len(self.filas)
+        forma_h = (n_filas, len(self.vocab_habilidades))
+        forma_c = (n_filas, len(self.vocab_conocimientos))
+
+        # Anular las filas modificadas antes de sumar sus nuevos valores
+        conservar = np.ones(n_filas)
+        conservar[[self.filas[user_id] for user_id, _, _ in cambios]] = 0
+        mascara = sp.diags(conservar, format='csr')
+
+        def _reemplazar(matriz, nuevas, forma):
+            matriz = matriz.tocsr(copy=True)
+            matriz.resize(forma)
+            return (mascara @ matriz + nuevas).tocsr()
+
+        nuevas_h = sp.csr_matrix((np.ones(len(filas_h)), (filas_h, cols_h)), shape=forma_h)
+        nuevas_h.data[:] = 1  # Los duplicados se suman al convertir a CSR
+        self.habilidades = _reemplazar(self.habilidades, nuevas_h, forma_h)
+
+        conteo = sp.csr_matrix((np.ones(len(filas_c)), (filas_c, cols_c)), shape=forma_c)
+        suma = sp.csr_matrix((niveles_c, (filas_c, cols_c)), shape=forma_c)
+        # Máximo por celda: ordenar por nivel y quedarse con el último de cada celda
+        f_c, c_c, v_c = np.asarray(filas_c, dtype=np.int64), np.asarray(cols_c, dtype=np.int64), np.asarray(niveles_c)
+        orden = np.lexsort((v_c, c_c, f_c))
+        f_c, c_c, v_c = f_c[orden], c_c[orden], v_c[orden]
+        ultimo = np.ones(len(f_c), dtype=bool)
+        ultimo[:-1] = (f_c[1:] != f_c[:-1]) | (c_c[1:] != c_c[:-1])
+        maximo = sp.csr_matrix((v_c[ultimo], (f_c[ultimo], c_c[ultimo])), shape=forma_c)
+        presencia = conteo.copy()
+        presencia.data[:] = 1
+
+        self.conocimientos = _reemplazar(self.conocimientos, presencia, forma_c)
+        self.conocimientos_conteo = _reemplazar(self.conocimientos_conteo, conteo, forma_c)
+        self.conocimientos_suma = _reemplazar(self.conocimientos_suma, suma, forma_c)
+        self.conocimientos_max = _reemplazar(self.conocimientos_max, maximo, forma_c)
+
+    def sync(self):
+        """
+        Incorpora las características creadas o modificadas desde la última
+        sincronización.
+        """
+        with self._lock:
+            consulta = UsuarioCaracteristicas.objects.all()
+            if self.version is not None:
+                consulta = consulta.filter(version__gt=self.version)
+
+            cambios = []
+            ultima = self.version
+            for user_id, habilidades, conocimientos, version in consulta.values_list(
+                    'user_id', 'habilidades', 'conocimientos', 'version').iterator():
+                cambios.append((user_id, habilidades, conocimientos))
+                if ultima is None or version > ultima:
+                    ultima = version
+
+            if cambios:
+                self._aplicar(cambios)
+                logger.info(f"Índice de términos: {len(cambios)} usuarios sincronizados")
+            self.version = ultima
+        return self
+
+    def _vector(self, vocab, terms):
+        columnas = [vocab[t] for t in {normalize_term(t) for t in terms} if t in vocab]
+        vector = np.zeros(len(vocab))
+        vector[columnas] = 1
+        return vector
+
+    def match(self, user_ids, roles_habilidades, roles_conocimientos):
+        """
+        Calcula las características de match contra los términos de los roles.
+
+        Args:
+            user_ids: IDs de usuario en el orden deseado (deben estar indexados)
+            roles_habilidades: Conjunto de habilidades requeridas
+            roles_conocimientos: Conjunto de conocimientos requeridos
+
+        Returns:
+            dict: Arreglos match_habilidades, match_conocimientos,
+            promedio_nivel_conocimientos y max_nivel_conocimientos
+        """
+        with self._lock:
+            filas = np.array([self.filas[uid] for uid in user_ids], dtype=np.int64)
+            habilidades = self.habilidades[filas]
+            conocimientos = self.conocimientos[filas]
+            conteo = self.conocimientos_conteo[filas]
+            suma = self.conocimientos_suma[filas]
+            maximo = self.conocimientos_max[filas]
+            q_h = self._vector(self.vocab_habilidades, roles_habilidades)
+            q_c = self._vector(self.vocab_conocimientos, roles_conocimientos)
+
+        n = len(filas)
+        match_habilidades = habilidades @ q_h / len(roles_habilidades) if roles_habilidades else np.zeros(n)
+        match_conocimientos = conocimientos @ q_c / len(roles_conocimientos) if roles_conocimientos else np.zeros(n)
+
+        conteo_relevante = conteo @ q_c
+        suma_relevante = suma @ q_c
+        promedio = np.divide(suma_relevante, conteo_relevante,
+                             out=np.zeros(n), where=conteo_relevante > 0)
+        max_nivel = maximo.multiply(q_c).max(axis=1).toarray().ravel() if n else np.zeros(0)
+
+        return {
+            'match_habilidades': np.asarray(match_habilidades, dtype=float),
+            'match_conocimientos': np.asarray(match_conocimientos, dtype=float),
+            'promedio_nivel_conocimientos': promedio,
+            'max_nivel_conocimientos': max_nivel,
+        }
+
+
+_term_index = None
+_term_index_lock = threading.Lock()
+
+
+def get_term_index():
+    """Devuelve el índice de términos del proceso, sincronizado."""
+    global _term_index
+    with _term_index_lock:
+        if _term_index is None:
+            _term_index = TermIndex()
+    return _term_index.sync()
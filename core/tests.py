@@ -1,3 +1,1022 @@
-from django.test import TestCase
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .bulk_ingestion import Checkpoint, CheckpointEnUso, checkpoint_name, checkpoint_path, ingest_profiles
+from .cvlac_parser import is_complete, parse_cvlac_html
+from .data_services import new_summary, profile_hash, save_user_data
+from .feature_store import load_user_features, refresh_user_features, schedule_feature_refresh
+from . import cnn_scorer, model_registry, tasks
+from .http_cache import body_hash, cached_get
+from .pdf_cache import cached_pdf_response, platform_report_pdf_key, recommendation_pdf_key
+from .platform_stats import get_platform_stats, recommendations_by_month, refresh_platform_stats, schedule_stats_refresh
+from .ranking import top_k
+from .recommendation_store import save_recommendations, score_histogram
+from .term_index import TermIndex
+from .models import (
+    EstadisticasPlataforma, PerfilImportado, Proyecto, ProyectoProductos, ProyectoRoles, RecomendacionProyecto, RecomendacionUsuario,
+    Termino, Usuario, UsuarioCaracteristicas, UsuarioConocimiento, UsuarioEstudios, UsuarioExperiencia,
+    UsuarioHabilidades, lower_exact
+)
+
+# Tiempo máximo para importar core.views en un proceso nuevo (segundos)
+VIEWS_IMPORT_BUDGET = 2.0
+
+# Dependencias pesadas que solo deben cargarse en el primer uso
+HEAVY_MODULES = ('numpy', 'tensorflow', 'sklearn', 'reportlab.platypus', 'selenium')
+
+IMPORT_SCRIPT = f"""
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'redudes.settings')
+import django
+django.setup()
+inicio = time.perf_counter()
+import core.views
+duracion = time.perf_counter() - inicio
+print(json.dumps({{
+    'duracion': duracion,
+    'cargados': [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def crear_usuario(email='ana@example.com', **campos):
+    """Usuario mínimo para las pruebas."""
+    datos = dict(
+        nombres='Ana', apellidos='Pérez', email=email, telefono=3000000000,
+        puesto_actual='Docente', dependencia='Ingeniería', url_cvlac='', url_linkedin='',
+        fecha_ingreso=timezone.now()
+    )
+    datos.update(campos)
+    return Usuario.objects.create(**datos)
+
+
+def crear_proyecto(nombre='Proyecto'):
+    """Proyecto mínimo para las pruebas."""
+    return Proyecto.objects.create(
+        nombre=nombre, convocatoria='2024', tipo_proyecto='Investigación',
+        tipo_convocatoria='Interna', alcance='', objetivo='', presupuesto=1000000,
+        fecha=timezone.now()
+    )
+
+
+class ViewsStartupTests(SimpleTestCase):
+    """Tiempo de arranque de las vistas sin backends de ML ni PDF."""
+
+    def test_import_views_within_budget(self):
+        resultado = subprocess.run(
+            [sys.executable, '-c', IMPORT_SCRIPT],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        )
+        medicion = json.loads(resultado.stdout.strip().splitlines()[-1])
+
+        self.assertEqual(medicion['cargados'], [])
+        self.assertLess(medicion['duracion'], VIEWS_IMPORT_BUDGET)
+
+
+@skipUnless(connection.vendor == 'sqlite', "Los planes comprobados son los de SQLite")
+class QueryPlanTests(TestCase):
+    """Las consultas frecuentes usan los índices compuestos (migración 0010)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuario.objects.create(
+            nombres='Ana', apellidos='Pérez', email='ana@example.com', telefono=3000000000,
+            puesto_actual='Docente', dependencia='Ingeniería', url_cvlac='', url_linkedin='',
+            fecha_ingreso=timezone.now()
+        )
+        cls.proyecto = Proyecto.objects.create(
+            nombre='Proyecto', convocatoria='2024', tipo_proyecto='Investigación',
+            tipo_convocatoria='Interna', alcance='', objetivo='', presupuesto=1000000,
+            fecha=timezone.now()
+        )
+        cls.recomendacion = RecomendacionProyecto.objects.create(
+            project_id=cls.proyecto, rf_accuracy=0.5, rf_precision=0.5, rf_recall=0.5, rf_f1=0.5,
+            knn_accuracy=0.5, knn_precision=0.5, knn_recall=0.5, knn_f1=0.5
+        )
+
+    def assertUsesIndex(self, queryset, indice):
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {indice}", plan)
+        return plan
+
+    def test_recommendation_ranking(self):
+        plan = self.assertUsesIndex(self.recomendacion.usuarios_recomendados.all(), 'recusuario_rec_score_idx')
+        # El orden por defecto (-score_combinado) sale del índice
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_score_top_and_ranges(self):
+        self.assertUsesIndex(RecomendacionUsuario.objects.all()[:20], 'recusuario_score_idx')
+        self.assertUsesIndex(RecomendacionUsuario.objects.filter(score_combinado__gt=0.7), 'recusuario_score_idx')
+
+    def test_profile_duplicate_lookups(self):
+        termino = Termino.obtener('Python')
+        self.assertUsesIndex(
+            UsuarioHabilidades.objects.filter(user_id=self.usuario, termino=termino),
+            'usuariohab_termino_idx'
+        )
+        self.assertUsesIndex(Termino.objects.filter(clave=Termino.normalizar('PYTHON')), 'sqlite_autoindex_core_termino')
+        self.assertUsesIndex(
+            UsuarioEstudios.objects.filter(lower_exact('estudio', 'Maestría'), user_id=self.usuario, nivel=4),
+            'usuarioestudios_estudio_idx'
+        )
+
+    def test_project_children_lookups(self):
+        self.assertUsesIndex(
+            ProyectoRoles.objects.filter(lower_exact('rol', 'Investigador'), project_id=self.proyecto),
+            'proyectoroles_rol_idx'
+        )
+        self.assertUsesIndex(
+            ProyectoProductos.objects.filter(lower_exact('producto', 'Artículo'), project_id=self.proyecto),
+            'proyectoproductos_prod_idx'
+        )
+
+    def test_lower_exact_ignores_case(self):
+        UsuarioHabilidades.objects.create(user_id=self.usuario, habilidad='Python', experiencia='')
+        self.assertTrue(UsuarioHabilidades.objects.filter(lower_exact('habilidad', 'PYTHON')).exists())
+        self.assertFalse(UsuarioHabilidades.objects.filter(lower_exact('habilidad', 'Pyth')).exists())
+
+
+class TerminoCatalogTests(TestCase):
+    """Catálogo normalizado de habilidades y conocimientos."""
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create(
+            nombres='Ana', apellidos='Pérez', email='ana@example.com', telefono=3000000000,
+            puesto_actual='Docente', dependencia='Ingeniería', url_cvlac='', url_linkedin='',
+            fecha_ingreso=timezone.now()
+        )
+
+    def test_normalizar_ignores_case_accents_and_spaces(self):
+        self.assertEqual(Termino.normalizar('  Diseño   WEB '), 'diseno web')
+        self.assertEqual(Termino.normalizar('Análisis'), Termino.normalizar('ANALISIS'))
+
+    def test_rows_share_catalog_terms(self):
+        habilidad = UsuarioHabilidades.objects.create(user_id=self.usuario, habilidad='Análisis de Datos', experiencia='')
+        conocimiento = UsuarioConocimiento.objects.create(user_id=self.usuario, conocimiento='analisis de datos', nivel=3)
+        self.assertEqual(habilidad.termino_id, conocimiento.termino_id)
+        self.assertEqual(habilidad.termino.nombre, 'Análisis de Datos')
+
+        # Cambiar el nombre cambia el término
+        habilidad.habilidad = 'SQL'
+        habilidad.save()
+        self.assertEqual(habilidad.termino.clave, 'sql')
+
+    def test_substrings_are_different_terms(self):
+        self.assertNotEqual(Termino.obtener('SQL'), Termino.obtener('NoSQL'))
+
+    def test_asignar_for_bulk_create(self):
+        existente = Termino.obtener('Python')
+        filas = [
+            UsuarioHabilidades(user_id=self.usuario, habilidad=nombre, experiencia='')
+            for nombre in ('python', 'Django', ' DJANGO')
+        ]
+        Termino.asignar(filas, 'habilidad')
+        self.assertEqual(filas[0].termino_id, existente.id)
+        self.assertEqual(filas[1].termino_id, filas[2].termino_id)
+        self.assertEqual(Termino.objects.count(), 2)
+
+
+# Página de CVLAC guardada, usada como fixture sin red
+CVLAC_FIXTURE = Path(settings.BASE_DIR) / 'debug_html' / 'cvlac_response.html'
+
+
+class CvlacParserTests(SimpleTestCase):
+    """Extracción de perfiles CVLAC desde el HTML, sin navegador."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.html = CVLAC_FIXTURE.read_text(encoding='utf-8')
+
+    def test_parse_fixture(self):
+        data = parse_cvlac_html(self.html)
+
+        self.assertTrue(is_complete(data))
+        self.assertEqual(data['nombre'], 'Nury Farelo Velásquez')
+        self.assertEqual(data['institucion'], 'UNIVERSIDAD DE SANTANDER')
+        self.assertEqual([e['institucion'] for e in data['estudios']], [
+            'UNIVERSIDAD DE SANTANDER', 'UNIVERSIDAD INDUSTRIAL DE SANTANDER',
+            'Escuela Normal Superior de Bucaramanga',
+        ])
+        self.assertEqual(data['estudios'][1]['titulo'], 'INGENIERIA DE SISTEMAS')
+        self.assertEqual(len(data['proyectos']), 3)
+        self.assertEqual(data['proyectos'][1]['titulo'], 'DISEÑO Y DESARROLLO DE APLICACIÓN MÓVIL ACTUALIDAD UDES')
+        self.assertTrue(data['proyectos'][0]['descripcion'].startswith('El presente proyecto'))
+        self.assertEqual(data['grupo_investigacion'], '')
+
+        # Mismo selector que leía la extracción con el navegador
+        con_grupo = self.html.replace('</body>', '<div id="grupo_investigacion"> GRUPO  GIDSAW </div></body>')
+        self.assertEqual(parse_cvlac_html(con_grupo)['grupo_investigacion'], 'GRUPO GIDSAW')
+
+    def test_parse_articles(self):
+        html = (
+            '<table><tr><td><h3>Artículos</h3></td></tr><tr><td><blockquote>'
+            'PEREZ J, GOMEZ A, "Redes neuronales aplicadas" . En: Colombia Revista Ingenio ,2020'
+            '</blockquote></td></tr></table>'
+        )
+        self.assertEqual(parse_cvlac_html(html)['articulos'], [{
+            'titulo': 'Redes neuronales aplicadas',
+            'autores': 'PEREZ J, GOMEZ A',
+            'revista': 'En: Colombia Revista Ingenio ,2020',
+        }])
+
+    def test_fast_path_skips_browser(self):
+        from . import scraping_utils
+
+        with mock.patch.object(scraping_utils, 'fetch_page', return_value=self.html), \
+                mock.patch.object(scraping_utils, 'extract_cvlac_data_browser') as navegador:
+            data = scraping_utils.extract_cvlac_data('https://scienti.minciencias.gov.co/cvlac/x')
+        self.assertEqual(data['nombre'], 'Nury Farelo Velásquez')
+        navegador.assert_not_called()
+
+    def test_browser_waits_for_rendered_name(self):
+        from . import scraping_utils
+
+        driver = mock.Mock(page_source=self.html)
+        pool = mock.Mock(**{'acquire.return_value': driver})
+        orden = []
+        with mock.patch.object(scraping_utils, 'get_driver_pool', return_value=pool), \
+                mock.patch.object(scraping_utils, 'wait_for_page_ready'), \
+                mock.patch.object(scraping_utils, 'wait_for_element', side_effect=lambda *args, **kwargs: orden.append(args[2])), \
+                mock.patch.object(scraping_utils, 'parse_cvlac_html', side_effect=lambda html: orden.append('parse') or parse_cvlac_html(html)):
+            data = scraping_utils.extract_cvlac_data_browser('https://scienti.minciencias.gov.co/cvlac/x')
+
+        self.assertEqual(orden, ['#nombre_completo', 'parse'])
+        self.assertEqual(data['nombre'], 'Nury Farelo Velásquez')
+        pool.release.assert_called_once_with(driver)
+
+    def test_incomplete_page_falls_back_to_browser(self):
+        from . import scraping_utils
+
+        with mock.patch.object(scraping_utils, 'fetch_page', return_value='<html><body>Cargando...</body></html>'), \
+                mock.patch.object(scraping_utils, 'extract_cvlac_data_browser', return_value={'nombre': 'X'}) as navegador:
+            data = scraping_utils.extract_cvlac_data('https://scienti.minciencias.gov.co/cvlac/x')
+        self.assertEqual(data, {'nombre': 'X'})
+        navegador.assert_called_once()
+
+    def test_imported_page_is_not_parsed(self):
+        from . import scraping_utils
+
+        url = 'https://scienti.minciencias.gov.co/cvlac/x'
+        with mock.patch.object(scraping_utils, 'fetch_page', return_value=self.html):
+            data = scraping_utils.extract_cvlac_data(url)
+            self.assertEqual(data['huella_pagina'], body_hash(self.html))
+            # Misma página de la última importación: no se vuelve a interpretar
+            with mock.patch.object(scraping_utils, 'parse_cvlac_html') as interpretar:
+                data = scraping_utils.extract_cvlac_data(url, pagina_importada=body_hash(self.html))
+        interpretar.assert_not_called()
+        self.assertEqual(data, {'sin_cambios': True})
+
+
+class BulkIngestionTests(TestCase):
+    """Ingesta masiva de perfiles con checkpoint reanudable."""
+
+    def setUp(self):
+        self.usuarios = [
+            Usuario.objects.create(
+                nombres=f'Usuario {i}', apellidos='Prueba', email=f'u{i}@example.com', telefono=3000000000 + i,
+                puesto_actual='Docente', dependencia='Ingeniería', url_linkedin='',
+                url_cvlac=f'https://scienti.minciencias.gov.co/cvlac/{i}', fecha_ingreso=timezone.now()
+            )
+            for i in range(4)
+        ]
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        self.checkpoint = Checkpoint(os.path.join(self.directorio.name, 'perfiles.jsonl'))
+
+    def _perfil(self, url, ttl=None, pagina_importada=None):
+        return {'habilidades': [{'habilidad': f'Habilidad {url.rsplit("/", 1)[-1]}', 'experiencia': ''}]}
+
+    def test_ingests_all_users_once(self):
+        from . import scraping_utils
+
+        with mock.patch.object(scraping_utils, 'extract_cvlac_info', side_effect=self._perfil) as extraer:
+            resumen = ingest_profiles(workers=3, por_host=2, checkpoint=self.checkpoint)
+
+        self.assertEqual(extraer.call_count, 4)
+        self.assertEqual(resumen['procesados'], 4)
+        self.assertEqual(resumen['habilidades_added'], 4)
+        self.assertEqual(UsuarioHabilidades.objects.count(), 4)
+        # Al terminar sin interrupciones el checkpoint se elimina
+        self.assertFalse(os.path.exists(self.checkpoint.path))
+
+    def test_resumes_from_checkpoint(self):
+        from . import scraping_utils
+
+        self.checkpoint.registrar(self.usuarios[0].id, {})
+        self.checkpoint.registrar(self.usuarios[1].id, {})
+        with mock.patch.object(scraping_utils, 'extract_cvlac_info', side_effect=self._perfil) as extraer:
+            resumen = ingest_profiles(workers=2, checkpoint=self.checkpoint)
+
+        self.assertEqual(resumen['omitidos'], 2)
+        self.assertEqual(sorted(llamada.args[0] for llamada in extraer.call_args_list),
+                         [self.usuarios[2].url_cvlac, self.usuarios[3].url_cvlac])
+
+    def test_subset_runs_use_their_own_checkpoint(self):
+        from . import scraping_utils
+
+        self.assertEqual(checkpoint_name(), 'perfiles')
+        self.assertEqual(checkpoint_name([3, 1]), checkpoint_name([1, 3, 3]))
+        self.assertNotEqual(checkpoint_name([1]), checkpoint_name([1, 3]))
+
+        with override_settings(INGEST_CHECKPOINT_DIR=self.directorio.name):
+            # Progreso de una ingesta completa interrumpida
+            compartido = Checkpoint(checkpoint_path(checkpoint_name()))
+            compartido.registrar(self.usuarios[0].id, {})
+
+            ids = [self.usuarios[0].id, self.usuarios[1].id]
+            with mock.patch.object(scraping_utils, 'extract_cvlac_info', side_effect=self._perfil) as extraer:
+                resumen = ingest_profiles(user_ids=ids, checkpoint=Checkpoint(checkpoint_path(checkpoint_name(ids))))
+
+        self.assertEqual((resumen['omitidos'], extraer.call_count), (0, 2))
+        self.assertEqual(compartido.completados(), {self.usuarios[0].id})
+
+    def test_checkpoint_in_use_is_rejected(self):
+        with self.checkpoint.en_uso(), self.assertRaises(CheckpointEnUso):
+            ingest_profiles(checkpoint=self.checkpoint)
+
+    def test_failed_users_are_retried_after_resume(self):
+        from . import scraping_utils
+
+        fallida, vacia = self.usuarios[1].url_cvlac, self.usuarios[2].url_cvlac
+
+        def extraer(url, ttl=None, pagina_importada=None):
+            if url == fallida:
+                raise ConnectionError("sin conexión")
+            return None if url == vacia else self._perfil(url)
+
+        def interrumpir(user_id, summary, hechos, total):
+            if hechos == total:
+                raise KeyboardInterrupt
+
+        with mock.patch.object(scraping_utils, 'extract_cvlac_info', side_effect=extraer), \
+                self.assertRaises(KeyboardInterrupt):
+            ingest_profiles(workers=2, checkpoint=self.checkpoint, progreso=interrumpir)
+        self.assertEqual(self.checkpoint.completados(), {self.usuarios[0].id, self.usuarios[3].id})
+
+        with mock.patch.object(scraping_utils, 'extract_cvlac_info', side_effect=self._perfil) as extraer:
+            resumen = ingest_profiles(workers=2, checkpoint=self.checkpoint)
+
+        self.assertEqual(resumen['omitidos'], 2)
+        self.assertEqual(sorted(llamada.args[0] for llamada in extraer.call_args_list), [fallida, vacia])
+        self.assertEqual(UsuarioHabilidades.objects.count(), 4)
+
+    def test_partially_saved_users_are_retried_after_resume(self):
+        from . import scraping_utils
+
+        def interrumpir(user_id, summary, hechos, total):
+            if hechos == total:
+                raise KeyboardInterrupt
+
+        # Falla la sección de habilidades de un usuario; las demás se guardan
+        insertar = UsuarioHabilidades.objects.bulk_create
+        parcial = self.usuarios[2]
+
+        def insertar_habilidades(filas, *args, **kwargs):
+            if any(fila.user_id_id == parcial.id for fila in filas):
+                raise DatabaseError("bloqueada")
+            return insertar(filas, *args, **kwargs)
+
+        with mock.patch.object(scraping_utils, 'extract_cvlac_info', side_effect=self._perfil), \
+                mock.patch.object(UsuarioHabilidades.objects, 'bulk_create', side_effect=insertar_habilidades), \
+                self.assertRaises(KeyboardInterrupt):
+            ingest_profiles(workers=2, checkpoint=self.checkpoint, progreso=interrumpir)
+        self.assertEqual(len(self.checkpoint.completados()), 3)
+        self.assertNotIn(parcial.id, self.checkpoint.completados())
+
+        with mock.patch.object(scraping_utils, 'extract_cvlac_info', side_effect=self._perfil) as extraer:
+            resumen = ingest_profiles(workers=2, checkpoint=self.checkpoint)
+
+        self.assertEqual([llamada.args[0] for llamada in extraer.call_args_list], [parcial.url_cvlac])
+        self.assertEqual(resumen['habilidades_added'], 1)
+        self.assertTrue(UsuarioHabilidades.objects.filter(user_id=parcial).exists())
+
+    def test_unchanged_profiles_are_not_saved(self):
+        from . import scraping_utils
+
+        with mock.patch.object(scraping_utils, 'extract_cvlac_info', side_effect=self._perfil):
+            ingest_profiles(workers=2)
+            # Mismo contenido que la última importación: se reconoce por su huella
+            with mock.patch.object(UsuarioHabilidades.objects, 'bulk_create') as insertar:
+                resumen = ingest_profiles(workers=2)
+
+        insertar.assert_not_called()
+        self.assertEqual(resumen['sin_cambios'], 4)
+        self.assertEqual(UsuarioHabilidades.objects.count(), 4)
+
+    def test_unchanged_pages_are_not_parsed(self):
+        from . import scraping_utils
+
+        html = (
+            '<a name="datos_generales"></a><table><tr><td>Nombre</td><td>Ana Prueba</td></tr>'
+            '<tr><td>Categoría</td><td>Junior</td></tr></table>'
+        )
+        with mock.patch.object(scraping_utils, 'fetch_page', return_value=html):
+            ingest_profiles(workers=2)
+            self.assertEqual(
+                set(PerfilImportado.objects.values_list('huella_pagina', flat=True)), {body_hash(html)}
+            )
+            with mock.patch.object(scraping_utils, 'parse_cvlac_html') as interpretar:
+                resumen = ingest_profiles(workers=2)
+
+        interpretar.assert_not_called()
+        self.assertEqual(resumen['sin_cambios'], 4)
+
+    def test_limits_concurrent_fetches_per_host(self):
+        from . import scraping_utils
+
+        activas, maximo, lock = [0], [0], threading.Lock()
+
+        def extraer(url, ttl=None, pagina_importada=None):
+            with lock:
+                activas[0] += 1
+                maximo[0] = max(maximo[0], activas[0])
+            time.sleep(0.05)
+            with lock:
+                activas[0] -= 1
+            return None
+
+        with mock.patch.object(scraping_utils, 'extract_cvlac_info', side_effect=extraer):
+            resumen = ingest_profiles(workers=4, por_host=1)
+
+        self.assertEqual(maximo[0], 1)
+        self.assertEqual(resumen['procesados'], 4)
+
+
+class HttpCacheTests(SimpleTestCase):
+    """Caché en disco de las páginas descargadas, con revalidación condicional."""
+
+    URL = 'https://scienti.minciencias.gov.co/cvlac/x'
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(HTTP_CACHE_DIR=directorio.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.session = mock.Mock()
+
+    def _respuesta(self, status=200, text='<html>perfil</html>', headers=None):
+        return mock.Mock(status_code=status, text=text,
+                         headers={'Content-Type': 'text/html; charset=utf-8', **(headers or {})})
+
+    def test_fresh_entry_skips_request(self):
+        self.session.get.return_value = self._respuesta(headers={'ETag': '"v1"'})
+        self.assertEqual(cached_get(self.session, self.URL, 5, ttl=60), '<html>perfil</html>')
+
+        self.session.get.return_value = self._respuesta(text='<html>perfil nuevo</html>')
+        self.assertEqual(cached_get(self.session, self.URL, 5, ttl=60), '<html>perfil</html>')
+        self.assertEqual(self.session.get.call_count, 1)
+
+    def test_zero_ttl_always_requests(self):
+        self.session.get.return_value = self._respuesta()
+        cached_get(self.session, self.URL, 5, ttl=60)
+
+        self.session.get.return_value = self._respuesta(text='<html>perfil nuevo</html>')
+        self.assertEqual(cached_get(self.session, self.URL, 5, ttl=0), '<html>perfil nuevo</html>')
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_revalidates_with_conditional_request(self):
+        self.session.get.return_value = self._respuesta(headers={'ETag': '"v1"', 'Last-Modified': 'Mon, 05 Oct 2026 10:00:00 GMT'})
+        cached_get(self.session, self.URL, 5, ttl=0)
+
+        self.session.get.return_value = self._respuesta(status=304, text='')
+        self.assertEqual(cached_get(self.session, self.URL, 5, ttl=0), '<html>perfil</html>')
+        self.assertEqual(self.session.get.call_args.kwargs['headers'], {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 05 Oct 2026 10:00:00 GMT',
+        })
+
+
+class ProfileChangeDetectionTests(TestCase):
+    """Importación de perfiles con huella de contenido y diferencias mínimas."""
+
+    PERFIL = {
+        'habilidades': [{'habilidad': 'Python', 'experiencia': '3 años'}],
+        'estudios': [{'estudio': 'Ingeniería de Sistemas', 'nivel': 3, 'year': 2015}],
+        'experiencia': [{'rol': 'Docente', 'tiempo': 5, 'actividades': 'Cátedra'}],
+    }
+
+    def setUp(self):
+        self.usuario = Usuario.objects.create(
+            nombres='Ana', apellidos='Pérez', email='ana@example.com', telefono=3000000000,
+            puesto_actual='Docente', dependencia='Ingeniería', url_cvlac='', url_linkedin='',
+            fecha_ingreso=timezone.now()
+        )
+
+    def test_hash_ignores_order_and_whitespace(self):
+        reordenado = {
+            'experiencia': self.PERFIL['experiencia'],
+            'habilidades': [{'habilidad': ' Python ', 'experiencia': '3  años'}],
+            'estudios': self.PERFIL['estudios'],
+            'publicaciones': ['No se guardan'],
+        }
+        self.assertEqual(profile_hash(self.PERFIL), profile_hash(reordenado))
+        self.assertNotEqual(profile_hash(self.PERFIL), profile_hash({**self.PERFIL, 'habilidades': []}))
+
+    def test_unchanged_profile_skips_save(self):
+        summary = new_summary()
+        save_user_data(self.usuario, self.PERFIL, 'CVLAC', summary, solo_cambios=True)
+        self.assertEqual((summary['habilidades_added'], summary['estudios_added'], summary['experiencia_added']), (1, 1, 1))
+        self.assertEqual(PerfilImportado.objects.get(user_id=self.usuario).huella, profile_hash(self.PERFIL))
+
+        summary = new_summary()
+        with CaptureQueriesContext(connection) as consultas:
+            save_user_data(self.usuario, self.PERFIL, 'CVLAC', summary, solo_cambios=True)
+        # Solo la consulta de la huella (además de los savepoints de la transacción)
+        self.assertEqual(len([q for q in consultas if 'SAVEPOINT' not in q['sql']]), 1)
+        self.assertEqual(summary['sin_cambios'], ['CVLAC'])
+
+    def test_changed_profile_inserts_only_new_items(self):
+        save_user_data(self.usuario, self.PERFIL, 'CVLAC', new_summary())
+        cambiado = {**self.PERFIL, 'habilidades': self.PERFIL['habilidades'] + [
+            {'habilidad': 'PYTHON', 'experiencia': ''},
+            {'habilidad': 'Django', 'experiencia': '1 año'},
+        ]}
+
+        summary = new_summary()
+        save_user_data(self.usuario, cambiado, 'CVLAC', summary, solo_cambios=True)
+        self.assertEqual((summary['habilidades_added'], summary['estudios_added'], summary['experiencia_added']), (1, 0, 0))
+        self.assertEqual(sorted(UsuarioHabilidades.objects.values_list('habilidad', flat=True)), ['Django', 'Python'])
+
+    def test_invalid_items_are_reported(self):
+        summary = new_summary()
+        save_user_data(self.usuario, {'estudios': [
+            {'estudio': 'Maestría', 'nivel': 'No especificado', 'year': 2020},
+            {'estudio': 'Doctorado', 'nivel': 5, 'year': 2024},
+        ]}, 'CVLAC', summary)
+        self.assertEqual(summary['estudios_added'], 1)
+        self.assertEqual(len(summary['errors']), 1)
+        self.assertEqual(list(UsuarioEstudios.objects.values_list('estudio', flat=True)), ['Doctorado'])
+        # Importación incompleta: sin huella, la siguiente la vuelve a procesar
+        self.assertFalse(PerfilImportado.objects.exists())
+
+    def test_failed_section_keeps_other_sections(self):
+        summary = new_summary()
+        with mock.patch.object(UsuarioEstudios.objects, 'bulk_create', side_effect=DatabaseError("bloqueada")):
+            save_user_data(self.usuario, self.PERFIL, 'CVLAC', summary, solo_cambios=True)
+        self.assertEqual((summary['habilidades_added'], summary['estudios_added'], summary['experiencia_added']), (1, 0, 1))
+        self.assertEqual(summary['errors'], ["Error al guardar estudios de CVLAC: bloqueada"])
+        self.assertEqual((UsuarioHabilidades.objects.count(), UsuarioEstudios.objects.count(), UsuarioExperiencia.objects.count()), (1, 0, 1))
+        self.assertFalse(PerfilImportado.objects.exists())
+
+        # El reintento completa la sección que faltaba y guarda la huella
+        summary = new_summary()
+        save_user_data(self.usuario, self.PERFIL, 'CVLAC', summary, solo_cambios=True)
+        self.assertEqual((summary['habilidades_added'], summary['estudios_added'], summary['experiencia_added']), (0, 1, 0))
+        self.assertEqual(PerfilImportado.objects.get(user_id=self.usuario).huella, profile_hash(self.PERFIL))
+
+
+class FeatureStoreTests(TestCase):
+    """Características materializadas por usuario y su invalidación."""
+
+    def setUp(self):
+        self.usuario = crear_usuario()
+
+    def test_refresh_computes_features(self):
+        UsuarioHabilidades.objects.create(user_id=self.usuario, habilidad='Python', experiencia='')
+        UsuarioConocimiento.objects.create(user_id=self.usuario, conocimiento='python', nivel=4)
+        UsuarioExperiencia.objects.create(user_id=self.usuario, rol='Docente', tiempo=5, actividades='Cátedra')
+
+        caracteristicas = refresh_user_features(self.usuario.id)
+        self.assertEqual((caracteristicas.num_habilidades, caracteristicas.num_conocimientos), (1, 1))
+        self.assertEqual(caracteristicas.max_tiempo_experiencia, 5)
+        self.assertEqual(caracteristicas.coherencia_habilidades_conocimientos, 1.0)
+        self.assertEqual(caracteristicas.habilidades, ['python'])
+        self.assertIsNone(refresh_user_features(0))
+
+    def test_signal_refreshes_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            UsuarioHabilidades.objects.create(user_id=self.usuario, habilidad='Python', experiencia='')
+        self.assertEqual(UsuarioCaracteristicas.objects.get(user_id=self.usuario).num_habilidades, 1)
+
+        # Dentro de TestCase las llamadas ya ejecutadas siguen en run_on_commit, así
+        # que el borrado se comprueba sobre la señal
+        with mock.patch('core.signals.schedule_feature_refresh') as programar:
+            UsuarioHabilidades.objects.filter(user_id=self.usuario).delete()
+        programar.assert_called_once_with(self.usuario.id)
+
+    def test_schedule_deduplicates_per_user(self):
+        otro = crear_usuario('otro@example.com')
+        with self.captureOnCommitCallbacks() as callbacks:
+            schedule_feature_refresh(self.usuario.id)
+            schedule_feature_refresh(self.usuario.id)
+            schedule_feature_refresh(otro.id)
+        self.assertEqual(len(callbacks), 2)
+
+    def test_load_rebuilds_missing_in_order(self):
+        otro = crear_usuario('otro@example.com')
+        refresh_user_features(otro.id)
+        UsuarioCaracteristicas.objects.filter(user_id=self.usuario).delete()
+
+        cargadas = load_user_features(Usuario.objects.filter(id__in=[self.usuario.id, otro.id]).order_by('-id'))
+        self.assertEqual([c.user_id_id for c in cargadas], [otro.id, self.usuario.id])
+        self.assertTrue(UsuarioCaracteristicas.objects.filter(user_id=self.usuario).exists())
+
+
+class TermIndexTests(TestCase):
+    """Índice disperso usuarios × términos y su sincronización incremental."""
+
+    def setUp(self):
+        self.usuario = crear_usuario()
+        UsuarioHabilidades.objects.create(user_id=self.usuario, habilidad='Diseño Web', experiencia='')
+        UsuarioConocimiento.objects.create(user_id=self.usuario, conocimiento='SQL', nivel=2)
+        UsuarioConocimiento.objects.create(user_id=self.usuario, conocimiento='Python', nivel=4)
+        refresh_user_features(self.usuario.id)
+
+    def test_match_normalizes_like_catalog(self):
+        indice = TermIndex().sync()
+        matches = indice.match([self.usuario.id], {' DISENO  web', 'Redes'}, {'sql', 'python', 'java'})
+
+        self.assertEqual(matches['match_habilidades'].tolist(), [0.5])
+        self.assertAlmostEqual(matches['match_conocimientos'][0], 2 / 3)
+        self.assertEqual(matches['promedio_nivel_conocimientos'].tolist(), [3.0])
+        self.assertEqual(matches['max_nivel_conocimientos'].tolist(), [4.0])
+
+    def test_sync_applies_only_newer_versions(self):
+        indice = TermIndex().sync()
+        version = indice.version
+        otro = crear_usuario('otro@example.com')
+        UsuarioHabilidades.objects.create(user_id=otro, habilidad='Redes', experiencia='')
+        refresh_user_features(otro.id)
+        UsuarioHabilidades.objects.create(user_id=self.usuario, habilidad='Redes', experiencia='')
+        refresh_user_features(self.usuario.id)
+        # La fecha no interviene: una escritura con el reloj atrasado también se incorpora
+        UsuarioCaracteristicas.objects.update(actualizado=timezone.now() - timedelta(days=1))
+
+        with mock.patch.object(indice, '_aplicar', wraps=indice._aplicar) as aplicar:
+            indice.sync()
+            indice.sync()
+        aplicar.assert_called_once()
+        self.assertEqual(indice.version, version + 2)
+        matches = indice.match([otro.id, self.usuario.id], {'redes'}, set())
+        self.assertEqual(matches['match_habilidades'].tolist(), [1.0, 1.0])
+
+
+class ModelRegistryTests(TestCase):
+    """Registro en disco de los modelos entrenados y su invalidación."""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(MODEL_REGISTRY_DIR=Path(directorio.name))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.directorio = Path(directorio.name)
+
+    def test_save_load_and_prune(self):
+        model_registry.save_model('basico_1_aaa', {'metrics': 1})
+        model_registry.save_model('basico_2_aaa', {'metrics': 2})
+        self.assertEqual(model_registry.load_model('basico_1_aaa'), {'metrics': 1})
+
+        # Una versión nueva del mismo tipo y proyecto reemplaza a la anterior
+        model_registry.save_model('basico_1_bbb', {'metrics': 3})
+        self.assertIsNone(model_registry.load_model('basico_1_aaa'))
+        self.assertEqual(sorted(ruta.name for ruta in self.directorio.iterdir()),
+                         ['basico_1_bbb.joblib', 'basico_2_aaa.joblib'])
+
+    def test_unreadable_model_is_ignored(self):
+        (self.directorio / 'basico_1_aaa.joblib').write_bytes(b'no es joblib')
+        self.assertIsNone(model_registry.load_model('basico_1_aaa'))
+
+    def test_key_changes_with_roles_and_profiles(self):
+        usuario = crear_usuario()
+        proyecto = crear_proyecto()
+        rol = ProyectoRoles.objects.create(project_id=proyecto, rol='Dev', habilidades='Python', experiencia='', conocimientos='')
+        usuarios = Usuario.objects.all()
+        refresh_user_features(usuario.id)
+        clave = model_registry.model_key('basico', proyecto.id, [rol], usuarios)
+        self.assertEqual(clave, model_registry.model_key('basico', proyecto.id, [rol], usuarios))
+
+        rol.habilidades = 'Python, SQL'
+        self.assertNotEqual(clave, model_registry.model_key('basico', proyecto.id, [rol], usuarios))
+        rol.habilidades = 'Python'
+
+        UsuarioHabilidades.objects.create(user_id=usuario, habilidad='SQL', experiencia='')
+        refresh_user_features(usuario.id)
+        self.assertNotEqual(clave, model_registry.model_key('basico', proyecto.id, [rol], usuarios))
+
+    def test_saved_state_is_restored_before_preparing_data(self):
+        # Usuario nuevo, sin fila de características: prepare_data la construye
+        crear_usuario()
+        self.assertFalse(UsuarioCaracteristicas.objects.exists())
+        proyecto = crear_proyecto()
+        metricas = tuple({'accuracy': 1, 'precision': 1, 'recall': 1, 'f1': 1} for _ in range(3))
+
+        orden = []
+        recommender = mock.Mock()
+        recommender.load_state.side_effect = lambda estado: orden.append('load_state') or estado['metrics']
+        recommender.prepare_data.side_effect = lambda usuarios, roles: (
+            orden.append('prepare_data') or load_user_features(usuarios) and ([], [])
+        )
+        recommender.train_models.return_value = metricas
+        recommender.export_state.side_effect = lambda metricas: {'metrics': metricas}
+        recommender.get_recommendations.return_value = []
+
+        with mock.patch.object(tasks.ml_models, 'RecommendationSystem', return_value=recommender), \
+                mock.patch.object(tasks, 'save_recommendations'):
+            for _ in range(2):
+                tasks._generar_basico(mock.Mock(), proyecto, Usuario.objects.all(), ProyectoRoles.objects.none())
+
+        # La segunda ejecución encuentra el modelo guardado con la clave posterior a la reconstrucción
+        recommender.train_models.assert_called_once()
+        self.assertEqual(orden, ['prepare_data', 'load_state', 'prepare_data'])
+
+
+class CNNScorerKeyTests(TestCase):
+    """La CNN se identifica por esquema y datos, y se reentrena cuando cambian."""
+
+    COLUMNAS = ['a', 'b', 'c']
+
+    def test_key_changes_with_profiles(self):
+        usuario = crear_usuario()
+        usuarios = Usuario.objects.all()
+        refresh_user_features(usuario.id)
+        clave = cnn_scorer.cnn_model_key(self.COLUMNAS, 1, [], usuarios)
+        self.assertTrue(clave.startswith(f"cnn-{cnn_scorer.feature_schema_hash(self.COLUMNAS)}_1_"))
+        self.assertEqual(clave, cnn_scorer.cnn_model_key(self.COLUMNAS, 1, [], usuarios))
+
+        UsuarioHabilidades.objects.create(user_id=usuario, habilidad='SQL', experiencia='')
+        refresh_user_features(usuario.id)
+        self.assertNotEqual(clave, cnn_scorer.cnn_model_key(self.COLUMNAS, 1, [], usuarios))
+
+    def test_training_set_key_changes_with_data(self):
+        X = [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+        self.assertEqual(cnn_scorer.training_set_key(self.COLUMNAS, X), cnn_scorer.training_set_key(self.COLUMNAS, X))
+        self.assertNotEqual(cnn_scorer.training_set_key(self.COLUMNAS, X),
+                            cnn_scorer.training_set_key(self.COLUMNAS, X[:1]))
+
+    def test_scorers_in_memory_are_bounded(self):
+        with mock.patch.object(cnn_scorer, '_scorers', cnn_scorer.OrderedDict()), \
+                mock.patch.object(cnn_scorer, 'MAX_SCORERS_EN_MEMORIA', 2):
+            primero = cnn_scorer.get_cnn_scorer(self.COLUMNAS, 'cnn-x_1_a')
+            cnn_scorer.get_cnn_scorer(self.COLUMNAS, 'cnn-x_2_a')
+            self.assertIs(cnn_scorer.get_cnn_scorer(self.COLUMNAS, 'cnn-x_1_a'), primero)
+            cnn_scorer.get_cnn_scorer(self.COLUMNAS, 'cnn-x_3_a')
+            self.assertEqual(list(cnn_scorer._scorers), ['cnn-x_1_a', 'cnn-x_3_a'])
+
+    def test_latest_key_for_warm_up(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(MODEL_REGISTRY_DIR=Path(directorio)):
+            self.assertIsNone(cnn_scorer.latest_cnn_scorer(self.COLUMNAS))
+            tipo = f"cnn-{cnn_scorer.feature_schema_hash(self.COLUMNAS)}"
+            for i, nombre in enumerate((f'{tipo}_1_a', f'{tipo}_2_a')):
+                ruta = Path(directorio) / f'{nombre}.keras'
+                ruta.write_bytes(b'')
+                os.utime(ruta, (1000 + i, 1000 + i))
+            self.assertEqual(model_registry.latest_key(tipo, 'keras'), f'{tipo}_2_a')
+
+
+class TopKTests(SimpleTestCase):
+    """Selección de los k mejores candidatos."""
+
+    def test_orders_descending_and_filters_min_score(self):
+        scores = [0.1, 0.9, 0.5, 0.3, 0.7]
+        self.assertEqual(top_k(scores, 10).tolist(), [1, 4, 2])
+        self.assertEqual(top_k(scores, 2).tolist(), [1, 4])
+        self.assertEqual(top_k(scores, 10, min_score=None).tolist(), [1, 4, 2, 3, 0])
+
+    def test_ties_keep_lowest_index_first(self):
+        scores = [0.5, 0.8, 0.5, 0.8, 0.5]
+        self.assertEqual(top_k(scores, 3).tolist(), [1, 3, 0])
+        self.assertEqual(top_k(scores, 4).tolist(), [1, 3, 0, 2])
+
+    def test_matches_full_sort(self):
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 20, 1000) / 20
+        esperado = sorted((i for i in range(len(scores)) if scores[i] > 0.3), key=lambda i: (-scores[i], i))[:25]
+        self.assertEqual(top_k(scores, 25).tolist(), esperado)
+
+    def test_empty_and_nan(self):
+        self.assertEqual(top_k([], 5).tolist(), [])
+        self.assertEqual(top_k([0.9, 0.8], 0).tolist(), [])
+        self.assertEqual(top_k([float('nan'), 0.4], 5, min_score=None).tolist(), [1])
+
+
+class PlatformStatsScheduleTests(TestCase):
+    """Programación del recálculo del resumen de plataforma."""
+
+    def setUp(self):
+        refresh_platform_stats()
+
+    def _callback(self):
+        """
+        Función programada al confirmar. Dentro de TestCase las ya ejecutadas
+        siguen en run_on_commit, así que se captura una vez y se llama varias.
+        """
+        with self.captureOnCommitCallbacks() as callbacks:
+            schedule_stats_refresh()
+        self.assertEqual(len(callbacks), 1)
+        return callbacks[0]
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+    def test_enqueues_once_while_pending(self):
+        refrescar = self._callback()
+        with mock.patch.object(tasks.refrescar_estadisticas_task, 'delay') as encolar:
+            refrescar()
+            refrescar()
+        encolar.assert_called_once()
+        self.assertTrue(EstadisticasPlataforma.objects.get().desactualizado)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+    def test_failed_enqueue_clears_flag(self):
+        refrescar = self._callback()
+        with mock.patch.object(tasks.refrescar_estadisticas_task, 'delay', side_effect=ConnectionError) as encolar:
+            refrescar()
+            self.assertFalse(EstadisticasPlataforma.objects.get().desactualizado)
+            # El siguiente cambio vuelve a intentarlo
+            refrescar()
+        self.assertEqual(encolar.call_count, 2)
+
+    def test_data_changes_schedule_refresh(self):
+        with mock.patch('core.signals.schedule_stats_refresh') as programar:
+            proyecto = crear_proyecto()
+            ProyectoRoles.objects.create(project_id=proyecto, rol='Dev', habilidades='Python', experiencia='', conocimientos='')
+            proyecto.delete()
+        # Alta del proyecto, alta del rol y borrado en cascada de ambos
+        self.assertEqual(programar.call_count, 4)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+    def test_without_broker_recomputes_on_read(self):
+        refrescar = self._callback()
+        crear_usuario()
+        with mock.patch.object(tasks.refrescar_estadisticas_task, 'delay') as encolar:
+            refrescar()
+        encolar.assert_not_called()
+        self.assertTrue(EstadisticasPlataforma.objects.get().desactualizado)
+
+        estadisticas = get_platform_stats()
+        self.assertEqual(estadisticas.total_usuarios, 1)
+        self.assertFalse(estadisticas.desactualizado)
+
+
+class RecommendationReportTests(TestCase):
+    """Niveles de confianza y agregados de las recomendaciones guardadas."""
+
+    def setUp(self):
+        self.proyecto = crear_proyecto()
+        self.usuarios = [crear_usuario(f'u{i}@example.com') for i in range(5)]
+
+    def _guardar(self, scores):
+        return save_recommendations(self.proyecto, {}, [
+            {'user_id': usuario.id, 'score_combinado': score, 'score_rf': 0, 'score_knn': 0, 'score_nn': score}
+            for usuario, score in zip(self.usuarios, scores)
+        ])
+
+    def test_confidence_levels_match_model_thresholds(self):
+        recomendacion = self._guardar([0.95, 0.7, 0.6, 0.5, 0.1])
+        filas = recomendacion.usuarios_recomendados.order_by('ranking')
+        self.assertEqual([fila.nivel_confianza for fila in filas], ['Alta', 'Media', 'Media', 'Baja', 'Baja'])
+        self.assertEqual([fila.nivel_confianza for fila in filas], [fila.get_nivel_confianza() for fila in filas])
+        self.assertEqual([fila.ranking for fila in filas], [1, 2, 3, 4, 5])
+
+    def test_score_histogram(self):
+        recomendacion = self._guardar([0.95, 0.7, 0.6, 0.5, 0.05])
+        filas = recomendacion.usuarios_recomendados.all()
+        with self.assertNumQueries(1):
+            histograma = score_histogram(filas)
+        self.assertEqual(
+            (histograma['alta_confianza'], histograma['media_confianza'], histograma['baja_confianza']), (1, 2, 2)
+        )
+        self.assertEqual(
+            [rango['cantidad'] for rango in histograma['rangos']], [1, 0, 0, 0, 0, 1, 1, 1, 0, 1]
+        )
+
+        inclusivo = score_histogram(filas, umbrales_inclusivos=True)
+        self.assertEqual(
+            (inclusivo['alta_confianza'], inclusivo['media_confianza'], inclusivo['baja_confianza']), (2, 2, 1)
+        )
+
+    def test_recommendations_by_month_window(self):
+        antigua, anterior, actual = (self._guardar([0.9]) for _ in range(3))
+        ahora = timezone.now()
+        RecomendacionProyecto.objects.filter(id=antigua.id).update(fecha_recomendacion=ahora - timedelta(days=400))
+        RecomendacionProyecto.objects.filter(id=anterior.id).update(fecha_recomendacion=ahora - timedelta(days=40))
+
+        serie = list(recommendations_by_month())
+        self.assertEqual([fila['cantidad'] for fila in serie], [1, 1])
+        self.assertLess(serie[0]['mes'], serie[1]['mes'])
+        self.assertEqual([fila['cantidad'] for fila in recommendations_by_month(dias=500)], [1, 1, 1])
+
+
+class PdfCacheTests(TestCase):
+    """Claves (ETag) y caché en disco de los PDF exportados."""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ajustes = override_settings(PDF_CACHE_DIR=Path(directorio.name))
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.directorio = Path(directorio.name)
+
+        self.proyecto = crear_proyecto()
+        self.usuario = crear_usuario()
+        self.recomendacion = save_recommendations(self.proyecto, {}, [
+            {'user_id': self.usuario.id, 'score_combinado': 0.8, 'score_rf': 0, 'score_knn': 0, 'score_nn': 0.8}
+        ])
+        refresh_platform_stats()
+
+    def test_recommendation_key_follows_rendered_data(self):
+        clave = recommendation_pdf_key(self.recomendacion.id)
+        self.assertEqual(clave, recommendation_pdf_key(self.recomendacion.id))
+        self.assertIsNone(recommendation_pdf_key(self.recomendacion.id + 1))
+
+        Usuario.objects.filter(id=self.usuario.id).update(apellidos='Gómez')
+        renombrado = recommendation_pdf_key(self.recomendacion.id)
+        self.assertNotEqual(clave, renombrado)
+        Proyecto.objects.filter(id=self.proyecto.id).update(nombre='Otro proyecto')
+        self.assertNotEqual(renombrado, recommendation_pdf_key(self.recomendacion.id))
+
+    def test_platform_key_follows_monthly_series(self):
+        clave = platform_report_pdf_key()
+        actualizado = EstadisticasPlataforma.objects.get().actualizado
+
+        # La serie mensual se consulta en vivo, sin esperar al recálculo
+        otra = save_recommendations(self.proyecto, {}, [])
+        self.assertEqual(EstadisticasPlataforma.objects.get().actualizado, actualizado)
+        self.assertNotEqual(clave, platform_report_pdf_key())
+
+        otra.delete()
+        self.assertEqual(clave, platform_report_pdf_key())
+
+    def test_renders_once_and_prunes_previous_version(self):
+        render = mock.Mock(side_effect=lambda destino: Path(destino).write_bytes(b'%PDF-1'))
+        clave = recommendation_pdf_key(self.recomendacion.id)
+        for _ in range(2):
+            response = cached_pdf_response(clave, 'informe.pdf', render)
+            self.assertEqual(b''.join(response.streaming_content), b'%PDF-1')
+            response.close()
+        render.assert_called_once()
+        self.assertEqual(response['ETag'], f'"{clave}"')
+
+        os.utime(self.directorio / f'{clave}.pdf', (1000, 1000))
+        Usuario.objects.filter(id=self.usuario.id).update(nombres='Eva')
+        nueva = recommendation_pdf_key(self.recomendacion.id)
+        cached_pdf_response(nueva, 'informe.pdf', render).close()
+        self.assertEqual([ruta.name for ruta in self.directorio.iterdir()], [f'{nueva}.pdf'])
+
+    def test_stale_request_does_not_prune_newer_version(self):
+        render = mock.Mock(side_effect=lambda destino: Path(destino).write_bytes(b'%PDF-1'))
+        clave = recommendation_pdf_key(self.recomendacion.id)
+        Usuario.objects.filter(id=self.usuario.id).update(nombres='Eva')
+        nueva = recommendation_pdf_key(self.recomendacion.id)
+
+        respuesta_nueva = cached_pdf_response(nueva, 'informe.pdf', render)
+        os.utime(self.directorio / f'{nueva}.pdf', (2 ** 32, 2 ** 32))
+        # Una petición que calculó la clave antes del cambio genera su versión
+        # sin eliminar la más reciente
+        respuesta_vieja = cached_pdf_response(clave, 'informe.pdf', render)
+        self.assertEqual(sorted(ruta.name for ruta in self.directorio.iterdir()), sorted([f'{clave}.pdf', f'{nueva}.pdf']))
+
+        # El archivo abierto sigue siendo legible aunque se elimine
+        (self.directorio / f'{nueva}.pdf').unlink()
+        self.assertEqual(b''.join(respuesta_nueva.streaming_content), b'%PDF-1')
+        respuesta_nueva.close()
+        respuesta_vieja.close()
+
+    def test_deleting_recommendation_discards_pdf(self):
+        clave = recommendation_pdf_key(self.recomendacion.id)
+        cached_pdf_response(clave, 'informe.pdf', lambda destino: Path(destino).write_bytes(b'%PDF-1')).close()
+        self.assertTrue((self.directorio / f'{clave}.pdf').exists())
+
+        self.recomendacion.delete()
+        self.assertEqual(list(self.directorio.iterdir()), [])
+
+    def test_view_computes_key_once(self):
+        from . import views
+
+        self.client.force_login(get_user_model().objects.create_user('admin', password='x'))
+        url = reverse('exportar_recomendaciones_pdf', kwargs={'recomendacion_id': self.recomendacion.id})
+        with mock.patch.object(views, 'recommendation_pdf_key', wraps=recommendation_pdf_key) as calcular, \
+                mock.patch.object(views, '_render_recomendacion_pdf',
+                                  side_effect=lambda destino, recomendacion: Path(destino).write_bytes(b'%PDF-1')):
+            response = self.client.get(url)
+            self.assertEqual(b''.join(response.streaming_content), b'%PDF-1')
+            response.close()
+        self.assertEqual(response.status_code, 200)
+        calcular.assert_called_once_with(self.recomendacion.id)
+
+    def test_matching_etag_returns_not_modified(self):
+        self.client.force_login(get_user_model().objects.create_user('admin', password='x'))
+        url = reverse('exportar_recomendaciones_pdf', kwargs={'recomendacion_id': self.recomendacion.id})
+        clave = recommendation_pdf_key(self.recomendacion.id)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=f'"{clave}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(list(self.directorio.iterdir()), [])
@@ -0,0 +1,84 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+# Máximo de resultados de escaneo de experiencias guardados en memoria
+EXPERIENCE_CACHE_SIZE = 200_000
+
+
+class _LRUCache:
+    """Caché LRU acotada y segura entre hilos."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_experience_cache = _LRUCache(EXPERIENCE_CACHE_SIZE)
+
+
+class TermMatcher:
+    """
+    Busca varios términos a la vez en un texto con una única expresión
+    regular compilada (alternancia), construida una vez por proyecto.
+
+    Equivale a `any(t in texto for t in terms)` pero recorre el texto una
+    sola vez en lugar de una vez por término.
+    """
+
+    def __init__(self, terms):
+        self.terms = frozenset(t for t in terms if t)
+        # Identificador estable del conjunto de términos para la caché
+        self.terms_hash = hashlib.sha1('\x1f'.join(sorted(self.terms)).encode('utf-8')).hexdigest()
+        self.pattern = None
+        if self.terms:
+            # Los términos más largos primero para que la alternancia no los oculte
+            ordenados = sorted(self.terms, key=len, reverse=True)
+            self.pattern = re.compile('|'.join(re.escape(t) for t in ordenados))
+
+    def contains_any(self, texto):
+        """Indica si el texto contiene alguno de los términos."""
+        return bool(self.pattern and self.pattern.search(texto))
+
+    def experiencia_relevante(self, perfil):
+        """
+        Suma el tiempo de las experiencias cuyas actividades mencionan alguno
+        de los términos.
+
+        El resultado de cada experiencia se guarda por (experiencia, versión
+        del perfil, conjunto de términos), así que las ejecuciones repetidas
+        para el mismo proyecto no vuelven a escanear textos sin cambios.
+
+        Args:
+            perfil: Instancia de UsuarioCaracteristicas
+        """
+        total = 0
+        for exp_id, tiempo, actividades in perfil.experiencias:
+            clave = (exp_id, perfil.actualizado, self.terms_hash)
+            relevante = _experience_cache.get(clave)
+            if relevante is None:
+                relevante = self.contains_any(actividades)
+                _experience_cache.set(clave, relevante)
+            if relevante:
+                total += tiempo
+        return total
@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+
+def corpus_fingerprint(ids, textos, **params):
+    """Huella del corpus de profesionales y de los parámetros del vectorizador."""
+    huella = hashlib.sha1(repr(sorted(params.items())).encode('utf-8'))
+    for id_, texto in zip(ids, textos):
+        huella.update(f"{id_}\x1f{texto}\x1e".encode('utf-8'))
+    return huella.hexdigest()[:16]
+
+
+class TfidfIndex:
+    """
+    Índice TF-IDF sobre el corpus de profesionales.
+
+    El vocabulario y el IDF se ajustan una sola vez; la matriz dispersa de
+    profesionales (filas normalizadas L2) se guarda en disco como .npz y el
+    vectorizador como .joblib. Al consultar solo se transforma el texto del
+    proyecto, y la similitud coseno es un producto disperso.
+    """
+
+    def __init__(self, max_features=1000, stop_words='english'):
+        self.max_features = max_features
+        self.stop_words = stop_words
+        self.vectorizer = None
+        self.matrix = None
+        self.ids = None
+
+    @property
+    def params(self):
+        return {'max_features': self.max_features, 'stop_words': self.stop_words}
+
+    def fit(self, ids, textos):
+        """Ajusta el vocabulario y el IDF y vectoriza a los profesionales."""
+        self.vectorizer = TfidfVectorizer(**self.params)
+        self.matrix = self.vectorizer.fit_transform(textos).tocsr()
+        self.ids = np.asarray(ids)
+        return self
+
+    def transform(self, textos):
+        """Vectoriza textos de consulta con el vocabulario del índice."""
+        return self.vectorizer.transform(textos)
+
+    def similarity(self, textos):
+        """
+        Similitud coseno entre cada profesional y cada texto de consulta.
+
+        Returns:
+            np.ndarray: Matriz (profesionales × textos)
+        """
+        return (self.matrix @ self.transform(textos).T).toarray()
+
+    def _paths(self, directorio, nombre):
+        base = Path(directorio) / nombre
+        return base.with_suffix('.npz'), base.with_suffix('.joblib')
+
+    def save(self, directorio, nombre):
+        """Guarda el índice de forma atómica."""
+        Path(directorio).mkdir(parents=True, exist_ok=True)
+        ruta_matriz, ruta_vectorizador = self._paths(directorio, nombre)
+        for ruta, escribir in (
+                (ruta_matriz, lambda destino: sp.save_npz(destino, self.matrix)),
+                (ruta_vectorizador, lambda destino: joblib.dump({'vectorizer': self.vectorizer, 'ids': self.ids}, destino))):
+            fd, temporal = tempfile.mkstemp(dir=directorio, suffix=f'.tmp{ruta.suffix}')
+            os.close(fd)
+            try:
+                escribir(temporal)
+                os.replace(temporal, ruta)
+            finally:
+                Path(temporal).unlink(missing_ok=True)
+
+    def load(self, directorio, nombre):
+        """
+        Carga el índice guardado.
+
+        Returns:
+            bool: True si existía y se pudo leer
+        """
+        ruta_matriz, ruta_vectorizador = self._paths(directorio, nombre)
+        if not (ruta_matriz.exists() and ruta_vectorizador.exists()):
+            return False
+        try:
+            estado = joblib.load(ruta_vectorizador)
+            self.vectorizer = estado['vectorizer']
+            self.ids = estado['ids']
+            self.matrix = sp.load_npz(ruta_matriz).tocsr()
+            return True
+        except Exception as e:
+            logger.warning(f"Error cargando índice TF-IDF {nombre}: {e}")
+            return False
+
+
+def load_or_build_index(directorio, ids, textos, max_features=1000, stop_words='english'):
+    """
+    Obtiene el índice TF-IDF del corpus, cargándolo del disco si el corpus
+    no cambió o construyéndolo y guardándolo en caso contrario.
+
+    Args:
+        directorio: Carpeta del índice; None para no persistirlo
+        ids: IDs de los profesionales
+        textos: Texto completo de cada profesional
+        max_features: Tamaño máximo del vocabulario
+    """
+    index = TfidfIndex(max_features=max_features, stop_words=stop_words)
+    if directorio is None:
+        return index.fit(ids, textos)
+
+    prefijo = f"tfidf{max_features}"
+    nombre = f"{prefijo}_{corpus_fingerprint(ids, textos, **index.params)}"
+    if index.load(directorio, nombre):
+        return index
+
+    index.fit(ids, textos)
+    index.save(directorio, nombre)
+    # Eliminar índices de corpus anteriores
+    for anterior in Path(directorio).glob(f"{prefijo}_*"):
+        if anterior.stem != nombre:
+            anterior.unlink(missing_ok=True)
+    logger.info(f"Índice TF-IDF {nombre} construido con {len(textos)} profesionales")
+    return index
@@ -19,6 +19,7 @@ urlpatterns = [
     
     # URLs para procesamiento de datos
     path('usuarios/<int:pk>/procesar-datos/', views.process_user_data_view, name='process_user_data'),
+    path('usuarios/procesar-datos/', views.ingest_profiles_view, name='ingest_profiles'),
     
     # URLs para gestión de habilidades
     path('usuarios/<int:user_id>/habilidades/agregar/', views.add_user_skill, name='add_user_skill'),
@@ -65,6 +66,8 @@ urlpatterns = [
     path('proyectos/<int:proyecto_id>/recomendaciones/generar-cnn/', views.generar_recomendaciones_cnn, name='generar_recomendaciones_cnn'),
     path('recomendaciones-cnn/<int:recomendacion_id>/', views.RecomendacionCNNDetailView.as_view(), name='ver_recomendaciones_cnn'),
     path('recomendaciones/<int:recomendacion_id>/exportar-pdf/', views.exportar_recomendaciones_pdf, name='exportar_recomendaciones_pdf'),
+    path('recomendaciones/tareas/<str:task_id>/', views.recomendacion_job, name='recomendacion_job'),
+    path('tareas/<str:task_id>/estado/', views.check_task_status, name='check_task_status'),
     
     # Autenticación
     path('login/', auth_views.LoginView.as_view(template_name='core/login.html'), name='login'),
@@ -3,38 +3,45 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.urls import reverse_lazy, reverse
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.http import JsonResponse, HttpResponse
-from django.views.decorators.http import require_POST
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_POST
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
 from .models import (
     Proyecto, ProyectoRoles, ProyectoAliados, ProyectoProductos,
     Usuario, UsuarioHabilidades, UsuarioConocimiento, UsuarioEstudios, UsuarioExperiencia,
-    RecomendacionProyecto, RecomendacionUsuario
+    RecomendacionProyecto, RecomendacionUsuario, Termino, lower_exact
 )
 from .data_services import process_user_data
 from django import forms
 import logging
 import datetime
-from .ml_models import RecommendationSystem
+from .tasks import generar_recomendaciones_task, ingestar_perfiles_task
+from .pdf_cache import cached_pdf_response, platform_report_pdf_key, recommendation_pdf_key, request_pdf_key
+from .platform_stats import get_platform_stats, recommendations_by_month
+from .recommendation_store import score_histogram
 from .forms import (
     UsuarioForm, HabilidadFormSet, ConocimientoFormSet,
     EstudioFormSet, ExperienciaFormSet
 )
-from .advanced_ml_models import AdvancedRecommendationSystem
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from .lazy_imports import lazy_import
 import io
-from django.db.models import Count, Avg, Q, Max
+from django.db.models import Count, Q, Max
 from django.utils import timezone
 from datetime import datetime, timedelta
+from celery.result import AsyncResult
+from django_celery_results.models import TaskResult
 
 logger = logging.getLogger(__name__)
 
+# ReportLab solo se carga al exportar un PDF
+pagesizes = lazy_import('reportlab.lib.pagesizes')
+platypus = lazy_import('reportlab.platypus')
+rl_styles = lazy_import('reportlab.lib.styles')
+units = lazy_import('reportlab.lib.units')
+colors = lazy_import('reportlab.lib.colors')
+enums = lazy_import('reportlab.lib.enums')
+
 # Create your views here.
 
 class HomeView(LoginRequiredMixin, TemplateView):
@@ -556,10 +563,11 @@ def add_user_skill(request, user_id):
                 messages.error(request, "La habilidad no puede estar vacía.")
                 return redirect('usuario_detail', pk=user_id)
             
-            # Verificar si ya existe
+            # Verificar si ya existe (mismo término del catálogo)
+            termino = Termino.obtener(habilidad)
             existing = UsuarioHabilidades.objects.filter(
                 user_id=usuario,
-                habilidad__iexact=habilidad
+                termino=termino
             ).first()
             
             if existing:
@@ -568,6 +576,7 @@ def add_user_skill(request, user_id):
                 UsuarioHabilidades.objects.create(
                     user_id=usuario,
                     habilidad=habilidad,
+                    termino=termino,
                     experiencia=experiencia
                 )
                 messages.success(request, f"Habilidad '{habilidad}' añadida exitosamente.")
@@ -601,10 +610,11 @@ def add_user_knowledge(request, user_id):
                 messages.error(request, "El conocimiento no puede estar vacío.")
                 return redirect('usuario_detail', pk=user_id)
             
-            # Verificar si ya existe
+            # Verificar si ya existe (mismo término del catálogo)
+            termino = Termino.obtener(conocimiento)
             existing = UsuarioConocimiento.objects.filter(
                 user_id=usuario,
-                conocimiento__iexact=conocimiento
+                termino=termino
             ).first()
             
             if existing:
@@ -613,6 +623,7 @@ def add_user_knowledge(request, user_id):
                 UsuarioConocimiento.objects.create(
                     user_id=usuario,
                     conocimiento=conocimiento,
+                    termino=termino,
                     nivel=nivel
                 )
                 messages.success(request, f"Conocimiento '{conocimiento}' añadido exitosamente.")
@@ -649,8 +660,8 @@ def add_user_study(request, user_id):
             
             # Verificar si ya existe
             existing = UsuarioEstudios.objects.filter(
+                lower_exact('estudio', estudio),
                 user_id=usuario,
-                estudio__iexact=estudio,
                 nivel=nivel
             ).first()
             
@@ -698,8 +709,8 @@ def add_user_experience(request, user_id):
             
             # Verificar si ya existe
             existing = UsuarioExperiencia.objects.filter(
-                user_id=usuario,
-                rol__iexact=rol
+                lower_exact('rol', rol),
+                user_id=usuario
             ).first()
             
             if existing:
@@ -813,6 +824,10 @@ def check_task_status(request, task_id):
             'status': task_result.status,
         }
         
+        # Etapa actual de las tareas que reportan progreso
+        if task_result.status == 'PROGRESS' and isinstance(task_result.info, dict):
+            data['etapa'] = task_result.info.get('etapa')
+        
         # Si la tarea está completa, incluir el resultado
         if task_result.ready():
             if task_result.successful():
@@ -837,6 +852,11 @@ def check_task_status(request, task_id):
                     
                     if 'errors' in result and result['errors']:
                         data['warnings'] = result['errors']
+                    
+                    # Tareas de recomendación: página a la que redirigir
+                    if result.get('url'):
+                        data['redirect_url'] = result['url']
+                        success_msg = "Recomendaciones generadas exitosamente."
                 
                 data['success_message'] = success_msg
             else:
@@ -1098,8 +1118,8 @@ def add_proyecto_rol(request, proyecto_id):
             
             # Verificar si ya existe
             existing = ProyectoRoles.objects.filter(
-                project_id=proyecto,
-                rol__iexact=rol
+                lower_exact('rol', rol),
+                project_id=proyecto
             ).first()
             
             if existing:
@@ -1146,8 +1166,8 @@ def add_proyecto_aliado(request, proyecto_id):
             
             # Verificar si ya existe
             existing = ProyectoAliados.objects.filter(
-                project_id=proyecto,
-                entidad__iexact=entidad
+                lower_exact('entidad', entidad),
+                project_id=proyecto
             ).first()
             
             if existing:
@@ -1193,8 +1213,8 @@ def add_proyecto_producto(request, proyecto_id):
             
             # Verificar si ya existe
             existing = ProyectoProductos.objects.filter(
+                lower_exact('producto', producto),
                 project_id=proyecto,
-                producto__iexact=producto,
                 tipo=tipo
             ).first()
             
@@ -1277,70 +1297,66 @@ def delete_proyecto_producto(request, pk):
     return redirect('proyecto_detail', pk=proyecto_id)
 
 @login_required
-def generar_recomendaciones(request, proyecto_id):
+@require_POST
+def ingest_profiles_view(request):
     """
-    Vista para generar recomendaciones de usuarios para un proyecto
+    Encola la ingesta masiva de perfiles de todos los usuarios (o de los
+    indicados en `user_ids`). El estado se consulta en check_task_status.
     """
+    user_ids = [int(user_id) for user_id in request.POST.getlist('user_ids') if user_id.isdigit()] or None
     try:
-        # Obtener el proyecto
-        proyecto = get_object_or_404(Proyecto, id=proyecto_id)
-        
-        # Obtener todos los usuarios
-        usuarios = Usuario.objects.all()
-        
-        # Obtener roles del proyecto
-        roles_proyecto = ProyectoRoles.objects.filter(project_id=proyecto)
-        
-        # Inicializar sistema de recomendación
-        recommender = RecommendationSystem()
-        
-        # Preparar datos
-        X, user_ids = recommender.prepare_data(usuarios, roles_proyecto)
-        
-        # Entrenar modelos y obtener métricas
-        rf_scores, knn_scores, nn_scores = recommender.train_models(X, user_ids)
-        
-        # Obtener recomendaciones (ahora 10 candidatos)
-        recommendations = recommender.get_recommendations(X, user_ids, top_n=10)
-        
-        # Guardar resultados en la base de datos
-        recomendacion = RecomendacionProyecto.objects.create(
-            project_id=proyecto,
-            rf_accuracy=rf_scores['accuracy'],
-            rf_precision=rf_scores['precision'],
-            rf_recall=rf_scores['recall'],
-            rf_f1=rf_scores['f1'],
-            knn_accuracy=knn_scores['accuracy'],
-            knn_precision=knn_scores['precision'],
-            knn_recall=knn_scores['recall'],
-            knn_f1=knn_scores['f1'],
-            nn_accuracy = nn_scores['accuracy'],
-            nn_precision = nn_scores['precision'],
-            nn_recall = nn_scores['recall'],
-            nn_f1 = nn_scores['f1']
-        )
-        
-        # Guardar recomendaciones de usuarios
-        for idx, rec in enumerate(recommendations, 1):
-            usuario = Usuario.objects.get(id=rec['user_id'])
-            RecomendacionUsuario.objects.create(
-                recomendacion_id=recomendacion,
-                user_id=usuario,
-                score_combinado=rec['score'],
-                score_rf=rec['rf_score'],
-                score_knn=rec['knn_score'],
-                score_nn=rec['nn_score'],
-                ranking=idx
-            )
-        
-        messages.success(request, "Recomendaciones generadas exitosamente.")
-        return redirect('ver_recomendaciones', recomendacion_id=recomendacion.id)
-    
+        tarea = ingestar_perfiles_task.delay(user_ids)
+    except Exception as e:
+        logger.error(f"Error encolando ingesta de perfiles: {str(e)}")
+        return JsonResponse({'error': str(e)}, status=500)
+
+    return JsonResponse({
+        'task_id': tarea.id,
+        'status_url': reverse('check_task_status', kwargs={'task_id': tarea.id}),
+    }, status=202)
+
+def _encolar_recomendaciones(request, proyecto_id, tipo):
+    """
+    Encola la generación de recomendaciones y redirige a la página de
+    seguimiento de la tarea.
+    """
+    proyecto = get_object_or_404(Proyecto, id=proyecto_id)
+    try:
+        tarea = generar_recomendaciones_task.delay(proyecto.id, tipo)
     except Exception as e:
-        logger.error(f"Error generando recomendaciones: {str(e)}")
+        logger.error(f"Error encolando recomendación {tipo}: {str(e)}")
         messages.error(request, f"Error generando recomendaciones: {str(e)}")
         return redirect('proyecto_detail', pk=proyecto_id)
 
+    return redirect('recomendacion_job', task_id=tarea.id)
+
+@login_required
+def recomendacion_job(request, task_id):
+    """
+    Vista de seguimiento de una tarea de recomendación. Consulta el estado
+    de la tarea y redirige a la recomendación cuando termina.
+    """
+    task_result = AsyncResult(task_id)
+    if task_result.successful() and isinstance(task_result.result, dict) and task_result.result.get('url'):
+        messages.success(request, "Recomendaciones generadas exitosamente.")
+        return redirect(task_result.result['url'])
+
+    if task_result.failed():
+        messages.error(request, f"Error generando recomendaciones: {task_result.result}")
+
+    return render(request, 'core/recomendacion_job.html', {
+        'task_id': task_id,
+        'status': task_result.status,
+    })
+
+@login_required
+def generar_recomendaciones(request, proyecto_id):
+    """
+    Vista para generar recomendaciones de usuarios para un proyecto.
+    La generación se ejecuta como tarea en segundo plano.
+    """
+    return _encolar_recomendaciones(request, proyecto_id, 'basico')
+
 class RecomendacionDetailView(LoginRequiredMixin, DetailView):
     model = RecomendacionProyecto
     template_name = 'core/recomendacion_detail.html'
@@ -1350,6 +1366,9 @@ class RecomendacionDetailView(LoginRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['usuarios_recomendados'] = self.object.usuarios_recomendados.all()
+        context['distribucion_confianza'] = score_histogram(
+            self.object.usuarios_recomendados.all(), 'score_nn', umbrales_inclusivos=True
+        )
         
         # Agregar información específica de la red neuronal
         context['model_weights'] = {
@@ -1412,48 +1431,7 @@ def generar_recomendaciones_avanzadas(request, proyecto_id):
     """
     Vista para generar recomendaciones avanzadas de usuarios para un proyecto
     """
-    try:
-        proyecto = get_object_or_404(Proyecto, id=proyecto_id)
-        usuarios = Usuario.objects.all()
-        roles_proyecto = ProyectoRoles.objects.filter(project_id=proyecto)
-        recommender = AdvancedRecommendationSystem()
-        X, user_ids = recommender.prepare_advanced_data(usuarios, roles_proyecto)
-        recommender.train_advanced_models(X, user_ids)
-        adv_scores = recommender.get_advanced_performance_summary()
-        recommendations = recommender.get_advanced_recommendations(X, user_ids, top_n=10)
-        # Guardar resultados en la base de datos (puedes crear un nuevo objeto o reutilizar el modelo existente)
-        recomendacion = RecomendacionProyecto.objects.create(
-            project_id=proyecto,
-            rf_accuracy=0,
-            rf_precision=0,
-            rf_recall=0,
-            rf_f1=0,
-            knn_accuracy=0,
-            knn_precision=0,
-            knn_recall=0,
-            knn_f1=0,
-            nn_accuracy=adv_scores.get('accuracy', 0),
-            nn_precision=adv_scores.get('precision', 0),
-            nn_recall=adv_scores.get('recall', 0),
-            nn_f1=adv_scores.get('f1', 0)
-        )
-        for idx, rec in enumerate(recommendations, 1):
-            usuario = Usuario.objects.get(id=rec['user_id'])
-            RecomendacionUsuario.objects.create(
-                recomendacion_id=recomendacion,
-                user_id=usuario,
-                score_combinado=rec['score'],
-                score_rf=0,
-                score_knn=0,
-                score_nn=rec['score'],
-                ranking=idx
-            )
-        messages.success(request, "Recomendación avanzada generada exitosamente.")
-        return redirect('ver_recomendaciones_avanzadas', recomendacion_id=recomendacion.id)
-    except Exception as e:
-        logger.error(f"Error generando recomendación avanzada: {str(e)}")
-        messages.error(request, f"Error generando recomendación avanzada: {str(e)}")
-        return redirect('proyecto_detail', pk=proyecto_id)
+    return _encolar_recomendaciones(request, proyecto_id, 'avanzado')
 
 class RecomendacionAvanzadaDetailView(LoginRequiredMixin, DetailView):
     model = RecomendacionProyecto
@@ -1467,6 +1445,9 @@ class RecomendacionAvanzadaDetailView(LoginRequiredMixin, DetailView):
         for u in usuarios_recomendados:
             u.score_avanzado = u.score_nn
         context['usuarios_recomendados'] = usuarios_recomendados
+        context['distribucion_confianza'] = score_histogram(
+            self.object.usuarios_recomendados.all(), 'score_nn', umbrales_inclusivos=True
+        )
         # Para compatibilidad con el template avanzado
         context['advanced_accuracy'] = self.object.nn_accuracy
         context['advanced_precision'] = self.object.nn_precision
@@ -1479,46 +1460,7 @@ def generar_recomendaciones_cnn(request, proyecto_id):
     """
     Vista para generar recomendaciones de usuarios usando CNN para un proyecto
     """
-    try:
-        proyecto = get_object_or_404(Proyecto, id=proyecto_id)
-        usuarios = Usuario.objects.all()
-        roles_proyecto = ProyectoRoles.objects.filter(project_id=proyecto)
-        recommender = AdvancedRecommendationSystem()
-        X, user_ids = recommender.prepare_advanced_data(usuarios, roles_proyecto)
-        recommendations = recommender.get_cnn_recommendations(X, user_ids, top_n=10)
-        # Guardar resultados en la base de datos
-        recomendacion = RecomendacionProyecto.objects.create(
-            project_id=proyecto,
-            rf_accuracy=0,
-            rf_precision=0,
-            rf_recall=0,
-            rf_f1=0,
-            knn_accuracy=0,
-            knn_precision=0,
-            knn_recall=0,
-            knn_f1=0,
-            nn_accuracy=0,
-            nn_precision=0,
-            nn_recall=0,
-            nn_f1=0
-        )
-        for idx, rec in enumerate(recommendations, 1):
-            usuario = Usuario.objects.get(id=rec['user_id'])
-            RecomendacionUsuario.objects.create(
-                recomendacion_id=recomendacion,
-                user_id=usuario,
-                score_combinado=rec['score'],
-                score_rf=0,
-                score_knn=0,
-                score_nn=rec['cnn_score'],
-                ranking=idx
-            )
-        messages.success(request, "Recomendación CNN generada exitosamente.")
-        return redirect('ver_recomendaciones_cnn', recomendacion_id=recomendacion.id)
-    except Exception as e:
-        logger.error(f"Error generando recomendación CNN: {str(e)}")
-        messages.error(request, f"Error generando recomendación CNN: {str(e)}")
-        return redirect('proyecto_detail', pk=proyecto_id)
+    return _encolar_recomendaciones(request, proyecto_id, 'cnn')
 
 class RecomendacionCNNDetailView(LoginRequiredMixin, DetailView):
     model = RecomendacionProyecto
@@ -1533,151 +1475,179 @@ class RecomendacionCNNDetailView(LoginRequiredMixin, DetailView):
         context['usuarios_recomendados'] = usuarios_recomendados
         return context
 
-@login_required
-def exportar_recomendaciones_pdf(request, recomendacion_id):
+# Filas por tabla en el ranking del PDF: varias tablas pequeñas se
+# maquetan en tiempo lineal, una sola tabla enorme se vuelve a dividir en
+# cada página
+FILAS_TABLA_PDF = 500
+
+
+def _render_recomendacion_pdf(destino, recomendacion):
     """
-    Vista para exportar recomendaciones a PDF
+    Genera el PDF de una recomendación en la ruta `destino`.
     """
-    try:
-        recomendacion = get_object_or_404(RecomendacionProyecto, id=recomendacion_id)
-        usuarios_recomendados = recomendacion.usuarios_recomendados.all()
-        
-        # Crear el PDF
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="recomendaciones_{recomendacion.project_id.nombre}_{recomendacion.fecha_recomendacion.strftime("%Y%m%d")}.pdf"'
-        
-        # Crear el documento
-        doc = SimpleDocTemplate(response, pagesize=A4)
-        elements = []
-        
-        # Estilos
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=20
-        )
-        normal_style = styles['Normal']
-        
-        # Título
-        elements.append(Paragraph("Sistema de Recomendación REDUDES", title_style))
-        elements.append(Spacer(1, 20))
-        
-        # Información del proyecto
-        elements.append(Paragraph(f"<b>Proyecto:</b> {recomendacion.project_id.nombre}", subtitle_style))
-        elements.append(Paragraph(f"<b>Fecha de Recomendación:</b> {recomendacion.fecha_recomendacion.strftime('%d/%m/%Y %H:%M')}", normal_style))
-        elements.append(Paragraph(f"<b>Convocatoria:</b> {recomendacion.project_id.convocatoria}", normal_style))
-        elements.append(Paragraph(f"<b>Tipo de Proyecto:</b> {recomendacion.project_id.tipo_proyecto}", normal_style))
-        elements.append(Spacer(1, 20))
+    doc = platypus.SimpleDocTemplate(destino, pagesize=pagesizes.A4)
+    elements = []
+    
+    # Estilos
+    styles = rl_styles.getSampleStyleSheet()
+    title_style = rl_styles.ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=enums.TA_CENTER
+    )
+    subtitle_style = rl_styles.ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=20
+    )
+    normal_style = styles['Normal']
+    
+    # Título
+    elements.append(platypus.Paragraph("Sistema de Recomendación REDUDES", title_style))
+    elements.append(platypus.Spacer(1, 20))
+    
+    # Información del proyecto
+    elements.append(platypus.Paragraph(f"<b>Proyecto:</b> {recomendacion.project_id.nombre}", subtitle_style))
+    elements.append(platypus.Paragraph(f"<b>Fecha de Recomendación:</b> {recomendacion.fecha_recomendacion.strftime('%d/%m/%Y %H:%M')}", normal_style))
+    elements.append(platypus.Paragraph(f"<b>Convocatoria:</b> {recomendacion.project_id.convocatoria}", normal_style))
+    elements.append(platypus.Paragraph(f"<b>Tipo de Proyecto:</b> {recomendacion.project_id.tipo_proyecto}", normal_style))
+    elements.append(platypus.Spacer(1, 20))
+    
+    # Métricas del modelo
+    elements.append(platypus.Paragraph("Métricas del Modelo", subtitle_style))
+    metrics_data = [
+        ['Métrica', 'Valor'],
+        ['Accuracy', f"{recomendacion.nn_accuracy:.4f}"],
+        ['Precision', f"{recomendacion.nn_precision:.4f}"],
+        ['Recall', f"{recomendacion.nn_recall:.4f}"],
+        ['F1-Score', f"{recomendacion.nn_f1:.4f}"]
+    ]
+    metrics_table = platypus.Table(metrics_data, colWidths=[2*units.inch, 1.5*units.inch])
+    metrics_table.setStyle(platypus.TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(metrics_table)
+    elements.append(platypus.Spacer(1, 20))
+    
+    # Tabla de usuarios recomendados, en bloques de FILAS_TABLA_PDF filas
+    encabezado = ['#', 'Usuario', 'Email', 'Score', 'Confianza']
+    table_style = platypus.TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('ALIGN', (0, 0), (0, -1), 'CENTER'),  # Centrar columna #
+        ('ALIGN', (3, 1), (3, -1), 'CENTER'),  # Centrar columna Score
+        ('ALIGN', (4, 1), (4, -1), 'CENTER'),  # Centrar columna Confianza
+    ])
+    
+    def _tabla(filas):
+        table = platypus.Table([encabezado] + filas, repeatRows=1,
+                               colWidths=[0.5*units.inch, 2*units.inch, 2.5*units.inch, 1*units.inch, 1*units.inch])
+        table.setStyle(table_style)
+        return table
+    
+    tablas = []
+    filas = []
+    alta_confianza = media_confianza = baja_confianza = 0
+    usuarios_recomendados = recomendacion.usuarios_recomendados.select_related('user_id')
+    for rec in usuarios_recomendados.iterator(chunk_size=FILAS_TABLA_PDF):
+        # Determinar nivel de confianza
+        score = rec.score_nn
+        if score > 0.7:
+            confianza = "Alta"
+        elif score > 0.5:
+            confianza = "Media"
+        else:
+            confianza = "Baja"
+
+        # Estadísticas en el mismo recorrido (0.5 cuenta como confianza media)
+        if score > 0.7:
+            alta_confianza += 1
+        elif score >= 0.5:
+            media_confianza += 1
+        else:
+            baja_confianza += 1
+
+        filas.append([
+            str(rec.ranking),
+            f"{rec.user_id.nombres} {rec.user_id.apellidos}",
+            rec.user_id.email,
+            f"{score:.4f}",
+            confianza
+        ])
+        if len(filas) == FILAS_TABLA_PDF:
+            tablas.append(_tabla(filas))
+            filas = []
+    if filas:
+        tablas.append(_tabla(filas))
+    
+    total = alta_confianza + media_confianza + baja_confianza
+    if total:
+        elements.append(platypus.Paragraph("Perfiles Recomendados", subtitle_style))
+        elements.extend(tablas)
+        
+        # Estadísticas
+        elements.append(platypus.Spacer(1, 20))
+        elements.append(platypus.Paragraph("Estadísticas de Recomendaciones", subtitle_style))
         
-        # Métricas del modelo
-        elements.append(Paragraph("Métricas del Modelo", subtitle_style))
-        metrics_data = [
-            ['Métrica', 'Valor'],
-            ['Accuracy', f"{recomendacion.nn_accuracy:.4f}"],
-            ['Precision', f"{recomendacion.nn_precision:.4f}"],
-            ['Recall', f"{recomendacion.nn_recall:.4f}"],
-            ['F1-Score', f"{recomendacion.nn_f1:.4f}"]
+        stats_data = [
+            ['Nivel de Confianza', 'Cantidad'],
+            ['Alta (≥0.7)', str(alta_confianza)],
+            ['Media (0.5-0.7)', str(media_confianza)],
+            ['Baja (<0.5)', str(baja_confianza)],
+            ['Total', str(total)]
         ]
-        metrics_table = Table(metrics_data, colWidths=[2*inch, 1.5*inch])
-        metrics_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        
+        stats_table = platypus.Table(stats_data, colWidths=[2*units.inch, 1*units.inch])
+        stats_table.setStyle(platypus.TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.green),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
             ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
             ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
             ('GRID', (0, 0), (-1, -1), 1, colors.black)
         ]))
-        elements.append(metrics_table)
-        elements.append(Spacer(1, 20))
-        
-        # Tabla de usuarios recomendados
-        if usuarios_recomendados:
-            elements.append(Paragraph("Perfiles Recomendados", subtitle_style))
-            
-            # Datos de la tabla
-            table_data = [['#', 'Usuario', 'Email', 'Score', 'Confianza']]
-            
-            for rec in usuarios_recomendados:
-                # Determinar nivel de confianza
-                score = rec.score_nn
-                if score > 0.7:
-                    confianza = "Alta"
-                elif score > 0.5:
-                    confianza = "Media"
-                else:
-                    confianza = "Baja"
-                
-                table_data.append([
-                    str(rec.ranking),
-                    f"{rec.user_id.nombres} {rec.user_id.apellidos}",
-                    rec.user_id.email,
-                    f"{score:.4f}",
-                    confianza
-                ])
-            
-            # Crear tabla
-            table = Table(table_data, colWidths=[0.5*inch, 2*inch, 2.5*inch, 1*inch, 1*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('ALIGN', (0, 0), (0, -1), 'CENTER'),  # Centrar columna #
-                ('ALIGN', (3, 1), (3, -1), 'CENTER'),  # Centrar columna Score
-                ('ALIGN', (4, 1), (4, -1), 'CENTER'),  # Centrar columna Confianza
-            ]))
-            elements.append(table)
-            
-            # Estadísticas
-            elements.append(Spacer(1, 20))
-            elements.append(Paragraph("Estadísticas de Recomendaciones", subtitle_style))
-            
-            alta_confianza = len([u for u in usuarios_recomendados if u.score_nn > 0.7])
-            media_confianza = len([u for u in usuarios_recomendados if 0.5 <= u.score_nn <= 0.7])
-            baja_confianza = len([u for u in usuarios_recomendados if u.score_nn < 0.5])
-            
-            stats_data = [
-                ['Nivel de Confianza', 'Cantidad'],
-                ['Alta (≥0.7)', str(alta_confianza)],
-                ['Media (0.5-0.7)', str(media_confianza)],
-                ['Baja (<0.5)', str(baja_confianza)],
-                ['Total', str(len(usuarios_recomendados))]
-            ]
-            
-            stats_table = Table(stats_data, colWidths=[2*inch, 1*inch])
-            stats_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.green),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(stats_table)
-        else:
-            elements.append(Paragraph("No hay recomendaciones disponibles", normal_style))
-        
-        # Construir PDF
-        doc.build(elements)
-        return response
+        elements.append(stats_table)
+    else:
+        elements.append(platypus.Paragraph("No hay recomendaciones disponibles", normal_style))
+    
+    # Construir PDF
+    doc.build(elements)
+
+
+@login_required
+@condition(etag_func=lambda request, recomendacion_id: request_pdf_key(request, recommendation_pdf_key, recomendacion_id))
+def exportar_recomendaciones_pdf(request, recomendacion_id):
+    """
+    Vista para exportar recomendaciones a PDF. El documento se genera una
+    sola vez por recomendación y se sirve desde la caché (ver core/pdf_cache.py).
+    """
+    try:
+        recomendacion = get_object_or_404(RecomendacionProyecto.objects.select_related('project_id'), id=recomendacion_id)
+        filename = f'recomendaciones_{recomendacion.project_id.nombre}_{recomendacion.fecha_recomendacion.strftime("%Y%m%d")}.pdf'
+        return cached_pdf_response(
+            request_pdf_key(request, recommendation_pdf_key, recomendacion_id),
+            filename,
+            lambda destino: _render_recomendacion_pdf(destino, recomendacion)
+        )
         
     except Exception as e:
         logger.error(f"Error exportando PDF: {str(e)}")
@@ -1690,73 +1660,26 @@ def informes_plataforma(request):
     Vista para mostrar informes de uso de la plataforma
     """
     try:
-        # Estadísticas generales
-        total_proyectos = Proyecto.objects.count()
-        total_usuarios = Usuario.objects.count()
-        total_recomendaciones = RecomendacionProyecto.objects.count()
-        
-        # Proyectos por tipo
-        proyectos_por_tipo = Proyecto.objects.values('tipo_proyecto').annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')
-        
-        # Proyectos por convocatoria
-        proyectos_por_convocatoria = Proyecto.objects.values('convocatoria').annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')[:10]
-        
-        # Usuarios con más habilidades
-        usuarios_mas_habilidades = Usuario.objects.annotate(
-            num_habilidades=Count('habilidades')
-        ).order_by('-num_habilidades')[:10]
-        
-        # Usuarios con más conocimientos
-        usuarios_mas_conocimientos = Usuario.objects.annotate(
-            num_conocimientos=Count('conocimientos')
-        ).order_by('-num_conocimientos')[:10]
+        # Estadísticas precalculadas (ver core/platform_stats.py)
+        estadisticas = get_platform_stats()
         
         # Recomendaciones por mes (últimos 6 meses)
-        fecha_limite = timezone.now() - timedelta(days=180)
-        recomendaciones_por_mes = RecomendacionProyecto.objects.filter(
-            fecha_recomendacion__gte=fecha_limite
-        ).extra(
-            select={'mes': "DATE_TRUNC('month', fecha_recomendacion)"}
-        ).values('mes').annotate(
-            cantidad=Count('id')
-        ).order_by('mes')
-        
-        # Proyectos más activos (con más roles)
-        proyectos_mas_activos = Proyecto.objects.annotate(
-            num_roles=Count('proyectoroles')
-        ).order_by('-num_roles')[:10]
-        
-        # Estadísticas de usuarios recomendados
-        total_usuarios_recomendados = RecomendacionUsuario.objects.count()
-        if total_usuarios_recomendados > 0:
-            promedio_score = RecomendacionUsuario.objects.aggregate(
-                promedio=Avg('score_combinado')
-            )['promedio']
-        else:
-            promedio_score = 0
-        
-        # Usuarios más recomendados
-        usuarios_mas_recomendados = Usuario.objects.annotate(
-            veces_recomendado=Count('recomendacionusuario')
-        ).filter(veces_recomendado__gt=0).order_by('-veces_recomendado')[:10]
+        recomendaciones_por_mes = recommendations_by_month()
         
         context = {
-            'total_proyectos': total_proyectos,
-            'total_usuarios': total_usuarios,
-            'total_recomendaciones': total_recomendaciones,
-            'total_usuarios_recomendados': total_usuarios_recomendados,
-            'promedio_score': promedio_score,
-            'proyectos_por_tipo': proyectos_por_tipo,
-            'proyectos_por_convocatoria': proyectos_por_convocatoria,
-            'usuarios_mas_habilidades': usuarios_mas_habilidades,
-            'usuarios_mas_conocimientos': usuarios_mas_conocimientos,
+            'total_proyectos': estadisticas.total_proyectos,
+            'total_usuarios': estadisticas.total_usuarios,
+            'total_recomendaciones': estadisticas.total_recomendaciones,
+            'total_usuarios_recomendados': estadisticas.total_usuarios_recomendados,
+            'promedio_score': estadisticas.promedio_score,
+            'proyectos_por_tipo': estadisticas.proyectos_por_tipo,
+            'proyectos_por_convocatoria': estadisticas.proyectos_por_convocatoria,
+            'usuarios_mas_habilidades': estadisticas.usuarios_mas_habilidades,
+            'usuarios_mas_conocimientos': estadisticas.usuarios_mas_conocimientos,
             'recomendaciones_por_mes': recomendaciones_por_mes,
-            'proyectos_mas_activos': proyectos_mas_activos,
-            'usuarios_mas_recomendados': usuarios_mas_recomendados,
+            'proyectos_mas_activos': estadisticas.proyectos_mas_activos,
+            'usuarios_mas_recomendados': estadisticas.usuarios_mas_recomendados,
+            'estadisticas_actualizadas': estadisticas.actualizado,
         }
         
         return render(request, 'core/informes_plataforma.html', context)
@@ -1782,15 +1705,8 @@ def informes_recomendaciones(request):
             cantidad=Count('id')
         ).order_by('-cantidad')
         
-        # Distribución de scores - simplificada
-        scores_distribucion = {
-            'alta_confianza': RecomendacionUsuario.objects.filter(score_combinado__gt=0.7).count(),
-            'media_confianza': RecomendacionUsuario.objects.filter(
-                score_combinado__gt=0.5, 
-                score_combinado__lte=0.7
-            ).count(),
-            'baja_confianza': RecomendacionUsuario.objects.filter(score_combinado__lte=0.5).count(),
-        }
+        # Distribución de scores (niveles de confianza y rangos en una consulta)
+        scores_distribucion = score_histogram(RecomendacionUsuario.objects.all())
         
         # Recomendaciones recientes - simplificada
         fecha_reciente = timezone.now() - timedelta(days=30)
@@ -1823,124 +1739,124 @@ def informes_recomendaciones(request):
         messages.error(request, f"Error generando informes de recomendaciones: {str(e)}")
         return redirect('home')
 
-@login_required
-def exportar_informe_plataforma_pdf(request):
+def _render_informe_plataforma_pdf(destino, estadisticas, recomendaciones_por_mes):
     """
-    Vista para exportar informe de plataforma a PDF
+    Genera el PDF del informe de plataforma en la ruta `destino`.
     """
-    try:
-        # Obtener datos para el informe
-        total_proyectos = Proyecto.objects.count()
-        total_usuarios = Usuario.objects.count()
-        total_recomendaciones = RecomendacionProyecto.objects.count()
-        
-        proyectos_por_tipo = Proyecto.objects.values('tipo_proyecto').annotate(
-            cantidad=Count('id')
-        ).order_by('-cantidad')
-        
-        recomendaciones_por_mes = RecomendacionProyecto.objects.filter(
-            fecha_recomendacion__gte=timezone.now() - timedelta(days=180)
-        ).extra(
-            select={'mes': "DATE_TRUNC('month', fecha_recomendacion)"}
-        ).values('mes').annotate(
-            cantidad=Count('id')
-        ).order_by('mes')
-        
-        # Crear PDF
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="informe_plataforma_{timezone.now().strftime("%Y%m%d")}.pdf"'
-        
-        doc = SimpleDocTemplate(response, pagesize=A4)
-        elements = []
-        
-        # Estilos
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=20
-        )
-        
-        # Título
-        elements.append(Paragraph("Informe de Uso de la Plataforma REDUDES", title_style))
-        elements.append(Spacer(1, 20))
-        
-        # Estadísticas generales
-        elements.append(Paragraph("Estadísticas Generales", subtitle_style))
-        stats_data = [
-            ['Métrica', 'Cantidad'],
-            ['Total Proyectos', str(total_proyectos)],
-            ['Total Usuarios', str(total_usuarios)],
-            ['Total Recomendaciones', str(total_recomendaciones)]
-        ]
-        
-        stats_table = Table(stats_data, colWidths=[3*inch, 1.5*inch])
-        stats_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    total_proyectos = estadisticas.total_proyectos
+    total_usuarios = estadisticas.total_usuarios
+    total_recomendaciones = estadisticas.total_recomendaciones
+    proyectos_por_tipo = estadisticas.proyectos_por_tipo
+    
+    doc = platypus.SimpleDocTemplate(destino, pagesize=pagesizes.A4)
+    elements = []
+    
+    # Estilos
+    styles = rl_styles.getSampleStyleSheet()
+    title_style = rl_styles.ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=enums.TA_CENTER
+    )
+    subtitle_style = rl_styles.ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=20
+    )
+    
+    # Título
+    elements.append(platypus.Paragraph("Informe de Uso de la Plataforma REDUDES", title_style))
+    elements.append(platypus.Spacer(1, 20))
+    
+    # Estadísticas generales
+    elements.append(platypus.Paragraph("Estadísticas Generales", subtitle_style))
+    stats_data = [
+        ['Métrica', 'Cantidad'],
+        ['Total Proyectos', str(total_proyectos)],
+        ['Total Usuarios', str(total_usuarios)],
+        ['Total Recomendaciones', str(total_recomendaciones)]
+    ]
+    
+    stats_table = platypus.Table(stats_data, colWidths=[3*units.inch, 1.5*units.inch])
+    stats_table.setStyle(platypus.TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(stats_table)
+    elements.append(platypus.Spacer(1, 20))
+    
+    # Proyectos por tipo
+    if proyectos_por_tipo:
+        elements.append(platypus.Paragraph("Proyectos por Tipo", subtitle_style))
+        tipo_data = [['Tipo de Proyecto', 'Cantidad']]
+        for item in proyectos_por_tipo:
+            tipo_data.append([item['tipo_proyecto'], str(item['cantidad'])])
+        
+        tipo_table = platypus.Table(tipo_data, colWidths=[3*units.inch, 1.5*units.inch])
+        tipo_table.setStyle(platypus.TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.green),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
             ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
             ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
             ('GRID', (0, 0), (-1, -1), 1, colors.black)
         ]))
-        elements.append(stats_table)
-        elements.append(Spacer(1, 20))
-        
-        # Proyectos por tipo
-        if proyectos_por_tipo:
-            elements.append(Paragraph("Proyectos por Tipo", subtitle_style))
-            tipo_data = [['Tipo de Proyecto', 'Cantidad']]
-            for item in proyectos_por_tipo:
-                tipo_data.append([item['tipo_proyecto'], str(item['cantidad'])])
-            
-            tipo_table = Table(tipo_data, colWidths=[3*inch, 1.5*inch])
-            tipo_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.green),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(tipo_table)
-            elements.append(Spacer(1, 20))
-        
-        # Recomendaciones por mes
-        if recomendaciones_por_mes:
-            elements.append(Paragraph("Recomendaciones por Mes (Últimos 6 meses)", subtitle_style))
-            mes_data = [['Mes', 'Cantidad de Recomendaciones']]
-            for item in recomendaciones_por_mes:
-                mes_str = item['mes'].strftime('%B %Y') if item['mes'] else 'N/A'
-                mes_data.append([mes_str, str(item['cantidad'])])
-            
-            mes_table = Table(mes_data, colWidths=[3*inch, 1.5*inch])
-            mes_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.orange),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.lightyellow),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(mes_table)
-        
-        # Construir PDF
-        doc.build(elements)
-        return response
+        elements.append(tipo_table)
+        elements.append(platypus.Spacer(1, 20))
+    
+    # Recomendaciones por mes
+    if recomendaciones_por_mes:
+        elements.append(platypus.Paragraph("Recomendaciones por Mes (Últimos 6 meses)", subtitle_style))
+        mes_data = [['Mes', 'Cantidad de Recomendaciones']]
+        for item in recomendaciones_por_mes:
+            mes_str = item['mes'].strftime('%B %Y') if item['mes'] else 'N/A'
+            mes_data.append([mes_str, str(item['cantidad'])])
+        
+        mes_table = platypus.Table(mes_data, colWidths=[3*units.inch, 1.5*units.inch])
+        mes_table.setStyle(platypus.TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.orange),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.lightyellow),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elements.append(mes_table)
+    
+    # Construir PDF
+    doc.build(elements)
+
+
+@login_required
+@condition(etag_func=lambda request: request_pdf_key(request, platform_report_pdf_key))
+def exportar_informe_plataforma_pdf(request):
+    """
+    Vista para exportar informe de plataforma a PDF. Se genera de nuevo solo
+    cuando cambian las estadísticas precalculadas o la serie mensual.
+    """
+    try:
+        # Obtener datos para el informe (estadísticas precalculadas)
+        estadisticas = get_platform_stats()
+        recomendaciones_por_mes = recommendations_by_month()
+        
+        return cached_pdf_response(
+            request_pdf_key(request, platform_report_pdf_key),
+            f'informe_plataforma_{timezone.now().strftime("%Y%m%d")}.pdf',
+            lambda destino: _render_informe_plataforma_pdf(destino, estadisticas, recomendaciones_por_mes)
+        )
         
     except Exception as e:
         logger.error(f"Error exportando informe PDF: {str(e)}")
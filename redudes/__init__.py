@@ -1 +1,4 @@
-# Este archivo está vacío para indicar que el directorio es un paquete de Python
+# Cargar la aplicación de Celery al iniciar Django para que @shared_task la use
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 from django.contrib.messages import constants as message_constants
 
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
     'core',
     'crispy_forms',
     'crispy_bootstrap5',
+    'django_celery_results',
 ]
 
 MIDDLEWARE = [
@@ -147,3 +149,42 @@ MESSAGE_TAGS = {
 }
 
 AUTH_USER_MODEL = 'core.CustomUser'
+
+# Registro de modelos de recomendación entrenados
+MODEL_REGISTRY_DIR = BASE_DIR / 'model_registry'
+
+# Caché en disco de los PDF exportados (ver core/pdf_cache.py)
+PDF_CACHE_DIR = BASE_DIR / 'pdf_cache'
+
+# Sesiones de navegador reutilizables para el scraping de CVLAC, por proceso
+SCRAPING_DRIVER_POOL_SIZE = int(os.environ.get('SCRAPING_DRIVER_POOL_SIZE', 2))
+
+# Caché en disco de las páginas descargadas por el scraping (ver
+# core/http_cache.py); pasado el TTL se revalidan con peticiones condicionales
+HTTP_CACHE_DIR = BASE_DIR / 'http_cache'
+HTTP_CACHE_TTL = int(os.environ.get('HTTP_CACHE_TTL', 12 * 60 * 60))
+
+# Ingesta masiva de perfiles (ver core/bulk_ingestion.py): hilos de descarga,
+# descargas simultáneas por host y checkpoints para reanudarla
+INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', 8))
+INGEST_PER_HOST_LIMIT = int(os.environ.get('INGEST_PER_HOST_LIMIT', 2))
+INGEST_CHECKPOINT_DIR = BASE_DIR / 'ingest_checkpoints'
+
+# Cargar la CNN guardada al iniciar cada proceso del worker de Celery
+CNN_WARMUP_ON_WORKER_START = True
+
+# Celery: tareas en segundo plano (generación de recomendaciones)
+# Sin CELERY_BROKER_URL las tareas se ejecutan en el mismo proceso (modo eager)
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'memory://')
+CELERY_TASK_ALWAYS_EAGER = 'CELERY_BROKER_URL' not in os.environ
+CELERY_TASK_STORE_EAGER_RESULT = True
+CELERY_RESULT_BACKEND = 'django-db'
+CELERY_RESULT_EXTENDED = True
+CELERY_TASK_TRACK_STARTED = True
+# Recálculo periódico del resumen del informe de plataforma (celery beat)
+CELERY_BEAT_SCHEDULE = {
+    'refrescar-estadisticas-plataforma': {
+        'task': 'core.tasks.refrescar_estadisticas_task',
+        'schedule': 15 * 60,
+    },
+}
@@ -0,0 +1,57 @@
+"""
+Benchmark del parser de perfiles CVLAC (vía HTTP, sin navegador).
+
+Interpreta repetidamente la página guardada en debug_html/cvlac_response.html,
+verifica los datos extraídos y reporta el tiempo por página. No usa la red
+ni el navegador.
+
+Uso:
+    python scripts/benchmark_cvlac_parser.py [--repeticiones 200]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from core.cvlac_parser import is_complete, parse_cvlac_html
+
+FIXTURE = BASE_DIR / 'debug_html' / 'cvlac_response.html'
+
+# Valores esperados en la página guardada
+ESPERADO = {
+    'nombre': 'Nury Farelo Velásquez',
+    'institucion': 'UNIVERSIDAD DE SANTANDER',
+    'estudios': 3,
+    'proyectos': 3,
+}
+
+
+def verificar(data):
+    assert is_complete(data), "La página guardada debería estar completa"
+    for campo, valor in ESPERADO.items():
+        obtenido = len(data[campo]) if isinstance(valor, int) else data[campo]
+        assert obtenido == valor, f"{campo}: se esperaba {valor!r}, se obtuvo {obtenido!r}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    html = FIXTURE.read_text(encoding='utf-8')
+    verificar(parse_cvlac_html(html))
+
+    inicio = time.perf_counter()
+    for _ in range(args.repeticiones):
+        parse_cvlac_html(html)
+    duracion = (time.perf_counter() - inicio) / args.repeticiones
+
+    print(f"Página: {FIXTURE.name} ({len(html.encode('utf-8')) / 1024:.0f} KB)")
+    print(f"Parser HTML: {duracion * 1000:.1f} ms por página ({1 / duracion:.0f} páginas/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Benchmark de las características numéricas de ProfessionalProjectMatcher.
+
+Compara las versiones fila a fila (interpretar el texto de GROUP_CONCAT,
+bucles e iterrows) con las actuales (agregados SQL y operaciones
+vectorizadas) sobre datos sintéticos, y verifica que den el mismo
+resultado. Los profesionales se insertan en una base de datos de prueba
+temporal; la base de datos configurada no se modifica.
+
+Uso:
+    python scripts/benchmark_matcher_features.py [--filas 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import django
+import numpy as np
+import pandas as pd
+
+# Configurar el entorno de Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'redudes.settings')
+django.setup()
+
+from django.db import connection
+
+from core.matcher_data import CHUNK_SIZE, PROFESSIONAL_FEATURES, iter_professionals, professional_features
+from core.ml_models2 import ProfessionalProjectMatcher, base_compatibility, numeric_score
+from core.models import Termino, Usuario, UsuarioEstudios, UsuarioExperiencia, UsuarioHabilidades
+
+ROLES = ['Investigador', 'Docente', 'Desarrollador', 'Analista', 'Coordinador', 'Ingeniero']
+ESTUDIOS = ['Ingeniería de Sistemas', 'Maestría en Datos', 'Doctorado', 'Tecnólogo', 'Especialización']
+HABILIDADES = ['Python', 'SQL', 'Django', 'AWS', 'Docker', 'Machine Learning', 'Liderazgo', 'React']
+
+LOTE = 5000
+
+
+# Implementaciones anteriores, fila a fila
+
+def legacy_experience_years(serie):
+    experience_years = []
+    for exp in serie:
+        if exp:
+            years = 0
+            for item in exp.split(','):
+                if ':' in item:
+                    try:
+                        years += int(item.split(':')[1])
+                    except:
+                        pass
+            experience_years.append(years)
+        else:
+            experience_years.append(0)
+    return experience_years
+
+
+def legacy_education_level(serie):
+    education_levels = []
+    for edu in serie:
+        if edu:
+            max_level = 0
+            for item in edu.split(','):
+                if ':' in item:
+                    try:
+                        level = int(item.split(':')[1])
+                        max_level = max(max_level, level)
+                    except:
+                        pass
+            education_levels.append(max_level)
+        else:
+            education_levels.append(0)
+    return education_levels
+
+
+def legacy_skill_count(serie):
+    return serie.apply(lambda x: len(x.split(',')) if x else 0)
+
+
+def legacy_project_complexity(projects):
+    complexity = []
+    for idx, row in projects.iterrows():
+        score = 0
+        if row['presupuesto']:
+            score += min(row['presupuesto'] / 1000000, 10)
+        score += len(row['texto_completo'].split()) / 100
+        complexity.append(score)
+    return complexity
+
+
+def legacy_rf_targets(prof_features, project_complexity):
+    synthetic_targets = []
+    for idx, prof in prof_features.iterrows():
+        score = 0
+        score += min(prof['años_experiencia'] / 10, 1) * 0.4
+        score += min(prof['nivel_educacion'] / 5, 1) * 0.3
+        score += min(prof['diversidad_habilidades'] / 10, 1) * 0.3
+        score *= min(project_complexity / 5, 1)
+        synthetic_targets.append(score)
+    return synthetic_targets
+
+
+def legacy_nn_targets(text_similarities, numeric_features):
+    synthetic_targets = []
+    for i in range(len(numeric_features)):
+        prof_numeric = numeric_features[i]
+        numeric = (
+                min(prof_numeric[0] / 15, 1) * 0.4 +
+                min(prof_numeric[1] / 5, 1) * 0.3 +
+                min(prof_numeric[2] / 8, 1) * 0.3
+        )
+        synthetic_targets.append(text_similarities[i] * 0.6 + numeric * 0.4)
+    return synthetic_targets
+
+
+def poblar_profesionales(filas, rng):
+    """Inserta profesionales sintéticos con habilidades, estudios y experiencia."""
+    fecha = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for inicio in range(1, filas + 1, LOTE):
+        ids = range(inicio, min(inicio + LOTE, filas + 1))
+        Usuario.objects.bulk_create([
+            Usuario(id=i, nombres=f"Nombre {i}", apellidos='Apellido', email=f"u{i}@example.com",
+                    telefono=3000000000 + i, puesto_actual='Docente', dependencia='Ingeniería',
+                    url_cvlac='', url_linkedin='', fecha_ingreso=fecha)
+            for i in ids
+        ])
+        habilidades, estudios, experiencias = [], [], []
+        for i in ids:
+            # Con repeticiones, como en los datos reales
+            habilidades += [UsuarioHabilidades(user_id_id=i, habilidad=h, experiencia='1-2 años')
+                            for h in rng.choices(HABILIDADES, k=rng.randint(0, 6))]
+            estudios += [UsuarioEstudios(user_id_id=i, estudio=e, nivel=rng.randint(1, 6), year=2020)
+                         for e in rng.sample(ESTUDIOS, rng.randint(0, 3))]
+            experiencias += [UsuarioExperiencia(user_id_id=i, rol=r, tiempo=rng.randint(0, 20), actividades='')
+                             for r in rng.sample(ROLES, rng.randint(0, 4))]
+        Termino.asignar(habilidades, 'habilidad')
+        UsuarioHabilidades.objects.bulk_create(habilidades)
+        UsuarioEstudios.objects.bulk_create(estudios)
+        UsuarioExperiencia.objects.bulk_create(experiencias)
+
+
+def proyectos_sinteticos(filas, rng):
+    return pd.DataFrame({
+        'id': range(1, filas + 1),
+        'presupuesto': [rng.choice([0, rng.randint(1, 50) * 1000000]) for _ in range(filas)],
+        'texto_completo': [' '.join(rng.choices(HABILIDADES + ROLES, k=rng.randint(0, 300))) for _ in range(filas)],
+    })
+
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+TOTALES = [0.0, 0.0]
+
+
+def reportar(nombre, esperado, t_anterior, obtenido, t_actual):
+    TOTALES[0] += t_anterior
+    TOTALES[1] += t_actual
+    np.testing.assert_allclose(np.asarray(obtenido, dtype=float), np.asarray(esperado, dtype=float), rtol=0, atol=1e-12)
+    print(f"{nombre:<34} {t_anterior:>9.3f}s {t_actual:>9.3f}s {t_anterior / t_actual:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--filas', type=int, default=100000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        print(f"Insertando {args.filas} profesionales sintéticos...")
+        poblar_profesionales(args.filas, rng)
+
+        # El texto concatenado se sigue cargando (lo usa TF-IDF); lo que se
+        # compara es interpretarlo en Python frente a los agregados SQL
+        professionals = pd.concat(iter_professionals(), ignore_index=True).drop(columns=PROFESSIONAL_FEATURES)
+        features = []
+        t_sql = 0.0
+        for inicio in range(0, len(professionals), CHUNK_SIZE):
+            ids = professionals['id'].values[inicio:inicio + CHUNK_SIZE].tolist()
+            bloque, duracion = cronometrar(lambda: professional_features(ids))
+            features.append(bloque)
+            t_sql += duracion
+        features = pd.concat(features)
+
+        print(f"{'Característica':<34} {'Anterior':>10} {'Actual':>10} {'Mejora':>9}")
+        anterior, t_anterior = cronometrar(lambda: (
+            legacy_experience_years(professionals['experiencia_laboral']),
+            legacy_education_level(professionals['estudios']),
+            legacy_skill_count(professionals['habilidades']),
+        ))
+        reportar('profesionales (texto vs SQL)',
+                 np.column_stack(anterior), t_anterior, features.values, t_sql)
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+    projects = proyectos_sinteticos(args.filas, rng)
+    matcher = ProfessionalProjectMatcher(index_dir=os.devnull)
+    matcher.projects_data = projects
+    anterior, t_anterior = cronometrar(lambda: legacy_project_complexity(projects))
+    actual, t_actual = cronometrar(matcher._calculate_project_complexity)
+    reportar('complejidad_proyecto', anterior, t_anterior, actual, t_actual)
+
+    numeric = features.values.astype(float)
+    similarities = np.random.default_rng(42).random(len(numeric))
+    anterior, t_anterior = cronometrar(lambda: legacy_rf_targets(features, 3.7))
+    actual, t_actual = cronometrar(lambda: base_compatibility(numeric) * min(3.7 / 5, 1))
+    reportar('targets Random Forest', anterior, t_anterior, actual, t_actual)
+
+    anterior, t_anterior = cronometrar(lambda: legacy_nn_targets(similarities, numeric))
+    actual, t_actual = cronometrar(lambda: similarities * 0.6 + numeric_score(numeric) * 0.4)
+    reportar('targets red neuronal', anterior, t_anterior, actual, t_actual)
+    print(f"{'total':<34} {TOTALES[0]:>9.3f}s {TOTALES[1]:>9.3f}s {TOTALES[0] / TOTALES[1]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()